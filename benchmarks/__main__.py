@@ -0,0 +1,120 @@
+"""Run the benchmark suite and store results as JSON
+
+Usage:
+    python -m benchmarks                      # full grid
+    python -m benchmarks --quick              # small grid for a fast check
+    python -m benchmarks -k figure_           # only cases whose name contains "figure_"
+    python -m benchmarks --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.cases import CASES, combinations
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(run, min_repeats=3, max_repeats=25, budget_seconds=1.0):
+    """Time `run()` repeatedly (after one warm-up call) within a time budget"""
+    run()
+    samples = []
+    deadline = time.perf_counter() + budget_seconds
+    while len(samples) < min_repeats or (len(samples) < max_repeats and time.perf_counter() < deadline):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'repeats': len(samples),
+        'min_ms': samples[0],
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    }
+
+
+def run_suite(quick=False, keyword=None):
+    results = []
+    for name, spec in CASES.items():
+        if keyword and keyword not in name:
+            continue
+        for params in combinations(spec['quick'] if quick else spec['grid']):
+            label = f"{name}[{', '.join(f'{k}={v}' for k, v in params.items())}]"
+            try:
+                stats = measure(spec['func'](**params))
+            except Exception as exc:
+                print(f"{label:<60} FAILED: {exc}", file=sys.stderr)
+                results.append({'case': name, 'params': params, 'error': str(exc)})
+                continue
+            print(f"{label:<60} median {stats['median_ms']:>10.2f} ms   p95 {stats['p95_ms']:>10.2f} ms")
+            results.append(dict({'case': name, 'params': params}, **stats))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print the median ratio against a previous run; return the number of regressions"""
+    with open(baseline_path) as f:
+        baseline = {(r['case'], json.dumps(r['params'], sort_keys=True)): r
+                    for r in json.load(f)['results'] if 'median_ms' in r}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.2f}x)")
+    for r in results:
+        old = baseline.get((r['case'], json.dumps(r['params'], sort_keys=True)))
+        if old is None or 'median_ms' not in r:
+            continue
+        ratio = r['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        flag = 'REGRESSION' if ratio > threshold else ''
+        regressions += bool(flag)
+        print(f"{r['case']:<32}{json.dumps(r['params']):<32}{old['median_ms']:>10.2f} -> "
+              f"{r['median_ms']:>10.2f} ms  {ratio:>6.2f}x  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='run the reduced parameter grid')
+    parser.add_argument('-k', dest='keyword', help='only run cases whose name contains this')
+    parser.add_argument('--out', help='result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='previous result file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='median slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = run_suite(quick=args.quick, keyword=args.keyword)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'quick': args.quick
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"\nWrote {len(results)} results to {out}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+"""Benchmark cases
+
+Every case is a function decorated with ``@case(param=[values...])``. It is
+called once per parameter combination to *prepare* the work and returns a
+zero-argument callable that is the thing being timed.
+"""
+import itertools
+import json
+import math
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CASES = {}
+
+# Sensor counts and history lengths from the current deployment up to the planned scale
+SENSOR_COUNTS = [15, 100, 1000, 10000]
+HISTORY_DAYS = [7, 30, 90, 365]
+INGEST_RATES = [1, 10, 100]  # readings per second into a 3-minute realtime window
+
+# Tamil Nadu bounding box for synthetic sensor placement
+TN_BOUNDS = {'lat': (8.1, 13.5), 'lon': (76.3, 80.3)}
+
+
+def case(quick=None, **grid):
+    """Register a benchmark; `quick` overrides the grid for --quick runs"""
+    def decorator(func):
+        CASES[func.__name__] = {'func': func, 'grid': grid, 'quick': quick or grid}
+        return func
+    return decorator
+
+
+def combinations(grid):
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def synthetic_locations(count, seed=0):
+    """{name: {'lat', 'lon'}} for `count` sensors spread over Tamil Nadu"""
+    rng = random.Random(seed)
+    return {
+        f"Sensor {i:05d}": {'lat': rng.uniform(*TN_BOUNDS['lat']), 'lon': rng.uniform(*TN_BOUNDS['lon'])}
+        for i in range(count)
+    }
+
+
+def synthetic_static_frame(sensors):
+    from smartcity.data import build_static_frame
+    return build_static_frame(synthetic_locations(sensors))
+
+
+def synthetic_geojson(polygons, vertices=200, seed=0):
+    """Write `polygons` circular district polygons to a temporary GeoJSON file"""
+    rng = random.Random(seed)
+    features = []
+    for i in range(polygons):
+        lat, lon = rng.uniform(*TN_BOUNDS['lat']), rng.uniform(*TN_BOUNDS['lon'])
+        ring = [[lon + 0.15 * math.cos(2 * math.pi * k / vertices),
+                 lat + 0.15 * math.sin(2 * math.pi * k / vertices)] for k in range(vertices)]
+        ring.append(ring[0])
+        features.append({'type': 'Feature', 'properties': {'id': i},
+                         'geometry': {'type': 'Polygon', 'coordinates': [ring]}})
+    handle, path = tempfile.mkstemp(suffix='.geojson')
+    with os.fdopen(handle, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    return path
+
+
+# Data generators
+
+@case(sensors=SENSOR_COUNTS, quick={'sensors': [15, 1000]})
+def generate_realtime_traffic_data(sensors):
+    from smartcity import data
+    from smartcity.registry import LocationRegistry
+    registry = LocationRegistry.from_mapping(synthetic_locations(sensors))
+    locations = registry.names[:100].tolist()
+    st.session_state.show_vellore_areas = False
+
+    def run():
+        saved, data.REGISTRY = data.REGISTRY, registry
+        try:
+            for name in locations:
+                data.generate_realtime_traffic_data(name)
+        finally:
+            data.REGISTRY = saved
+    return run
+
+
+@case(rate=INGEST_RATES, quick={'rate': [1, 100]})
+def update_realtime_data(rate):
+    from smartcity import data
+    from smartcity.sessions import RealtimeBuffer
+    now = datetime.now()
+    window = 180 * rate
+    st.session_state.show_vellore_areas = False
+    st.session_state.realtime_data = RealtimeBuffer(max_points=window)
+    for i in reversed(range(window)):
+        st.session_state.realtime_data.append(dict(data.generate_realtime_traffic_data('Vellore'),
+                                                   timestamp=now - timedelta(seconds=i / rate)))
+
+    def run():
+        for _ in range(rate):
+            data.update_realtime_data('Vellore')
+    return run
+
+
+@case(sensors=SENSOR_COUNTS, quick={'sensors': [15, 1000]})
+def generate_static_data(sensors):
+    from smartcity.data import build_static_frame
+    locations = synthetic_locations(sensors)
+    return lambda: build_static_frame(locations)
+
+
+@case(days=HISTORY_DAYS, quick={'days': [7, 90]})
+def generate_time_series_data(days):
+    from smartcity.data import generate_time_series_data
+    return lambda: generate_time_series_data.__wrapped__(days)
+
+
+def synthetic_week_hour(weeks, locations=30, seed=0):
+    """Week-hour accumulator holding `weeks` weeks of hourly readings per location"""
+    from smartcity.weekly import WeekHourAccumulator
+    rng = np.random.default_rng(seed)
+    accumulator = WeekHourAccumulator(locations)
+    hours = np.arange(weeks * 7 * 24, dtype='int64') + 480072  # hours since the epoch (a Monday)
+    timestamps = np.repeat(hours * 3600 * 10 ** 9, locations)
+    accumulator.add(timestamps, np.tile(np.arange(locations), len(hours)), rng.uniform(50, 200, len(timestamps)))
+    return accumulator
+
+
+@case(rate=INGEST_RATES, quick={'rate': [1, 100]})
+def week_hour_add(rate):
+    accumulator = synthetic_week_hour(1)
+    rng = np.random.default_rng(0)
+    locations = rng.integers(0, 30, rate)
+    values = rng.uniform(50, 200, rate)
+    clock = [accumulator.applied_until]
+
+    def run():
+        clock[0] += 10 ** 9
+        accumulator.add(np.full(rate, clock[0]), locations, values)
+    return run
+
+
+@case(weeks=[4, 52, 104], quick={'weeks': [4]})
+def generate_heatmap_matrix(weeks):
+    accumulator = synthetic_week_hour(weeks)
+    start, end = accumulator.date_range()
+    middle = start + timedelta(days=(end - start).days // 2)
+    return lambda: (accumulator.frame(), accumulator.frame(start, middle, location_ids=[0, 1, 2]))
+
+
+@case(sensors=SENSOR_COUNTS[:3], quick={'sensors': [15]})
+def generate_sensor_cluster_data(sensors):
+    from smartcity.data import build_sensor_layout
+    from smartcity.registry import LocationRegistry
+    df = synthetic_static_frame(sensors)
+    registry = LocationRegistry.from_mapping(synthetic_locations(sensors))
+    return lambda: build_sensor_layout(df, registry)
+
+
+@case(polygons=[38, 380, 3800], quick={'polygons': [38]})
+def choropleth_geometry(polygons):
+    from smartcity.geo import load_district_geojson
+    path = synthetic_geojson(polygons)
+    return lambda: load_district_geojson.__wrapped__(path)
+
+
+# Aggregations
+
+@case(days=HISTORY_DAYS, quick={'days': [7, 90]})
+def time_series_statistics(days):
+    from smartcity.data import generate_time_series_data
+    ts_data = generate_time_series_data.__wrapped__(days)
+
+    def run():
+        ts_data['traffic_volume'].mean()
+        ts_data['aqi'].mean()
+        ts_data['traffic_volume'].corr(ts_data['aqi'])
+        ts_data.loc[ts_data['traffic_volume'].idxmax(), 'hour']
+    return run
+
+
+@case(sensors=SENSOR_COUNTS, quick={'sensors': [15, 1000]})
+def distribution_summary(sensors):
+    df = synthetic_static_frame(sensors)
+    dist_df = pd.DataFrame({
+        'location': np.repeat(df['location'].values, 40),
+        'aqi': np.random.normal(np.repeat(df['aqi'].values, 40), 18)
+    })
+    return lambda: dist_df.groupby('location', observed=True)['aqi'].agg(['mean', 'median', 'std', 'min', 'max'])
+
+
+@case(sensors=SENSOR_COUNTS[:3], quick={'sensors': [15, 1000]})
+def rollup_ingest(sensors):
+    """One feed tick (a reading from every sensor) into the hierarchy cube"""
+    from smartcity.registry import LocationRegistry
+    from smartcity.rollup import HierarchyCube
+    registry = LocationRegistry.from_mapping(synthetic_locations(sensors))
+    cube = HierarchyCube(registry)
+    sensor_ids = np.arange(len(registry.sensor_location))
+    values = np.random.randint(20, 200, (len(sensor_ids), 2))
+    timestamps = np.full(len(sensor_ids), pd.Timestamp.now().value)
+    return lambda: cube.ingest(timestamps, registry.sensor_location, values, sensor_ids=sensor_ids)
+
+
+@case(sensors=SENSOR_COUNTS[:3], disorder=[0.0, 0.3], quick={'sensors': [1000], 'disorder': [0.0, 0.3]})
+def event_time_ingest(sensors, disorder):
+    """One feed tick through dedup and the reorder buffer; `disorder` of it are late repeats of older ticks"""
+    from smartcity import schema
+    from smartcity.eventtime import EventTimeIngest
+    ingest = EventTimeIngest(schema.SENSOR_READING, delay_s=20, allowed_lateness_s=900)
+    batch = np.empty(sensors, dtype=schema.SENSOR_READING)
+    batch['sensor'] = np.arange(sensors)
+    batch['aqi'] = np.random.uniform(20, 200, sensors)
+    batch['traffic_density'] = np.random.uniform(0, 100, sensors)
+    late = np.random.random(sensors) < disorder
+    tick = [pd.Timestamp.now().value // (10 * 10 ** 9)]
+
+    def run():
+        tick[0] += 1
+        batch['seq'] = tick[0] - late * np.random.randint(1, 10, sensors)
+        batch['timestamp'] = batch['seq'].astype('int64') * 10 * 10 ** 9
+        ingest.offer(batch)
+    return run
+
+
+def synthetic_sensor_readings(sensors, seconds, seed=0):
+    """Per-second SENSOR_READING records of `sensors` sensors over `seconds`, tick by tick"""
+    from smartcity import schema
+    rng = np.random.default_rng(seed)
+    rows = np.empty(sensors * seconds, dtype=schema.SENSOR_READING)
+    tick = np.repeat(np.arange(seconds), sensors)
+    rows['timestamp'] = pd.Timestamp.now().floor('s').value + tick * 10 ** 9
+    rows['sensor'] = np.tile(np.arange(sensors), seconds)
+    rows['seq'] = tick
+    rows['aqi'] = np.clip(120 + np.cumsum(rng.integers(-3, 4, len(rows))) % 80, 0, 500)
+    rows['traffic_density'] = rng.uniform(0, 100, len(rows)).round(1)
+    return rows
+
+
+@case(rows=[10000, 100000, 1000000], quick={'rows': [100000]})
+def backfill_parse_chunk(rows):
+    """Parse, validate and locate one CSV chunk of station readings and reduce it to hourly partials"""
+    from smartcity import backfill
+    from smartcity.registry import REGISTRY
+    rng = np.random.default_rng(0)
+    location = rng.integers(0, len(REGISTRY), rows)
+    frame = pd.DataFrame({
+        'timestamp': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400 * 30, rows), unit='s'))
+        .strftime('%Y-%m-%dT%H:%M:%S'),
+        'lat': REGISTRY.lat[location] + rng.normal(0, 0.01, rows),
+        'lon': REGISTRY.lon[location] + rng.normal(0, 0.01, rows),
+        'aqi': rng.integers(20, 300, rows),
+        'traffic_density': rng.uniform(0, 100, rows).round(1),
+        'vehicles_count': rng.integers(0, 5000, rows),
+        'avg_speed': rng.uniform(5, 80, rows).round(1)
+    })
+    path = os.path.join(tempfile.mkdtemp(), 'readings.csv')
+    frame.to_csv(path, index=False)
+    columns = backfill.read_header(path)
+    (start, end), = backfill.split_file(path, os.path.getsize(path))
+    return lambda: backfill.hourly_partials(backfill.parse_chunk(path, start, end, columns)[0])
+
+
+
+@case(draws=[1000, 5000, 10000], quick={'draws': [1000]})
+def scenario_simulate(draws):
+    """Monte Carlo what-if run of an odd-even and truck-ban policy over every location"""
+    from smartcity import scenarios
+    from smartcity.registry import REGISTRY
+    rng = np.random.default_rng(0)
+    hours = 24 * 30
+    ts = np.tile(np.arange(hours) * 3600, len(REGISTRY))
+    location = np.repeat(np.arange(len(REGISTRY)), hours)
+    traffic = rng.uniform(10, 90, len(ts))
+    aqi = 60 + 1.2 * traffic + rng.normal(0, 15, len(ts))
+    fleet = rng.uniform([200, 400, 20], [2000, 5000, 300], (len(REGISTRY), 3))
+    model = scenarios.TrafficAqiModel.fit(ts, location, aqi, traffic, fleet)
+    vellore = REGISTRY.district == REGISTRY.id('Vellore')
+    policies = [scenarios.policy(vellore, range(8, 21), cars=0.5, compliance=(0.6, 0.85)),
+                scenarios.policy(vellore, scenarios.RUSH_HOURS, trucks=1.0, compliance=(0.7, 0.95))]
+    return lambda: scenarios.simulate(model, policies, draws)
+
+@case(sensors=SENSOR_COUNTS[:3], quick={'sensors': [1000]})
+def hot_store_append(sensors):
+    """One per-second tick of every sensor into the compressed hot tier"""
+    from smartcity.hotstore import HotStore
+    rows = synthetic_sensor_readings(sensors, 600)
+    store = HotStore(rows.dtype, 'sensor', retention_s=3600)
+    ticks = np.split(rows, 600)
+    position = [0]
+
+    def run():
+        store.append(ticks[position[0] % 600])
+        position[0] += 1
+    return run
+
+
+@case(hours=[1, 6, 24], quick={'hours': [6]})
+def hot_store_range(hours):
+    """The last hour of one sensor's per-second readings from `hours` of compressed history"""
+    from smartcity.hotstore import HotStore
+    rows = synthetic_sensor_readings(1, hours * 3600)
+    store = HotStore(rows.dtype, 'sensor', retention_s=hours * 3600)
+    store.append(rows)
+    return lambda: store.readings(0, start_ns=store.newest - 3600 * 10 ** 9)
+
+
+@case(days=[1, 7, 30], quick={'days': [7]})
+def tiered_range_read(days):
+    """One sensor's readings over `days` from 100 sensors at one reading a minute, across hot, warm and cold"""
+    from smartcity.hotstore import HotStore
+    from smartcity.tiers import ColdParquet, TieredReadings, WarmSegments
+    rows = synthetic_sensor_readings(100, days * 1440)
+    rows['timestamp'] = rows['timestamp'][0] + (rows['timestamp'] - rows['timestamp'][0]) * 60
+    directory = tempfile.mkdtemp()
+    tiers = TieredReadings(HotStore(rows.dtype, 'sensor', retention_s=6 * 3600),
+                           WarmSegments(os.path.join(directory, 'warm'), rows.dtype, 'sensor'),
+                           ColdParquet(os.path.join(directory, 'cold'), rows.dtype, 'sensor'),
+                           warm_seconds=min(days, 7) * 86400 / 2, seal_after_seconds=900)
+    for day in np.array_split(rows, days):
+        tiers.append(day)
+        tiers.maintain()
+    return lambda: tiers.read(None, None, [42])
+
+
+@case(sensors=SENSOR_COUNTS[:3], quick={'sensors': [15, 1000]})
+def rollup_drilldown(sensors):
+    """State totals plus the per-district children table from the cube"""
+    from smartcity.registry import LocationRegistry
+    from smartcity.rollup import HierarchyCube
+    registry = LocationRegistry.from_mapping(synthetic_locations(sensors))
+    cube = HierarchyCube(registry)
+    sensor_ids = np.arange(len(registry.sensor_location))
+    now = pd.Timestamp.now().value
+    for minute in range(15):
+        cube.ingest(np.full(len(sensor_ids), now - minute * 60 * 10 ** 9), registry.sensor_location,
+                    np.random.randint(20, 200, (len(sensor_ids), 2)), sensor_ids=sensor_ids)
+
+    def run():
+        cube.stats(cube.state)
+        cube.stats(cube.children(cube.state))
+    return run
+
+
+@case(reports=[10000, 100000, 300000], cached=[False, True], quick={'reports': [100000], 'cached': [False, True]})
+def incident_search(reports, cached):
+    """Broad text query ('accident', about one report in eight): best 50 by BM25 plus facet counts over every match
+
+    Uncached runs read the query's matches for the facet counts; cached runs
+    (a rerun or a facet change) count from memory.
+    """
+    from smartcity.data import generate_incident_reports
+    from smartcity.search import IncidentIndex
+    random.seed(0)
+    index = IncidentIndex(os.path.join(tempfile.mkdtemp(), 'incidents.db'))
+    index.add_reports(generate_incident_reports(reports, hours=24 * 365))
+
+    def run():
+        if not cached:
+            index._matches.clear()
+        index.search('accident', limit=50)
+    return run
+
+
+# Page figure construction
+
+@case()
+def figure_pollution_matrix():
+    from smartcity.views.pollution_matrix import build_figure
+    matrix_data = synthetic_week_hour(4).frame()
+    return lambda: build_figure(matrix_data)
+
+
+@case(sensors=SENSOR_COUNTS, quick={'sensors': [15, 1000]})
+def figure_correlation_study(sensors):
+    from smartcity.views.correlation_study import build_figure
+    df = synthetic_static_frame(sensors)
+    return lambda: build_figure(df)
+
+
+@case(sensors=SENSOR_COUNTS, quick={'sensors': [15, 1000]})
+def figure_dot_map(sensors):
+    from smartcity.views.dot_map import build_figure
+    df = synthetic_static_frame(sensors)
+    return lambda: build_figure(df)
+
+
+@case(sensors=SENSOR_COUNTS[:3], quick={'sensors': [15]})
+def figure_distribution_analysis(sensors):
+    from smartcity.views.distribution_analysis import build_figure
+    df = synthetic_static_frame(sensors)
+    dist_df = pd.DataFrame({
+        'location': np.repeat(df['location'].values, 40),
+        'aqi': np.random.normal(np.repeat(df['aqi'].values, 40), 18)
+    })
+    return lambda: build_figure(dist_df)
+
+
+@case(sensors=[15, 100], quick={'sensors': [15]})
+def figure_network_graph(sensors):
+    from smartcity.views.network_graph import build_figure
+    df = synthetic_static_frame(sensors)
+    return lambda: build_figure(df)
+
+
+@case(quick={'page': ['Pollution Matrix', 'Dot Map']},
+      page=['Dashboard', 'Traffic Heatmap', 'Sensor Clusters', 'Time Trends', 'Pollution Matrix',
+            'Distribution Analysis', 'Correlation Study', 'Dot Map', 'Network Graph', 'Text Analysis'])
+def page_render(page):
+    """Full headless script run of one page (AppTest, no browser)"""
+    from streamlit.testing.v1 import AppTest
+
+    main_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+    app = AppTest.from_file(main_script, default_timeout=120)
+    app.session_state['page'] = page
+    app.session_state['external_refresh'] = True
+    app.run()
+
+    def run():
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+    return run
@@ -0,0 +1,330 @@
+"""Concurrent-session load test against a local server
+
+Starts the app through serve.py on free local ports (or targets an already
+running server with --url) and opens N browser-equivalent sessions over the
+Streamlit websocket protocol, each pinned to a page drawn from the page mix.
+Dashboard sessions are rerun by the server's own auto-refresh, exactly like a
+control-room screen; the other pages are rerun by the client after a think
+time, like an officer clicking around on a tablet.
+
+Each step reports per-rerun latency percentiles (rerun start to the last
+element delivered), rerun throughput and the server's CPU and RSS. The
+session counts are stepped up until the p95 latency breaks the SLO or the
+throughput stops growing, and the last step that held is reported as the
+saturation point.
+
+Usage:
+    python -m benchmarks.loadtest                                  # 1, 2, 4, ... 32 sessions
+    python -m benchmarks.loadtest --sessions 5,10,20 --duration 30
+    python -m benchmarks.loadtest --mix "Dashboard=0.6,Dot Map=0.2,Text Analysis=0.2"
+    python -m benchmarks.loadtest --url http://127.0.0.1:8501 --pid 12345
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+from benchmarks.__main__ import RESULTS_DIR, git_commit
+
+DEFAULT_MIX = 'Dashboard=0.5,Traffic Heatmap=0.1,Time Trends=0.1,Dot Map=0.1,Text Analysis=0.1,Sensor Clusters=0.1'
+DEFAULT_SESSIONS = '1,2,4,8,16,32'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_mix(text):
+    """'Dashboard=0.5,Dot Map=0.5' -> [('Dashboard', 0.5), ('Dot Map', 0.5)]"""
+    mix = []
+    for part in text.split(','):
+        page, _, weight = part.partition('=')
+        mix.append((page.strip(), float(weight or 1)))
+    total = sum(weight for _, weight in mix)
+    return [(page, weight / total) for page, weight in mix]
+
+
+def assign_pages(mix, sessions, seed=0):
+    """Pages for `sessions` sessions, proportional to the mix (largest remainder)"""
+    quotas = [(page, weight * sessions) for page, weight in mix]
+    pages = [page for page, quota in quotas for _ in range(int(quota))]
+    by_remainder = sorted(quotas, key=lambda q: q[1] - int(q[1]), reverse=True)
+    pages += [page for page, _ in by_remainder[:sessions - len(pages)]]
+    random.Random(seed).shuffle(pages)
+    return pages
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+class ProcessSampler:
+    """Samples CPU utilisation and RSS of a process from /proc (Linux)"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent = []
+        self.rss_bytes = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _cpu_seconds(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def _rss(self):
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        return None
+
+    def _run(self):
+        last_cpu, last_wall = self._cpu_seconds(), time.monotonic()
+        while not self._stop.wait(self.interval):
+            cpu, wall = self._cpu_seconds(), time.monotonic()
+            self.cpu_percent.append((cpu - last_cpu) / (wall - last_wall) * 100)
+            self.rss_bytes.append(self._rss())
+            last_cpu, last_wall = cpu, wall
+
+    def start(self):
+        if self.pid is None or not os.path.exists(f'/proc/{self.pid}/stat'):
+            return self
+        self._thread = threading.Thread(target=self._run, name='loadtest-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return {
+            'cpu_percent_mean': sum(self.cpu_percent) / len(self.cpu_percent) if self.cpu_percent else None,
+            'cpu_percent_max': max(self.cpu_percent, default=None),
+            'rss_mb_max': max(self.rss_bytes) / 1024 ** 2 if self.rss_bytes else None
+        }
+
+
+async def run_session(ws_url, page, deadline, record_after, think_seconds, rng, out):
+    """One browser-equivalent session; appends (page, latency_ms) per completed rerun to `out`"""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    ws = await websocket_connect(ws_url, subprotocols=['streamlit'])
+
+    async def request_rerun():
+        msg = BackMsg()
+        msg.rerun_script.query_string = urllib.parse.urlencode({'page': page})
+        await ws.write_message(msg.SerializeToString(), binary=True)
+        return time.monotonic()
+
+    requested_at = await request_rerun()
+    started_at = last_delta_at = None
+    next_request = None
+    try:
+        while time.monotonic() < deadline:
+            timeout = deadline - time.monotonic()
+            if next_request is not None:
+                timeout = min(timeout, max(0.0, next_request - time.monotonic()))
+            try:
+                raw = await asyncio.wait_for(ws.read_message(), timeout)
+            except asyncio.TimeoutError:
+                if next_request is not None and time.monotonic() >= next_request:
+                    requested_at, next_request = await request_rerun(), None
+                continue
+            if raw is None:
+                out['errors'] += 1
+                return
+
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof('type')
+            now = time.monotonic()
+            if kind == 'new_session':
+                started_at = requested_at if requested_at is not None else now
+                requested_at = last_delta_at = None
+            elif kind == 'delta':
+                last_delta_at = now
+            elif kind == 'script_finished' and started_at is not None:
+                if last_delta_at is not None and started_at >= record_after:
+                    out['latencies'].append((page, (last_delta_at - started_at) * 1000))
+                started_at = None
+                # Auto-refreshing pages rerun on their own; everything else waits for the "user"
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    next_request = now + rng.uniform(0.5, 1.5) * think_seconds
+    finally:
+        ws.close()
+
+
+async def run_step(ws_url, pages, duration, warmup, think_seconds, seed):
+    out = {'latencies': [], 'errors': 0}
+    started = time.monotonic()
+    deadline = started + warmup + duration
+    tasks = []
+    for i, page in enumerate(pages):
+        # Stagger connects over the first second so sessions do not rerun in lockstep
+        await asyncio.sleep(1.0 / len(pages))
+        tasks.append(asyncio.ensure_future(run_session(
+            ws_url, page, deadline, started + warmup, think_seconds, random.Random(seed + i), out)))
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            out['errors'] += 1
+    return out
+
+
+def summarize(sessions, pages, out, duration, resources):
+    latencies = sorted(ms for _, ms in out['latencies'])
+    per_page = {}
+    for page, ms in out['latencies']:
+        per_page.setdefault(page, []).append(ms)
+    return dict({
+        'sessions': sessions,
+        'page_counts': {page: pages.count(page) for page in sorted(set(pages))},
+        'reruns': len(latencies),
+        'reruns_per_second': len(latencies) / duration,
+        'errors': out['errors'],
+        'p50_ms': percentile(latencies, 0.50),
+        'p90_ms': percentile(latencies, 0.90),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else None,
+        'p95_ms_by_page': {page: percentile(sorted(values), 0.95) for page, values in sorted(per_page.items())}
+    }, **resources)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(timeout=180):
+    """Launch serve.py on free ports and wait until its caches are warm"""
+    port, ready_port = free_port(), free_port()
+    env = dict(os.environ, SMARTCITY_READY_PORT=str(ready_port))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'serve.py'), '--server.port', str(port),
+         '--server.headless', 'true', '--browser.gatherUsageStats', 'false'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{ready_port}/ready', timeout=1) as response:
+                if response.status == 200:
+                    return process, f'http://127.0.0.1:{port}'
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("server did not become ready in time")
+
+
+def is_saturated(step, previous, slo_ms):
+    """Reason this step is past saturation, or None if it held"""
+    if step['errors']:
+        return f"{step['errors']} session errors"
+    if step['p95_ms'] is None:
+        return "no reruns completed"
+    if step['p95_ms'] > slo_ms:
+        return f"p95 {step['p95_ms']:.0f} ms > SLO {slo_ms:.0f} ms"
+    if previous is not None and step['sessions'] > previous['sessions']:
+        expected = previous['reruns_per_second'] * step['sessions'] / previous['sessions']
+        if step['reruns_per_second'] < 0.5 * expected and step['reruns_per_second'] <= 1.05 * previous['reruns_per_second']:
+            return "throughput stopped growing with sessions"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent-session load test')
+    parser.add_argument('--sessions', default=DEFAULT_SESSIONS, help='comma-separated session counts to step through')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='page mix as "Page=weight,..."')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds per step')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds at the start of each step')
+    parser.add_argument('--think', type=float, default=5, help='mean seconds between reruns on non-refreshing pages')
+    parser.add_argument('--slo', type=float, default=2000, help='p95 rerun latency (ms) a step must stay under')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--pid', type=int, help='server process id to sample CPU/RSS from (with --url)')
+    parser.add_argument('--keep-going', action='store_true', help='run every step even after saturation')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='result file (default: benchmarks/results/loadtest-<commit>.json)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip('/'), args.pid
+    else:
+        print("Starting server and waiting for cache warm-up...")
+        server, base_url = start_server()
+        pid = server.pid
+    ws_url = base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+
+    steps = []
+    saturation = None
+    try:
+        for sessions in [int(n) for n in args.sessions.split(',')]:
+            pages = assign_pages(mix, sessions, args.seed)
+            sampler = ProcessSampler(pid).start()
+            out = asyncio.run(run_step(ws_url, pages, args.duration, args.warmup, args.think, args.seed))
+            step = summarize(sessions, pages, out, args.duration, sampler.stop())
+            step['saturated'] = is_saturated(step, steps[-1] if steps else None, args.slo)
+            steps.append(step)
+
+            fmt = lambda v, spec: 'n/a' if v is None else format(v, spec)
+            print(f"{sessions:>4} sessions  {step['reruns_per_second']:>6.2f} reruns/s  "
+                  f"p50 {fmt(step['p50_ms'], '>7.0f')}  p95 {fmt(step['p95_ms'], '>7.0f')}  "
+                  f"p99 {fmt(step['p99_ms'], '>7.0f')} ms  cpu {fmt(step['cpu_percent_mean'], '>5.0f')}%  "
+                  f"rss {fmt(step['rss_mb_max'], '>6.0f')} MB  {step['saturated'] or ''}")
+            if step['saturated'] and saturation is None:
+                saturation = {'sessions': sessions, 'reason': step['saturated']}
+                if not args.keep_going:
+                    break
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    held = [s['sessions'] for s in steps if not s['saturated']]
+    if saturation is None:
+        print(f"\nNo saturation up to {steps[-1]['sessions']} sessions")
+    else:
+        print(f"\nSaturated at {saturation['sessions']} sessions ({saturation['reason']}); "
+              f"last step within SLO: {max(held) if held else 'none'}")
+
+    commit = git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"loadtest-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'mix': dict(mix),
+                'duration': args.duration,
+                'think_seconds': args.think,
+                'slo_ms': args.slo
+            },
+            'steps': steps,
+            'max_sessions_within_slo': max(held) if held else None,
+            'saturation': saturation
+        }, f, indent=2)
+    print(f"Wrote {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""Production launcher: warm caches and expose readiness, then run the Streamlit app
+
+Usage: python serve.py [streamlit run options...]
+e.g.   python serve.py --server.port 8501 --server.headless true
+"""
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from smartcity import api, warmup
+
+if __name__ == '__main__':
+    warmup.start_readiness_server()
+    api.start_api_server()
+    warmup.start(wait_for_runtime=True)
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    sys.exit(stcli.main(['run', main_script] + sys.argv[1:], prog_name='streamlit'))
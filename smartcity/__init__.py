@@ -0,0 +1 @@
+"""Support modules for the Smart City Traffic & Pollution Monitor"""
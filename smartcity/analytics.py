@@ -0,0 +1,72 @@
+"""Heavy analytics run as scheduled jobs (see smartcity.jobs)
+
+These functions run in job pool workers, not in page reruns. Their inputs
+are plain values (file paths, arrays) and their results are pickled
+artifacts, so this module imports nothing from the app.
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+KM_PER_DEG = 111.32
+UNHEALTHY_AQI = 150
+
+
+def _read_history(history_path, sql, params):
+    conn = sqlite3.connect(f'file:{history_path}?mode=ro', uri=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def daily_summaries(history_path, days=90):
+    """Per district and day: mean and peak AQI, unhealthy hours, mean traffic and incidents"""
+    return _read_history(history_path, """
+SELECT day, district, ROUND(AVG(aqi), 1) AS mean_aqi, MAX(aqi) AS peak_aqi,
+       SUM(aqi > :unhealthy) AS unhealthy_hours, ROUND(AVG(traffic_density), 1) AS mean_traffic,
+       SUM(incidents) AS incidents, COUNT(*) AS readings
+FROM readings_v
+WHERE ts > (SELECT MAX(ts) FROM readings) - :days * 86400
+GROUP BY day, district
+ORDER BY day DESC, district""", {'days': days, 'unhealthy': UNHEALTHY_AQI})
+
+
+def history_correlations(history_path, days=30):
+    """Pearson correlation of AQI with traffic, vehicle count and speed per district (and statewide)"""
+    readings = _read_history(history_path, """
+SELECT district, aqi, traffic_density, vehicles_count, avg_speed
+FROM readings_v
+WHERE ts > (SELECT MAX(ts) FROM readings) - :days * 86400""", {'days': days})
+    rows = []
+    for district, group in [('Tamil Nadu', readings)] + list(readings.groupby('district')):
+        corr = group[['aqi', 'traffic_density', 'vehicles_count', 'avg_speed']].corr()['aqi']
+        rows.append({'district': district, 'traffic_aqi': corr['traffic_density'],
+                     'vehicles_aqi': corr['vehicles_count'], 'speed_aqi': corr['avg_speed'],
+                     'hours': len(group)})
+    return pd.DataFrame(rows).round(3)
+
+
+def sensor_groups(lat, lon, aqi, sensors_per_group=10, seed=0):
+    """k-means groups of sensors by position, with the recent AQI of each group
+
+    Returns a DataFrame with one row per group (centre, sensors, mean and
+    peak AQI, radius in km), highest mean AQI first. Sensors without a
+    recent reading are grouped but not counted in the AQI columns.
+    """
+    from scipy.cluster.vq import kmeans2
+
+    lat, lon, aqi = (np.asarray(a, dtype='float64') for a in (lat, lon, aqi))
+    scale = np.cos(np.radians(lat.mean()))
+    points = np.column_stack([lat, lon * scale])
+    k = int(np.clip(len(points) // sensors_per_group, 1, 50))
+    centres, labels = kmeans2(points, k, minit='++', seed=seed)
+    distance_km = np.hypot(*(points - centres[labels]).T) * KM_PER_DEG
+    frame = pd.DataFrame({'group': labels, 'aqi': aqi, 'distance_km': distance_km})
+    groups = frame.groupby('group').agg(sensors=('aqi', 'size'), mean_aqi=('aqi', 'mean'),
+                                        peak_aqi=('aqi', 'max'), radius_km=('distance_km', 'max'))
+    groups.insert(0, 'lon', centres[groups.index, 1] / scale)
+    groups.insert(0, 'lat', centres[groups.index, 0])
+    return groups.sort_values('mean_aqi', ascending=False).reset_index(drop=True).round(
+        {'lat': 4, 'lon': 4, 'mean_aqi': 1, 'peak_aqi': 0, 'radius_km': 1})
@@ -0,0 +1,290 @@
+"""Local HTTP API serving aggregates to other systems
+
+Read-only endpoints over the same in-process data the dashboard renders from
+(the rollup cube fed by ``feed.feed_rollup`` and the versioned dataset
+caches), so external consumers never trigger a second ingestion path::
+
+    GET /api/v1/kpis                      state and per-district live stats
+    GET /api/v1/rollup?node=Vellore       a node and its children
+    GET /api/v1/timeseries?node=Chennai   per-bucket stats of one node
+    GET /api/v1/readings?sensor=TN-0001   raw readings of one sensor (any retention tier)
+    GET /api/v1/history?days=7            hourly traffic/AQI history
+    GET /api/v1/static?vellore_areas=1    per-location analysis table
+    GET /api/v1/choropleth                district AQI snapshot plus live means
+
+Responses are JSON by default or an Arrow IPC stream with ``?format=arrow``
+(or ``Accept: application/vnd.apache.arrow.stream``). Every response carries
+an ETag derived from the request and the version of the data behind it, so a
+client polling with ``If-None-Match`` gets a bodyless 304 until the data
+changes, without the table being built. Bodies are sent with chunked
+transfer encoding, ``CHUNK_ROWS`` rows (JSON) or one record batch (Arrow) at
+a time, so large tables are never serialised into one buffer.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+API_PORT = int(os.environ.get('SMARTCITY_API_PORT', '8503'))
+# Loopback only unless a deployment opts in to serving other hosts (e.g. 0.0.0.0)
+API_HOST = os.environ.get('SMARTCITY_API_HOST', '127.0.0.1')
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+CHUNK_ROWS = 1000
+
+# path -> handler(params) returning (version, build) where build() -> DataFrame
+ENDPOINTS = {}
+
+_lock = threading.Lock()
+_server = None
+
+
+class ApiError(Exception):
+    """A request the API rejects; carries the HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def endpoint(path):
+    """Register an endpoint handler under /api/v1/<path>"""
+    def register(handler):
+        ENDPOINTS[f'/api/v1/{path}'] = handler
+        return handler
+    return register
+
+
+def _int_param(params, name, default, low, high):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if not low <= value <= high:
+        raise ApiError(400, f"{name} must be between {low} and {high}")
+    return value
+
+
+def _node(params, default):
+    from smartcity.rollup import CUBE, STATE_NAME
+    from smartcity.registry import REGISTRY
+
+    name = params.get('node', default)
+    if name == STATE_NAME:
+        return CUBE.state
+    try:
+        return REGISTRY.id(name)
+    except KeyError:
+        raise ApiError(404, f"unknown node {name!r}")
+
+
+def _live_cube():
+    """The shared rollup cube, brought up to date, and its feed version"""
+    from smartcity import feed
+    from smartcity.rollup import CUBE
+
+    feed.feed_rollup()
+    return CUBE, feed.rollup_version()
+
+
+@endpoint('kpis')
+def kpis(params):
+    window = _int_param(params, 'window', 15, 1, 180)
+    cube, version = _live_cube()
+    nodes = np.concatenate([[cube.state], cube.registry.districts])
+    return version, lambda: cube.frame(nodes, window)
+
+
+@endpoint('rollup')
+def rollup(params):
+    from smartcity.rollup import STATE_NAME
+
+    window = _int_param(params, 'window', 15, 1, 180)
+    node = _node(params, STATE_NAME)
+    cube, version = _live_cube()
+    return version, lambda: cube.frame(np.concatenate([[node], cube.children(node)]), window)
+
+
+@endpoint('timeseries')
+def timeseries(params):
+    from smartcity.rollup import STATE_NAME
+
+    buckets = _int_param(params, 'buckets', 60, 1, 180)
+    node = _node(params, STATE_NAME)
+    cube, version = _live_cube()
+    return version, lambda: cube.series(node, buckets)
+
+
+@endpoint('readings')
+def readings(params):
+    from smartcity import feed
+    from smartcity.registry import REGISTRY
+
+    code = params.get('sensor', '')
+    matches = np.flatnonzero(REGISTRY.sensor_code == code)
+    if not len(matches):
+        raise ApiError(404, f"unknown sensor {code!r}")
+    minutes = _int_param(params, 'minutes', 60, 1, 7 * 24 * 60)
+    _, version = _live_cube()
+    return version, lambda: feed.sensor_readings(int(matches[0]), minutes)
+
+
+@endpoint('history')
+def history(params):
+    from smartcity import data, versions
+
+    days = _int_param(params, 'days', 7, 1, 30)
+    return versions.current('time_series'), lambda: data.generate_time_series_data(days)
+
+
+@endpoint('static')
+def static(params):
+    from smartcity import data, versions
+
+    vellore_areas = params.get('vellore_areas', '0') in ('1', 'true')
+    return versions.current('static_data'), lambda: data.generate_static_data(vellore_areas)
+
+
+@endpoint('choropleth')
+def choropleth(params):
+    from smartcity import data
+
+    window = _int_param(params, 'window', 15, 1, 180)
+    cube, version = _live_cube()
+
+    def build():
+        df = data.generate_district_aqi()
+        # Live means only exist for districts the registry has sensors in
+        known = df['district'].isin(cube.registry.names)
+        ids = cube.registry.ids(df.loc[known, 'district'])
+        df['live_aqi'] = np.nan
+        df.loc[known, 'live_aqi'] = cube.stats(ids, window)['mean'][:, cube.metrics.index('aqi')]
+        return df
+
+    return version, build
+
+
+def etag(path, params, fmt, version):
+    """Quoted strong validator for a response"""
+    key = repr((path, sorted(params.items()), fmt, version)).encode()
+    return '"%s"' % hashlib.sha1(key).hexdigest()
+
+
+def etag_matches(tag, if_none_match):
+    """Whether an If-None-Match header value lists `tag` (weak comparison) or is ``*``"""
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == tag:
+            return True
+    return False
+
+
+def _json_chunks(df, version):
+    """JSON document {"version": ..., "data": [records]} in CHUNK_ROWS pieces"""
+    yield ('{"version": %s, "data": [' % json.dumps(version, default=str)).encode()
+    for start in range(0, len(df), CHUNK_ROWS):
+        rows = df.iloc[start:start + CHUNK_ROWS].to_json(orient='records', date_format='iso')[1:-1]
+        yield ((',' if start else '') + rows).encode()
+    yield b']}'
+
+
+def _arrow_chunks(df):
+    """Arrow IPC stream, one record batch per chunk"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        yield _drain(sink)
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)  # end-of-stream marker
+
+
+def _drain(sink):
+    chunk = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return chunk
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET-only handler for the ENDPOINTS registry"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        fmt = params.pop('format', None)
+        if fmt is None:
+            fmt = 'arrow' if ARROW_MIME in self.headers.get('Accept', '') else 'json'
+
+        try:
+            handler = ENDPOINTS.get(url.path)
+            if handler is None:
+                raise ApiError(404, f"unknown endpoint {url.path}")
+            if fmt not in ('json', 'arrow'):
+                raise ApiError(400, "format must be json or arrow")
+            version, build = handler(params)
+            tag = etag(url.path, params, fmt, version)
+            if etag_matches(tag, self.headers.get('If-None-Match', '')):
+                self.send_response(304)
+                self.send_header('ETag', tag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            df = build()
+        except ApiError as exc:
+            self._send_error(exc.status, str(exc))
+            return
+        except Exception as exc:
+            logger.exception("API request %s failed", self.path)
+            self._send_error(500, str(exc))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', ARROW_MIME if fmt == 'arrow' else 'application/json')
+        self.send_header('ETag', tag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        chunks = _arrow_chunks(df) if fmt == 'arrow' else _json_chunks(df, version)
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _send_error(self, code, message):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def start_api_server(port=API_PORT, host=API_HOST):
+    """Serve the API on a side port; no-op if already running or the port is taken"""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), ApiHandler)
+        except OSError as exc:
+            logger.warning("API not started on %s:%s: %s", host, port, exc)
+            return None
+        threading.Thread(target=_server.serve_forever, name='api', daemon=True).start()
+    return _server
@@ -0,0 +1,458 @@
+"""Parallel bulk import of historical station readings from CSV exports
+
+Usage:
+    python -m smartcity.backfill exports/vellore-*.csv
+    python -m smartcity.backfill --workers 8 --chunk-mb 32 chennai-2019-2024.csv
+
+Each file needs a header row with at least these columns (in any order;
+other columns, such as a station name, are ignored)::
+
+    timestamp, lat, lon, aqi, traffic_density, vehicles_count, avg_speed[, incidents]
+
+Timestamps are local wall-clock times, as the app stores them; timestamps
+with a UTC offset are converted to local time.
+
+Files are split at line boundaries into chunks of about ``--chunk-mb``
+megabytes, and a process pool parses the chunks. A worker reads its byte
+range with the explicit column types of ``DTYPES`` and validates every
+reading. Each valid reading goes to the nearest registry location (district
+or area, the ``TN_DISTRICTS``/``VELLORE_AREAS`` coordinates) within
+``--max-km``. The worker then reduces the chunk to per-(location, hour) sums
+and writes them to a Parquet part file. Readings are rejected, and counted
+by reason, for an unreadable time, a missing value, a value out of
+``LIMITS`` or a position too far from every location.
+
+When every chunk has been parsed, the parts are merged into hourly readings
+(means per hour, incidents summed) and written to the history store. An
+imported hour replaces the stored reading of the same location and hour,
+which is usually the app's synthetic seed history; with ``--keep-stored``
+stored hours are kept and the imported ones reported as skipped. New hours
+are added to the Pollution Matrix week-hour accumulator in the same pass,
+so nothing is rescanned. When stored hours were replaced, the accumulator
+cannot take their old values back and is rebuilt from the store instead.
+If no accumulator has been saved yet, the app seeds one from the whole
+store when it first needs it.
+
+The part files are the checkpoint. They live under
+``data/backfill/<file key>/``, and the file key changes when a file is
+edited. An interrupted run can be repeated with the same arguments: chunks
+that already have a part, and files whose import finished (``done.json``),
+are skipped. The hourly readings to add are checkpointed too, before the
+store is written, so an import interrupted between the store and the
+accumulator finishes both; the checkpoint records when the accumulator was
+updated, so a resumed run does not add the hours twice. Imported hours
+newer than the accumulator's watermark move it forward, as the app's own
+hours do, so the app does not add them again when it loads the
+accumulator. ``--restart`` discards the checkpoints of the given files;
+importing a file again writes the same hours and changes nothing.
+
+Stop the app processes while importing. They hold the week-hour accumulator
+in memory and would save their copy over the imported totals.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from smartcity.history import READING_COLUMNS
+from smartcity.registry import REGISTRY
+from smartcity.spatial import KM_PER_DEG, SensorTree
+
+NS_PER_HOUR = 3600 * 10 ** 9
+CHUNK_MB = 64
+MAX_DISTANCE_KM = 25.0
+
+# Column types read from the CSV; counts are floats so that blank cells parse (and are then rejected)
+DTYPES = {
+    'timestamp': 'str',
+    'lat': 'float64',
+    'lon': 'float64',
+    'aqi': 'float32',
+    'traffic_density': 'float32',
+    'vehicles_count': 'float64',
+    'avg_speed': 'float32',
+    'incidents': 'float64'
+}
+REQUIRED = ['timestamp', 'lat', 'lon', 'aqi', 'traffic_density', 'vehicles_count', 'avg_speed']
+MEASURES = ['aqi', 'traffic_density', 'vehicles_count', 'avg_speed', 'incidents']
+
+# Accepted value ranges (inclusive); None leaves that side open
+LIMITS = {
+    'aqi': (0, 1000),
+    'traffic_density': (0, 100),
+    'vehicles_count': (0, None),
+    'avg_speed': (0, 200),
+    'incidents': (0, None)
+}
+REJECT_REASONS = ('bad_time', 'missing_value', 'out_of_range', 'too_far')
+
+_tree = [None]
+
+
+def _location_tree():
+    """KD-tree over the registry's location coordinates, built once per worker process"""
+    if _tree[0] is None:
+        _tree[0] = SensorTree(REGISTRY.lat, REGISTRY.lon)
+    return _tree[0]
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        line = f.readline().decode('utf-8-sig')
+    return [name.strip() for name in next(csv.reader([line]))]
+
+
+def split_file(path, chunk_bytes):
+    """[(start, end)] byte ranges of whole lines after the header, each about `chunk_bytes` long"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        bounds = [f.tell()]
+        while bounds[-1] < size:
+            f.seek(bounds[-1] + chunk_bytes)
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def file_key(path):
+    """Checkpoint key of a file: its path, size and modification time"""
+    stat = os.stat(path)
+    ident = f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    return hashlib.sha1(ident.encode()).hexdigest()[:16]
+
+
+def _local_times(values, time_format):
+    """Timestamps as naive local times (NaT where unreadable)"""
+    try:
+        times = pd.to_datetime(values, format=time_format, errors='coerce')
+    except ValueError:
+        # Mixed UTC offsets only parse as UTC
+        times = pd.to_datetime(values, format=time_format, errors='coerce', utc=True)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(datetime.now().astimezone().tzinfo).dt.tz_localize(None)
+    return times
+
+
+def parse_chunk(path, start, end, columns, time_format='ISO8601', max_km=MAX_DISTANCE_KM):
+    """Valid readings of one byte range -> (DataFrame with ts_ns, location_id and MEASURES, rejected per reason)"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    usecols = [name for name in columns if name in DTYPES]
+    dtypes = {name: DTYPES[name] for name in usecols}
+    try:
+        frame = pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=usecols, dtype=dtypes)
+    except ValueError:
+        # A malformed number somewhere in the chunk: read it as text and let validation reject those rows
+        frame = pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=usecols, dtype='str')
+        for name in usecols:
+            if name != 'timestamp':
+                frame[name] = pd.to_numeric(frame[name], errors='coerce').astype(DTYPES[name])
+    if 'incidents' not in frame:
+        frame['incidents'] = 0.0
+
+    times = _local_times(frame['timestamp'], time_format)
+    lat, lon = frame['lat'].to_numpy(), frame['lon'].to_numpy()
+    located = np.isfinite(lat) & np.isfinite(lon)
+    distance_km = np.full(len(frame), np.inf)
+    location_id = np.full(len(frame), -1, dtype='int64')
+    if located.any():
+        dist, idx = _location_tree().query(lat[located], lon[located], 1)
+        distance_km[located] = dist[:, 0] * KM_PER_DEG
+        location_id[located] = idx[:, 0]
+
+    values = frame[MEASURES]
+    out_of_range = np.zeros(len(frame), dtype=bool)
+    for name, (low, high) in LIMITS.items():
+        column = values[name].to_numpy()
+        if low is not None:
+            out_of_range |= column < low
+        if high is not None:
+            out_of_range |= column > high
+    checks = {
+        'bad_time': times.isna().to_numpy(),
+        'missing_value': values.isna().any(axis=1).to_numpy() | ~located,
+        'out_of_range': out_of_range,
+        'too_far': distance_km > max_km
+    }
+    # Each rejected reading is counted under the first check it fails
+    rejected = np.zeros(len(frame), dtype=bool)
+    counts = {}
+    for reason in REJECT_REASONS:
+        counts[reason] = int((checks[reason] & ~rejected).sum())
+        rejected |= checks[reason]
+
+    valid = ~rejected
+    readings = values[valid].reset_index(drop=True)
+    readings.insert(0, 'location_id', location_id[valid])
+    readings.insert(0, 'ts_ns', times[valid].to_numpy().astype('int64'))
+    return readings, counts
+
+
+def hourly_partials(readings):
+    """Per-(location, hour) reading count and sums of MEASURES; `ts` is the hour in Unix seconds"""
+    hours = readings['ts_ns'].to_numpy() // NS_PER_HOUR * 3600
+    sums = readings[MEASURES].astype('float64')
+    sums.insert(0, 'count', 1)
+    sums.insert(0, 'ts', hours)
+    sums.insert(0, 'location_id', readings['location_id'].to_numpy())
+    return sums.groupby(['location_id', 'ts'], sort=False).sum().reset_index()
+
+
+def _process_chunk(path, start, end, columns, part, time_format, max_km):
+    """Worker: parse one chunk and write its hourly partials to `part` -> chunk stats"""
+    readings, rejected = parse_chunk(path, start, end, columns, time_format, max_km)
+    partials = hourly_partials(readings)
+    tmp = f'{part}.{os.getpid()}.tmp'
+    partials.to_parquet(tmp, index=False)
+    os.replace(tmp, part)
+    stats = {'readings': len(readings) + sum(rejected.values()), 'valid': len(readings),
+             'rejected': rejected, 'bytes': end - start}
+    # The stats file is written last and marks the chunk as done
+    with open(f'{part}.json.tmp', 'w') as f:
+        json.dump(stats, f)
+    os.replace(f'{part}.json.tmp', f'{part}.json')
+    return stats
+
+
+def _plan(path, directory, chunk_bytes):
+    """Chunk ranges of a file, fixed by its first run so a resumed run matches the existing parts"""
+    plan_path = os.path.join(directory, 'plan.json')
+    if os.path.exists(plan_path):
+        with open(plan_path) as f:
+            return [tuple(chunk) for chunk in json.load(f)['chunks']]
+    os.makedirs(directory, exist_ok=True)
+    chunks = split_file(path, chunk_bytes)
+    with open(plan_path, 'w') as f:
+        json.dump({'path': os.path.abspath(path), 'chunks': chunks}, f)
+    return chunks
+
+
+def merge_partials(parts):
+    """Hourly readings (READING_COLUMNS) from the partials of any number of chunks"""
+    frames = [pd.read_parquet(part) for part in parts]
+    if not frames:
+        return pd.DataFrame(columns=READING_COLUMNS)
+    sums = pd.concat(frames, ignore_index=True).groupby(['location_id', 'ts']).sum().reset_index()
+    count = sums['count'].to_numpy()
+    return pd.DataFrame({
+        'ts': sums['ts'].astype('int64'),
+        'location_id': sums['location_id'].astype('int64'),
+        'aqi': (sums['aqi'] / count).round(1),
+        'traffic_density': (sums['traffic_density'] / count).round(1),
+        'vehicles_count': (sums['vehicles_count'] / count).round().astype('int64'),
+        'avg_speed': (sums['avg_speed'] / count).round(1),
+        'incidents': sums['incidents'].round().astype('int64')
+    })
+
+
+def _summarise(stats):
+    total = {'readings': 0, 'valid': 0, 'rejected': dict.fromkeys(REJECT_REASONS, 0)}
+    for chunk in stats:
+        total['readings'] += chunk['readings']
+        total['valid'] += chunk['valid']
+        for reason, count in chunk['rejected'].items():
+            total['rejected'][reason] += count
+    return total
+
+
+def _update_accumulator(accumulator, store, new, progress_path, report):
+    """Add the imported hours to the week-hour accumulator exactly once and save it
+
+    Hours up to the accumulator's watermark are added as historical. The
+    newer ones are read back from the store together with any other stored
+    hours past the watermark, like the app catches up on load, so the
+    watermark moves past them and the app does not add them again.
+    """
+    with open(progress_path) as f:
+        progress = json.load(f)
+    if progress.get('accumulated'):
+        return
+    # Readings included before this step: a run interrupted after the save finds a different count
+    if progress.setdefault('accumulator_readings', len(accumulator)) != len(accumulator):
+        report("Week-hour accumulator: already updated")
+    else:
+        _write_json(progress_path, progress)
+        older = new[new['ts'].to_numpy() * 10 ** 9 <= accumulator.applied_until]
+        added = accumulator.add(older['ts'].to_numpy() * 10 ** 9, older['location_id'].to_numpy(),
+                                older['aqi'].to_numpy(), historical=True) if len(older) else 0
+        newer, _ = store.query("SELECT ts, location_id, aqi FROM readings WHERE ts > :after ORDER BY ts",
+                               {'after': accumulator.applied_until // 10 ** 9}, row_limit=10 ** 8)
+        added += accumulator.add(newer['ts'].to_numpy() * 10 ** 9, newer['location_id'].to_numpy(),
+                                 newer['aqi'].to_numpy())
+        accumulator.save()
+        report(f"Week-hour accumulator: {added:,} hourly readings added")
+    progress['accumulated'] = True
+    _write_json(progress_path, progress)
+
+
+def _rebuild_accumulator(accumulator, store, path, report):
+    """Recount an empty accumulator from every stored hour and save it to `path`"""
+    for chunk in store.scan(['ts', 'location_id', 'aqi']):
+        accumulator.add(chunk['ts'].to_numpy() * 10 ** 9, chunk['location_id'].to_numpy(), chunk['aqi'].to_numpy())
+    accumulator.save(path)
+    report(f"Week-hour accumulator: rebuilt from {len(accumulator):,} stored hourly readings")
+
+
+def _write_json(path, value):
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(value, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def backfill(paths, workers=None, chunk_mb=CHUNK_MB, checkpoint_dir=None, time_format='ISO8601',
+             max_km=MAX_DISTANCE_KM, keep_stored=False, report=print):
+    """Import CSV files into the history store and the week-hour accumulator -> summary dict
+
+    Imported hours replace the stored readings of the same location and
+    hour, or, with `keep_stored`, are skipped where the store has one.
+    """
+    from smartcity import data
+    from smartcity.history import HistoryStore
+    from smartcity.weekly import WeekHourAccumulator
+
+    checkpoint_dir = checkpoint_dir or os.path.join(data.DATA_DIR, 'backfill')
+    started = time.perf_counter()
+    files = []  # (path, checkpoint directory, [(chunk index, start, end, part)])
+    tasks = []
+    for path in paths:
+        directory = os.path.join(checkpoint_dir, file_key(path))
+        if os.path.exists(os.path.join(directory, 'done.json')):
+            report(f"{path}: already imported, skipped")
+            continue
+        chunks = [(i, start, end, os.path.join(directory, f'{i:05d}.parquet'))
+                  for i, (start, end) in enumerate(_plan(path, directory, int(chunk_mb * 2 ** 20)))]
+        files.append((path, directory, chunks))
+        pending = [chunk for chunk in chunks if not os.path.exists(chunk[3] + '.json')]
+        if len(pending) < len(chunks):
+            report(f"{path}: resuming, {len(chunks) - len(pending)} of {len(chunks)} chunks already parsed")
+        tasks += [(path, read_header(path)) + chunk for chunk in pending]
+
+    if not files:
+        return {'files': {}, 'hours_added': 0, 'hours_replaced': 0, 'hours_skipped': 0,
+                'seconds': round(time.perf_counter() - started, 1)}
+
+    total_bytes = sum(end - start for _, _, _, start, end, _ in tasks)
+    done_bytes = parsed = 0
+    if tasks:
+        report(f"Parsing {len(tasks)} chunks ({total_bytes / 2 ** 20:.1f} MB) with {workers or os.cpu_count()} workers")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_process_chunk, path, start, end, columns, part, time_format, max_km):
+                       (path, index) for path, columns, index, start, end, part in tasks}
+            for n, future in enumerate(as_completed(futures), 1):
+                path, index = futures[future]
+                stats = future.result()
+                done_bytes += stats['bytes']
+                parsed += stats['readings']
+                elapsed = time.perf_counter() - started
+                eta = elapsed / done_bytes * (total_bytes - done_bytes) if done_bytes else 0
+                report(f"[{n:>{len(str(len(tasks)))}}/{len(tasks)}] {os.path.basename(path)} chunk {index}: "
+                       f"{stats['valid']:,} valid, {stats['readings'] - stats['valid']:,} rejected | "
+                       f"{parsed / elapsed:,.0f} readings/s, {100 * done_bytes / total_bytes:.0f}%, eta {eta:.0f} s")
+
+    store = HistoryStore(os.path.join(data.DATA_DIR, 'history.db'))
+    store.set_locations(REGISTRY)
+    # The hours to add are written down before the store is touched: a run interrupted between the
+    # store and the accumulator repeats both with the same rows instead of finding them all stored
+    run = hashlib.sha1('|'.join(sorted(directory for _, directory, _ in files)).encode()).hexdigest()[:16]
+    pending_path = os.path.join(checkpoint_dir, f'{run}.new.parquet')
+    if os.path.exists(pending_path):
+        rows = pd.read_parquet(pending_path)
+        with open(f'{pending_path}.json') as f:
+            counts = json.load(f)
+        report(f"Resuming the store update with {len(rows):,} hourly readings")
+    else:
+        # Merge every file's parts together, so hours covered by several files are averaged over all of them
+        hourly = merge_partials([part for _, _, chunks in files for _, _, _, part in chunks])
+        new = store.new_readings(hourly)
+        stored = len(hourly) - len(new)
+        rows = new if keep_stored else hourly
+        counts = {'added': len(new), 'replaced': 0 if keep_stored else stored, 'skipped': stored if keep_stored else 0}
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        _write_json(f'{pending_path}.json', counts)
+        rows.to_parquet(f'{pending_path}.tmp', index=False)
+        os.replace(f'{pending_path}.tmp', pending_path)
+    if counts['replaced']:
+        store.add_readings(rows)
+    else:
+        store.add_new_readings(rows)
+    report(f"History store: {counts['added']:,} hourly readings added, {counts['replaced']:,} stored hours replaced, "
+           f"{counts['skipped']:,} stored hours skipped")
+    if len(rows) and os.path.exists(data.WEEK_HOUR_PATH):
+        if counts['replaced']:
+            # The accumulator cannot take back the values it holds for the replaced hours
+            _rebuild_accumulator(WeekHourAccumulator(len(REGISTRY)), store, data.WEEK_HOUR_PATH, report)
+        else:
+            _update_accumulator(WeekHourAccumulator(len(REGISTRY), data.WEEK_HOUR_PATH), store, rows,
+                                f'{pending_path}.json', report)
+
+    summary = {'files': {}, 'hours_added': counts['added'], 'hours_replaced': counts['replaced'],
+               'hours_skipped': counts['skipped']}
+    for path, directory, chunks in files:
+        stats = []
+        for *_, part in chunks:
+            with open(part + '.json') as f:
+                stats.append(json.load(f))
+        file_summary = summary['files'][path] = _summarise(stats)
+        with open(os.path.join(directory, 'done.json'), 'w') as f:
+            json.dump(dict(file_summary, path=os.path.abspath(path),
+                           finished=datetime.now().isoformat(timespec='seconds')), f, indent=2)
+        # Only the done marker is kept; the parts are not needed once their hours are stored
+        for name in os.listdir(directory):
+            if name != 'done.json':
+                os.remove(os.path.join(directory, name))
+    os.remove(pending_path)
+    os.remove(f'{pending_path}.json')
+    summary['seconds'] = round(time.perf_counter() - started, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='+', help='CSV exports to import')
+    parser.add_argument('--workers', type=int, help='parser processes (default: one per CPU)')
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_MB, help='approximate chunk size')
+    parser.add_argument('--checkpoint-dir', help='where part files are kept (default: data/backfill)')
+    parser.add_argument('--time-format', default='ISO8601', help='strftime format of the timestamp column')
+    parser.add_argument('--max-km', type=float, default=MAX_DISTANCE_KM,
+                        help='readings farther than this from every location are rejected')
+    parser.add_argument('--keep-stored', action='store_true',
+                        help='skip hours the history store already holds instead of replacing them')
+    parser.add_argument('--restart', action='store_true', help='discard checkpoints of these files first')
+    args = parser.parse_args()
+
+    for path in args.files:
+        if not os.path.isfile(path):
+            parser.error(f"{path}: no such file")
+        missing = [name for name in REQUIRED if name not in read_header(path)]
+        if missing:
+            parser.error(f"{path}: missing columns {', '.join(missing)}")
+    if args.restart:
+        from smartcity.data import DATA_DIR
+
+        for path in args.files:
+            shutil.rmtree(os.path.join(args.checkpoint_dir or os.path.join(DATA_DIR, 'backfill'), file_key(path)),
+                          ignore_errors=True)
+
+    summary = backfill(args.files, args.workers, args.chunk_mb, args.checkpoint_dir, args.time_format, args.max_km,
+                       args.keep_stored)
+    print(f"\n{'File':<40}{'readings':>12}{'valid':>12}  rejected")
+    for path, stats in summary['files'].items():
+        reasons = ', '.join(f"{reason} {count:,}" for reason, count in stats['rejected'].items() if count) or '-'
+        print(f"{os.path.basename(path):<40}{stats['readings']:>12,}{stats['valid']:>12,}  {reasons}")
+    print(f"\n{summary['hours_added']:,} hours added, {summary['hours_replaced']:,} replaced, "
+          f"{summary['hours_skipped']:,} skipped, in {summary['seconds']} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Dependency-tracked cache layer over st.cache_data
+
+Each cached artifact declares the source datasets it is derived from::
+
+    @versioned_cache(depends_on=('static_data',))
+    def generate_sensor_cluster_data(show_vellore_areas): ...
+
+The current versions of those datasets (see smartcity.versions) are part of
+the cache key, so an entry is recomputed exactly when one of its sources gets
+a new version and never otherwise. Superseded entries are dropped by the
+per-function ``max_entries`` LRU bound instead of waiting for a TTL. Every
+function keeps call/miss counters for the diagnostics views.
+"""
+import functools
+import threading
+
+import streamlit as st
+
+from smartcity import diagnostics, versions
+
+# qualified name -> {'depends_on': (...), 'calls': n, 'misses': n}
+_metrics = {}
+_metrics_lock = threading.Lock()
+# Set by the miss path of the call running on this thread
+_call = threading.local()
+
+
+def _count(name, field):
+    with _metrics_lock:
+        _metrics[name][field] += 1
+
+
+def versioned_cache(depends_on=(), max_entries=16):
+    """Cache a function with st.cache_data, invalidated by new versions of `depends_on`"""
+    depends_on = tuple(depends_on)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        _metrics[name] = {'depends_on': depends_on, 'calls': 0, 'misses': 0}
+
+        def compute(data_versions, *args, **kwargs):
+            _count(name, 'misses')
+            _call.missed = True
+            return func(*args, **kwargs)
+
+        # st.cache_data keys its storage on module + qualname; keep them distinct per function
+        compute.__module__ = func.__module__
+        compute.__qualname__ = func.__qualname__
+        cached = st.cache_data(max_entries=max_entries, show_spinner=False)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _count(name, 'calls')
+            # Save the enclosing call's flag: a cached function may call another on a miss
+            outer, _call.missed = getattr(_call, 'missed', False), False
+            try:
+                result = cached(versions.current(*depends_on), *args, **kwargs)
+                diagnostics.note_cache(not _call.missed)
+            finally:
+                _call.missed = outer
+            return result
+
+        wrapper.clear = cached.clear
+        wrapper.depends_on = depends_on
+        return wrapper
+
+    return decorator
+
+
+def metrics():
+    """Per-function calls, hits, misses and hit rate"""
+    with _metrics_lock:
+        rows = {}
+        for name, m in _metrics.items():
+            hits = m['calls'] - m['misses']
+            rows[name] = {
+                'depends_on': m['depends_on'],
+                'calls': m['calls'],
+                'hits': hits,
+                'misses': m['misses'],
+                'hit_rate': hits / m['calls'] if m['calls'] else None
+            }
+        return rows
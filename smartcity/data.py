@@ -0,0 +1,460 @@
+"""Location tables and cached data generators shared by every page"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from smartcity import schema, sessions, versions
+from smartcity.cache import versioned_cache
+from smartcity.registry import REGISTRY
+
+# Tamil Nadu districts and Vellore city areas with coordinates (see smartcity/locations.json)
+TN_DISTRICTS = REGISTRY.mapping(REGISTRY.districts)
+VELLORE_ID = REGISTRY.id('Vellore')
+VELLORE_AREAS = REGISTRY.mapping(REGISTRY.children(VELLORE_ID))
+
+# Incident categories used by the Text Analysis reports
+INCIDENT_TYPES = ['Congestion', 'Accident', 'Pollution Spike', 'Road Work', 'Heavy Traffic',
+                  'Air Quality Alert', 'Vehicle Breakdown', 'Weather Impact']
+
+INCIDENT_DETAILS = {
+    'Congestion': ['slow moving traffic at junction', 'queue building up near signal', 'traffic jam reported'],
+    'Accident': ['two-wheeler collision', 'minor accident between car and bus', 'truck overturned on highway'],
+    'Pollution Spike': ['sudden rise in PM2.5', 'heavy emission from idling vehicles', 'smoke from roadside burning'],
+    'Road Work': ['lane closed for resurfacing', 'pipeline work blocking road', 'diversion due to construction'],
+    'Heavy Traffic': ['heavy traffic during rush hour', 'vehicles backed up for 2 km', 'delay on main road'],
+    'Air Quality Alert': ['AQI crossed unhealthy threshold', 'alert issued for sensitive groups', 'poor air quality persists'],
+    'Vehicle Breakdown': ['bus breakdown blocking lane', 'stalled lorry on flyover', 'auto breakdown near stop'],
+    'Weather Impact': ['rain causing slow traffic', 'waterlogging on road', 'low visibility due to fog']
+}
+
+# On-disk data (search index etc.)
+DATA_DIR = os.environ.get('SMARTCITY_DATA_DIR', 'data')
+
+# Historical series are hourly, so a new hour is a new version of them
+versions.every('time_series', 3600)
+
+
+# Generate realistic realtime data
+def location_ids(include_vellore_areas=False):
+    """IDs of the locations shown on the pages: every district, plus the Vellore areas when requested"""
+    if include_vellore_areas:
+        return np.concatenate([REGISTRY.districts, REGISTRY.children(VELLORE_ID)])
+    return REGISTRY.districts
+
+
+def generate_realtime_traffic_data(location=None):
+    """Generate data point with timestamp for streaming"""
+    current_time = datetime.now()
+
+    # If location not specified, pick randomly
+    if location is None:
+        location_id = random.choice(location_ids(st.session_state.show_vellore_areas))
+        location = REGISTRY.names[location_id]
+    else:
+        location_id = REGISTRY.id(location)
+
+    # Time-based patterns
+    hour = current_time.hour
+    is_rush_hour = hour in [8, 9, 17, 18, 19, 20]
+    is_weekend = current_time.weekday() >= 5
+
+    # Generate realistic data
+    base_traffic = 40
+    if is_rush_hour and not is_weekend:
+        base_traffic = 75
+    elif is_weekend:
+        base_traffic = 30
+
+    base_aqi = 80
+    if is_rush_hour and not is_weekend:
+        base_aqi = 140
+
+    return {
+        'timestamp': current_time,
+        'location': location,
+        'lat': float(REGISTRY.lat[location_id]),
+        'lon': float(REGISTRY.lon[location_id]),
+        'traffic_density': base_traffic + random.randint(-15, 15),
+        'aqi': base_aqi + random.randint(-20, 20),
+        'vehicles_count': random.randint(1000, 8000),
+        'avg_speed': random.randint(20, 60),
+        'incidents': random.randint(0, 3)
+    }
+
+
+def _shared_store():
+    """The shared store in shared mode (opened here if the warm-up thread has not yet), else None"""
+    from smartcity import shared_store
+
+    if shared_store.SHARED_DIR is None:
+        return None
+    if shared_store.get() is None:
+        from smartcity import feed
+
+        feed.start_shared_feed()
+    return shared_store.get()
+
+
+def update_realtime_data(location=None):
+    """Maintain the session's rolling realtime window (see smartcity.sessions)
+
+    In shared mode the window is the shared realtime ring, which the writer
+    process keeps current, so there is nothing to add per session.
+    """
+    current_time = datetime.now()
+    if _shared_store() is not None:
+        st.session_state.last_update = current_time
+        return
+
+    # Remove old data
+    st.session_state.realtime_data.trim(current_time)
+
+    # Add new data point
+    new_data = generate_realtime_traffic_data(location)
+    st.session_state.realtime_data.append(new_data)
+    st.session_state.last_update = current_time
+
+
+def realtime_frame():
+    """The realtime window the Dashboard shows: the shared ring in shared mode, else this session's buffer"""
+    store = _shared_store()
+    if store is not None:
+        cutoff = pd.Timestamp(datetime.now() - timedelta(seconds=sessions.WINDOW_SECONDS)).value
+        return schema.readings_to_frame(store['realtime'].latest(since=cutoff))
+    return st.session_state.realtime_data.to_frame()
+
+
+def generate_realtime_readings(timestamp, ids):
+    """READING records for locations `ids` at `timestamp`, one per location (as generate_realtime_traffic_data)"""
+    hour = timestamp.hour
+    is_rush_hour = hour in [8, 9, 17, 18, 19, 20]
+    is_weekend = timestamp.weekday() >= 5
+    base_traffic = 75 if is_rush_hour and not is_weekend else 30 if is_weekend else 40
+    base_aqi = 140 if is_rush_hour and not is_weekend else 80
+
+    n = len(ids)
+    rows = np.empty(n, dtype=schema.READING)
+    rows['timestamp'] = pd.Timestamp(timestamp).value
+    rows['location'] = ids
+    rows['lat'] = REGISTRY.lat[ids]
+    rows['lon'] = REGISTRY.lon[ids]
+    rows['traffic_density'] = base_traffic + np.random.randint(-15, 16, n)
+    rows['aqi'] = base_aqi + np.random.randint(-20, 21, n)
+    rows['vehicles_count'] = np.random.randint(1000, 8001, n)
+    rows['avg_speed'] = np.random.randint(20, 61, n)
+    rows['incidents'] = np.random.randint(0, 4, n)
+    return rows
+
+
+# Generate static data
+@versioned_cache(depends_on=('static_data',))
+def generate_static_data(include_vellore_areas=False):
+    """Generate comprehensive dataset for analysis"""
+    return build_static_frame(REGISTRY.mapping(location_ids(include_vellore_areas)))
+
+
+def build_static_frame(all_locations):
+    """Build the per-location analysis table for a {name: {'lat', 'lon'}} mapping"""
+    data = []
+
+    for location, coords in all_locations.items():
+        is_major_city = location in ['Chennai', 'Coimbatore', 'Madurai', 'Vellore']
+        base_aqi = random.randint(100, 200) if is_major_city else random.randint(50, 120)
+        base_traffic = random.randint(60, 90) if is_major_city else random.randint(30, 60)
+
+        data.append({
+            'location': location,
+            'lat': coords['lat'],
+            'lon': coords['lon'],
+            'aqi': base_aqi,
+            'traffic_density': base_traffic,
+            'vehicles_count': random.randint(5000, 50000) if is_major_city else random.randint(1000, 10000),
+            'cars': random.randint(2000, 25000),
+            'bikes': random.randint(2000, 20000),
+            'trucks': random.randint(500, 5000),
+            'avg_speed': random.randint(20, 55),
+            'incidents': random.randint(0, 12),
+            'population': random.randint(100000, 5000000) if is_major_city else random.randint(50000, 500000)
+        })
+
+    return schema.conform(pd.DataFrame(data), 'location_snapshot')
+
+
+@versioned_cache(depends_on=('time_series',))
+def generate_time_series_data(days=7):
+    """Generate historical data"""
+    dates = pd.date_range(end=datetime.now(), periods=days * 24, freq='H')
+    data = []
+    for date in dates:
+        hour = date.hour
+        traffic_base = 40 + 35 * np.sin((hour - 9) * np.pi / 12)
+        aqi_base = 90 + 50 * np.sin((hour - 14) * np.pi / 12)
+
+        data.append({
+            'timestamp': date,
+            'traffic_volume': max(15, traffic_base + random.randint(-10, 10)),
+            'aqi': max(30, min(280, aqi_base + random.randint(-20, 20))),
+            'hour': hour,
+            'day_of_week': date.strftime('%A'),
+            'date': date.strftime('%Y-%m-%d')
+        })
+    return schema.conform(pd.DataFrame(data), 'time_series')
+
+
+@versioned_cache(depends_on=('week_hour',))
+def generate_heatmap_matrix(start=None, end=None, location_ids=None, stat='mean'):
+    """Weekday x hour AQI matrix from the week-hour accumulator (see smartcity.weekly)"""
+    return get_week_hour_accumulator().frame(start, end, location_ids, stat)
+
+
+@versioned_cache(depends_on=('static_data',))
+def generate_distribution_data(include_vellore_areas=False):
+    """Generate repeated AQI measurements per location"""
+    df = generate_static_data(include_vellore_areas)
+
+    location_distributions = []
+    for location in df['location'].unique():
+        base_aqi = df[df['location'] == location]['aqi'].values[0]
+        measurements = np.random.normal(base_aqi, 18, 40)
+        for val in measurements:
+            location_distributions.append({
+                'location': location,
+                'aqi': max(10, min(300, val))
+            })
+
+    return schema.conform(pd.DataFrame(location_distributions), 'distribution')
+
+
+def generate_district_aqi():
+    """District AQI snapshot shown on the choropleth (all 38 districts)"""
+    return pd.DataFrame({
+        'district': [
+            'Ariyalur', 'Chengalpattu', 'Chennai', 'Coimbatore', 'Cuddalore',
+            'Dharmapuri', 'Dindigul', 'Erode', 'Kallakurichi', 'Kanchipuram',
+            'Kanyakumari', 'Karur', 'Krishnagiri', 'Madurai', 'Mayiladuthurai',
+            'Nagapattinam', 'Namakkal', 'Nilgiris', 'Perambalur', 'Pudukkottai',
+            'Ramanathapuram', 'Ranipet', 'Salem', 'Sivaganga', 'Tenkasi',
+            'Thanjavur', 'Theni', 'Thoothukudi', 'Tiruchirappalli', 'Tirunelveli',
+            'Tirupathur', 'Tiruppur', 'Tiruvallur', 'Tiruvannamalai', 'Tiruvarur',
+            'Vellore', 'Viluppuram', 'Virudhunagar'
+        ],
+        'aqi': [
+            82, 95, 110, 78, 85, 80, 90, 87, 75, 84,
+            72, 88, 79, 100, 83, 77, 92, 70, 81, 86,
+            74, 89, 120, 76, 71, 99, 93, 80, 91, 102,
+            85, 88, 94, 83, 78, 135, 72, 96
+        ]
+    })
+
+
+def generate_incident_reports(count=5000, hours=72):
+    """Generate timestamped free-text incident reports"""
+    now = datetime.now()
+    all_locations = REGISTRY.names.tolist()
+    reports = []
+    for _ in range(count):
+        incident_type = random.choice(INCIDENT_TYPES)
+        location = random.choice(all_locations)
+        detail = random.choice(INCIDENT_DETAILS[incident_type])
+        reports.append({
+            'timestamp': now - timedelta(seconds=random.randint(0, hours * 3600)),
+            'location': location,
+            'type': incident_type,
+            'text': f"{incident_type} near {location}: {detail}"
+        })
+    # Index in arrival order so newer reports get higher row ids
+    return sorted(reports, key=lambda r: r['timestamp'])
+
+
+@st.cache_resource
+def get_incident_index():
+    """Open the on-disk incident search index, seeding it on first use"""
+    from smartcity.search import IncidentIndex
+
+    index = IncidentIndex(os.path.join(DATA_DIR, 'incidents.db'))
+    if len(index) == 0:
+        index.add_reports(generate_incident_reports())
+    return index
+
+
+# Days of hourly history seeded into the SQL store on first use
+HISTORY_DAYS = int(os.environ.get('SMARTCITY_HISTORY_DAYS', '90'))
+
+
+# Newest stored hour this process has seen, so hours stored by another process also bump 'history'
+_history_latest = [None]
+_history_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_history_store():
+    """Open the on-disk history store, seeding it on first use"""
+    from smartcity.history import HistoryStore, hourly_history
+
+    store = HistoryStore(os.path.join(DATA_DIR, 'history.db'))
+    store.set_locations(REGISTRY)
+    if len(store) == 0:
+        store.add_new_readings(hourly_history(REGISTRY, datetime.now(), HISTORY_DAYS * 24))
+    _history_latest[0] = store.latest_ts()
+    return store
+
+
+def extend_history(now=None):
+    """Append the hours since the store's latest reading; returns the number of readings added
+
+    Every process may call this (pages, job preparation). Hours are
+    inserted with ``add_new_readings``, so when two processes generate the
+    same hours the first one stored wins and nothing is overwritten.
+    """
+    from smartcity.history import hourly_history
+
+    store = get_history_store()
+    now = pd.Timestamp(now or datetime.now()).floor('h')
+    with _history_lock:
+        latest = store.latest_ts()
+        hours = HISTORY_DAYS * 24 if latest is None else int((now - pd.Timestamp(latest, unit='s')) / pd.Timedelta(hours=1))
+        added = 0
+        if hours > 0:
+            added = len(store.add_new_readings(hourly_history(REGISTRY, now, min(hours, HISTORY_DAYS * 24))))
+        latest = store.latest_ts()
+        if latest != _history_latest[0]:
+            _history_latest[0] = latest
+            versions.bump('history')
+            _add_stored_hours(get_week_hour_accumulator())
+    return added
+
+
+@versioned_cache(depends_on=('history',), max_entries=4)
+def district_aqi_frames(hours):
+    """Hourly AQI of every choropleth district over the last `hours` stored hours
+
+    Returns a DataFrame with one row per hour (oldest first) and one column
+    per district of generate_district_aqi. Districts with stored readings get
+    the mean of their locations; the others keep their snapshot level, scaled
+    by the statewide hourly swing of the stored districts.
+    """
+    snapshot = generate_district_aqi().set_index('district')['aqi']
+    readings, _ = get_history_store().query(
+        "SELECT ts, district, AVG(aqi) AS aqi FROM readings_v "
+        "WHERE ts > (SELECT MAX(ts) FROM readings) - :seconds GROUP BY ts, district",
+        {'seconds': hours * 3600}, row_limit=10 ** 6)
+    stored = readings.pivot(index='ts', columns='district', values='aqi')
+    swing = stored.mean(axis=1) / np.nanmean(stored.to_numpy())
+    frames = pd.DataFrame(np.outer(swing, snapshot), index=stored.index, columns=snapshot.index)
+    frames.update(stored)
+    frames.index = pd.to_datetime(frames.index, unit='s')
+    return frames.round(1)
+
+
+WEEK_HOUR_PATH = os.path.join(DATA_DIR, 'week_hour.npz')
+
+
+@st.cache_resource
+def get_week_hour_accumulator():
+    """Load the persisted week-hour accumulator and bring it up to the history store
+
+    The matrix is fed from the hourly history only, one reading per
+    location and hour, so every cell averages the same kind of value.
+    """
+    from smartcity.weekly import WeekHourAccumulator
+
+    accumulator = WeekHourAccumulator(len(REGISTRY), WEEK_HOUR_PATH)
+    _add_stored_hours(accumulator)
+    return accumulator
+
+
+def _add_stored_hours(accumulator):
+    """Add the stored hours newer than the accumulator's newest reading; returns the number added"""
+    from smartcity import shared_store
+
+    readings, _ = get_history_store().query(
+        "SELECT ts, location_id, aqi FROM readings WHERE ts > :after ORDER BY ts",
+        {'after': accumulator.applied_until // 10 ** 9}, row_limit=10 ** 7)
+    added = accumulator.add(readings['ts'].to_numpy() * 10 ** 9, readings['location_id'].to_numpy(),
+                            readings['aqi'].to_numpy())
+    if added:
+        versions.bump('week_hour')
+        # One process writes the file, like the warm and cold tiers; the others catch up from the store on load
+        if shared_store.is_writer():
+            accumulator.save()
+    return added
+
+
+@versioned_cache(depends_on=('history',), max_entries=64)
+def run_history_query(sql, params, row_limit):
+    """Cached read-only SQL over the history store -> (DataFrame, truncated, elapsed ms)"""
+    started = time.perf_counter()
+    df, truncated = get_history_store().query(sql, dict(params), row_limit)
+    return df, truncated, (time.perf_counter() - started) * 1000
+
+
+@versioned_cache(depends_on=('history', 'static_data'))
+def scenario_model(days=30):
+    """Traffic -> AQI model of every location, fitted on the last `days` of stored history (see smartcity.scenarios)"""
+    from smartcity.scenarios import CLASSES, TrafficAqiModel
+
+    readings, _ = get_history_store().query(
+        "SELECT ts, location_id, aqi, traffic_density FROM readings "
+        "WHERE ts > (SELECT MAX(ts) FROM readings) - :seconds", {'seconds': days * 86400}, row_limit=10 ** 7)
+    snapshot = generate_static_data(True)
+    known = snapshot[list(CLASSES)].to_numpy(dtype='float64')
+    # Locations missing from the table get the average fleet mix
+    fleet = np.tile(known.mean(axis=0), (len(REGISTRY), 1))
+    fleet[REGISTRY.ids(snapshot['location'])] = known
+    return TrafficAqiModel.fit(readings['ts'], readings['location_id'], readings['aqi'],
+                               readings['traffic_density'], fleet)
+
+
+@versioned_cache(depends_on=('history', 'static_data'), max_entries=16)
+def run_scenario(policies, draws=5000, seed=0):
+    """Monte Carlo what-if run -> (results of scenarios.simulate, elapsed ms)
+
+    `policies` is a tuple of (district IDs, hours, cars, bikes, trucks,
+    compliance range) tuples; a district's areas follow their district.
+    """
+    from smartcity import scenarios
+
+    model = scenario_model()
+    started = time.perf_counter()
+    results = scenarios.simulate(model, [
+        scenarios.policy(np.isin(REGISTRY.district, districts), hours, cars, bikes, trucks, compliance)
+        for districts, hours, cars, bikes, trucks, compliance in policies
+    ], draws, seed)
+    return results, (time.perf_counter() - started) * 1000
+
+
+# Sensor layout is rebuilt only when the static data it is derived from changes
+@versioned_cache(depends_on=('static_data',))
+def generate_sensor_cluster_data(show_vellore_areas):
+    return build_sensor_layout(generate_static_data(show_vellore_areas))
+
+
+def build_sensor_layout(df, registry=None):
+    """Readings for the registry's sensors around every location of a static data table"""
+    registry = registry or REGISTRY
+    ids = registry.ids(df['location'])
+    sensors = registry.sensors_of(ids)
+    rows = np.repeat(np.arange(len(df)), registry.sensor_counts(ids))
+
+    aqi = df['aqi'].to_numpy(dtype='int64')[rows] + np.random.randint(-20, 21, len(rows))
+    traffic = df['traffic_density'].to_numpy(dtype='int64')[rows] + np.random.randint(-15, 16, len(rows))
+    locations = df['location'].to_numpy()[rows]
+    return [
+        {
+            'lat': float(lat),
+            'lon': float(lon),
+            'location': location,
+            'aqi': int(a),
+            'traffic': int(t),
+            'sensor_id': code
+        }
+        for lat, lon, location, a, t, code in zip(
+            registry.sensor_lat[sensors], registry.sensor_lon[sensors], locations, aqi, traffic,
+            registry.sensor_code[sensors])
+    ]
@@ -0,0 +1,221 @@
+"""Span instrumentation for page reruns
+
+Every stage of a page rerun (data generation, DataFrame construction, figure
+building, ``st.plotly_chart``/``st_folium`` serialization) can be wrapped in a
+span::
+
+    with diagnostics.span('Dot Map', 'figure') as s:
+        fig = build_figure(df)
+
+Spans aggregate duration, payload bytes and cache hits/misses per
+(page, stage) and can be exported as Prometheus text or JSON. Instrumentation
+is off unless SMARTCITY_DIAGNOSTICS=1 or it is switched on from the
+Diagnostics page; when off, ``span()`` returns a shared no-op object, so the
+cost is a flag check per stage.
+"""
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Upper bounds (seconds) of the Prometheus duration histogram buckets
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+_state = {'enabled': os.environ.get('SMARTCITY_DIAGNOSTICS', '0') == '1'}
+_stats = {}
+_recent = deque(maxlen=500)
+_lock = threading.Lock()
+_current = contextvars.ContextVar('smartcity_span', default=None)
+
+
+def enabled():
+    return _state['enabled']
+
+
+def set_enabled(value):
+    _state['enabled'] = bool(value)
+
+
+class _NullSpan:
+    """Shared stand-in returned while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times one stage of a page rerun"""
+
+    __slots__ = ('page', 'stage', 'bytes', 'cache', 'started', '_token')
+
+    def __init__(self, page, stage):
+        self.page = page
+        self.stage = stage
+        self.bytes = None
+        self.cache = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        _current.reset(self._token)
+        _record(self, seconds, error=exc_type is not None)
+        return False
+
+    def set(self, bytes=None, cache=None):
+        """Attach payload size and/or cache outcome ('hit' or 'miss')"""
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+        if cache is not None:
+            # A stage counts as a hit only if everything it looked up was cached
+            self.cache = 'miss' if 'miss' in (self.cache, cache) else 'hit'
+
+
+def span(page, stage):
+    """Context manager timing `stage` of `page` (no-op while disabled)"""
+    if not _state['enabled']:
+        return NULL_SPAN
+    return Span(page, stage)
+
+
+def note_cache(hit):
+    """Record a cache lookup outcome on the innermost open span, if any"""
+    if _state['enabled']:
+        current = _current.get()
+        if current is not None:
+            current.set(cache='hit' if hit else 'miss')
+
+
+def _record(s, seconds, error):
+    key = (s.page, s.stage)
+    with _lock:
+        agg = _stats.get(key)
+        if agg is None:
+            agg = _stats[key] = {
+                'count': 0, 'errors': 0, 'seconds_sum': 0.0, 'seconds_max': 0.0,
+                'bytes_sum': 0, 'hits': 0, 'misses': 0, 'buckets': [0] * len(BUCKETS)
+            }
+        agg['count'] += 1
+        agg['errors'] += error
+        agg['seconds_sum'] += seconds
+        agg['seconds_max'] = max(agg['seconds_max'], seconds)
+        agg['bytes_sum'] += s.bytes or 0
+        if s.cache == 'hit':
+            agg['hits'] += 1
+        elif s.cache == 'miss':
+            agg['misses'] += 1
+        index = bisect.bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            agg['buckets'][index] += 1
+        _recent.append({
+            'time': datetime.now().strftime('%H:%M:%S.%f')[:-3],
+            'page': s.page,
+            'stage': s.stage,
+            'ms': round(seconds * 1000, 2),
+            'bytes': s.bytes,
+            'cache': s.cache
+        })
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _recent.clear()
+
+
+def summary():
+    """One row per (page, stage) with counts, mean/max duration, bytes and cache outcomes"""
+    with _lock:
+        return [
+            {
+                'page': page,
+                'stage': stage,
+                'count': agg['count'],
+                'mean_ms': agg['seconds_sum'] / agg['count'] * 1000,
+                'max_ms': agg['seconds_max'] * 1000,
+                'mean_bytes': agg['bytes_sum'] / agg['count'],
+                'hits': agg['hits'],
+                'misses': agg['misses'],
+                'errors': agg['errors']
+            }
+            for (page, stage), agg in sorted(_stats.items())
+        ]
+
+
+def recent(limit=100):
+    with _lock:
+        return list(_recent)[-limit:][::-1]
+
+
+def to_json():
+    return json.dumps({'enabled': enabled(), 'stages': summary(), 'recent': recent()}, indent=2)
+
+
+def _labels(page, stage):
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"')
+    return f'page="{escape(page)}",stage="{escape(stage)}"'
+
+
+def to_prometheus():
+    """Prometheus text exposition of the span aggregates"""
+    lines = [
+        '# HELP smartcity_stage_duration_seconds Duration of page rerun stages',
+        '# TYPE smartcity_stage_duration_seconds histogram'
+    ]
+    with _lock:
+        items = sorted(_stats.items())
+        for (page, stage), agg in items:
+            labels = _labels(page, stage)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, agg['buckets']):
+                cumulative += count
+                lines.append(f'smartcity_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'smartcity_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {agg["count"]}')
+            lines.append(f'smartcity_stage_duration_seconds_sum{{{labels}}} {agg["seconds_sum"]:.6f}')
+            lines.append(f'smartcity_stage_duration_seconds_count{{{labels}}} {agg["count"]}')
+        lines += ['# HELP smartcity_stage_payload_bytes_total Payload bytes produced by page stages',
+                  '# TYPE smartcity_stage_payload_bytes_total counter']
+        lines += [f'smartcity_stage_payload_bytes_total{{{_labels(p, s)}}} {agg["bytes_sum"]}'
+                  for (p, s), agg in items]
+        lines += ['# HELP smartcity_stage_cache_total Cache outcomes of page stages',
+                  '# TYPE smartcity_stage_cache_total counter']
+        for (page, stage), agg in items:
+            lines.append(f'smartcity_stage_cache_total{{{_labels(page, stage)},result="hit"}} {agg["hits"]}')
+            lines.append(f'smartcity_stage_cache_total{{{_labels(page, stage)},result="miss"}} {agg["misses"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def plotly_chart(page, fig, **kwargs):
+    """st.plotly_chart inside a span that records the figure payload size"""
+    import streamlit as st
+
+    with span(page, 'plotly_chart') as s:
+        if s is not NULL_SPAN:
+            s.set(bytes=len(fig.to_json()))
+        return st.plotly_chart(fig, **kwargs)
+
+
+def folium_map(page, m, **kwargs):
+    """st_folium inside a span that records the rendered map size"""
+    from streamlit_folium import st_folium
+
+    with span(page, 'st_folium') as s:
+        if s is not NULL_SPAN:
+            s.set(bytes=len(m.get_root().render()))
+        return st_folium(m, **kwargs)
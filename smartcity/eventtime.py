@@ -0,0 +1,116 @@
+"""Event-time ingestion of sensor readings: dedup, reordering and late data
+
+Sensor feeds retry, duplicate and deliver out of order, so readings are
+placed by the time they were taken (their ``timestamp``), not by when they
+arrive. ``EventTimeIngest.offer`` takes a batch of ``schema.SENSOR_READING``
+records in arrival order and sorts each reading into one of four outcomes:
+
+* duplicate: its (sensor, seq) pair was already accepted. Sequence numbers
+  are per sensor, so a retried delivery carries the same pair.
+* pending: newer than the watermark. It waits in the reorder buffer until
+  the watermark passes it, then it is released in event-time order.
+* correction: at or behind the watermark but within ``allowed_lateness``.
+  It is released at once. The cube and the week-hour accumulator are
+  additive, so applying it simply updates the buckets it belongs to, with
+  no recomputation.
+* too late: older than ``watermark - allowed_lateness``. It is dropped and
+  counted.
+
+The watermark trails the newest event time seen by ``delay``. Memory is
+bounded in two ways. The reorder buffer holds at most ``max_pending``
+readings; past that, the oldest are released early and the watermark moves
+up to them. Accepted (sensor, seq) keys are kept only while their readings
+could still arrive as corrections.
+"""
+import threading
+
+import numpy as np
+
+NS = 1_000_000_000
+
+
+def reading_keys(batch):
+    """(sensor, seq) of each reading packed into one int64"""
+    return (batch['sensor'].astype('int64') << 32) | batch['seq'].astype('int64')
+
+
+class EventTimeIngest:
+    """Watermarked reorder buffer with per-sensor sequence dedup"""
+
+    def __init__(self, dtype, delay_s=0.0, allowed_lateness_s=900.0, max_pending=100000):
+        self.dtype = dtype
+        self.delay_ns = int(delay_s * NS)
+        self.allowed_lateness_ns = int(allowed_lateness_s * NS)
+        self.max_pending = max_pending
+        self.watermark = None  # epoch ns; None until the first reading
+        self._pending = np.empty(0, dtype=dtype)
+        # Accepted (sensor, seq) keys and their event times, for dedup while corrections are possible
+        self._seen_keys = np.empty(0, dtype='int64')
+        self._seen_ts = np.empty(0, dtype='int64')
+        self._lock = threading.Lock()
+        self.counts = {'received': 0, 'released': 0, 'corrected': 0, 'duplicates': 0,
+                       'too_late': 0, 'forced': 0}
+
+    def offer(self, batch):
+        """Take readings in arrival order -> (readings released in event-time order, late corrections)"""
+        with self._lock:
+            self.counts['received'] += len(batch)
+            keys = reading_keys(batch)
+            # First delivery of each key within the batch, and only keys not accepted before
+            _, first = np.unique(keys, return_index=True)
+            fresh = np.zeros(len(batch), dtype=bool)
+            fresh[first] = True
+            fresh &= ~np.isin(keys, self._seen_keys)
+            self.counts['duplicates'] += int(len(batch) - fresh.sum())
+            batch, keys = batch[fresh], keys[fresh]
+
+            timestamps = batch['timestamp']
+            if self.watermark is None:
+                late = np.zeros(len(batch), dtype=bool)
+                too_late = late
+            else:
+                late = timestamps <= self.watermark
+                too_late = timestamps < self.watermark - self.allowed_lateness_ns
+            self.counts['too_late'] += int(too_late.sum())
+            accepted = ~too_late
+            corrections = batch[late & ~too_late]
+            self.counts['corrected'] += len(corrections)
+            self._seen_keys = np.concatenate([self._seen_keys, keys[accepted]])
+            self._seen_ts = np.concatenate([self._seen_ts, timestamps[accepted]])
+
+            pending = np.concatenate([self._pending, batch[~late]])
+            if len(batch):
+                newest = int(timestamps.max()) - self.delay_ns
+                self.watermark = newest if self.watermark is None else max(self.watermark, newest)
+            pending = pending[np.argsort(pending['timestamp'], kind='stable')]
+            ready = int(np.searchsorted(pending['timestamp'], self.watermark, side='right')) if len(pending) else 0
+            overflow = len(pending) - ready - self.max_pending
+            if overflow > 0:
+                ready += overflow
+                self.counts['forced'] += overflow
+                self.watermark = max(self.watermark, int(pending['timestamp'][ready - 1]))
+            released, self._pending = pending[:ready], pending[ready:].copy()
+            self.counts['released'] += len(released)
+
+            # Keys behind the lateness horizon can no longer be accepted, so they need no dedup entry
+            if self.watermark is not None:
+                live = self._seen_ts >= self.watermark - self.allowed_lateness_ns
+                if not live.all():
+                    self._seen_keys, self._seen_ts = self._seen_keys[live], self._seen_ts[live]
+        return released, corrections
+
+    def flush(self):
+        """Release everything pending (e.g. before shutdown), in event-time order"""
+        with self._lock:
+            released, self._pending = self._pending, np.empty(0, dtype=self.dtype)
+            if len(released):
+                self.watermark = max(self.watermark, int(released['timestamp'][-1]))
+            self.counts['released'] += len(released)
+        return released
+
+    def status(self):
+        with self._lock:
+            return dict(self.counts, pending=len(self._pending), dedup_keys=len(self._seen_keys),
+                        watermark=None if self.watermark is None else str(np.datetime64(self.watermark, 'ns')),
+                        delay_s=self.delay_ns / NS, allowed_lateness_s=self.allowed_lateness_ns / NS,
+                        max_pending=self.max_pending)
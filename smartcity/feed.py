@@ -0,0 +1,303 @@
+"""Live sensor feed: rollup cube ingestion, raw reading tiers and the shared-mode writer feed
+
+Every registered sensor reports once per ``ROLLUP_FEED_SECONDS``. Readings
+pass through the event-time ingest (smartcity.eventtime) into the rollup
+cube (smartcity.rollup) and the hot/warm/cold reading tiers
+(smartcity.tiers). In shared mode (smartcity.shared_store) the writer
+process generates them into a shared ring and every process feeds its own
+cube from it.
+
+This module is imported only by the pages and services that use the live
+feed, so opening any other page does not build the ingest buffers or the
+hot store.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from smartcity import schema, sessions, shared_store, versions
+from smartcity.cache import versioned_cache
+from smartcity.data import DATA_DIR, generate_realtime_readings
+from smartcity.eventtime import EventTimeIngest
+from smartcity.hotstore import HotStore
+from smartcity.registry import REGISTRY
+from smartcity.rollup import CUBE
+from smartcity.tiers import ColdParquet, TieredReadings, WarmSegments
+
+logger = logging.getLogger(__name__)
+
+# Shared mode: the writer appends a realtime reading for every location each tick
+REALTIME_TICK_SECONDS = 2
+
+
+def start_shared_feed(backfill_minutes=15):
+    """Open the shared store and start its writer election and feed (no-op unless SMARTCITY_SHARED_DIR is set)"""
+    all_ids = np.arange(len(REGISTRY))
+    backfill_ticks = backfill_minutes * 60 // ROLLUP_FEED_SECONDS
+    store = shared_store.open_store({
+        'realtime': (schema.READING, len(all_ids) * int(sessions.WINDOW_SECONDS / REALTIME_TICK_SECONDS + 1) * 2),
+        'sensors': (schema.SENSOR_READING, len(REGISTRY.sensor_location) * (backfill_ticks + 1) * 2)
+    })
+    if store is None:
+        return None
+
+    def realtime(now):
+        return generate_realtime_readings(datetime.fromtimestamp(now), all_ids)
+
+    def sensors(now):
+        # Continue from the last tick in the ring, so a new writer neither repeats nor skips ticks
+        tick = int(now // ROLLUP_FEED_SECONDS)
+        ring = store['sensors']
+        last = ring.read_since(max(ring.head - 1, 0))[0]
+        first = tick - backfill_ticks
+        if len(last):
+            first = max(first, int(last['timestamp'][-1] // (ROLLUP_FEED_SECONDS * 10 ** 9)) + 1)
+        return sensor_batch(first, tick)
+
+    store.start_feed([('realtime', REALTIME_TICK_SECONDS, realtime), ('sensors', ROLLUP_FEED_SECONDS, sensors)])
+    return store
+
+
+# Process-wide sensor feed into the rollup cube: one reading per sensor every ROLLUP_FEED_SECONDS
+ROLLUP_FEED_SECONDS = 10
+_rollup_feed = {'last_tick': None}
+_rollup_lock = threading.Lock()
+
+# Event-time handling of the sensor feed (see smartcity.eventtime): readings are held until the
+# watermark (newest event time minus the delay) passes them, and readings up to the allowed
+# lateness behind it are still applied as corrections
+WATERMARK_DELAY_SECONDS = float(os.environ.get('SMARTCITY_WATERMARK_DELAY_S', '0'))
+ALLOWED_LATENESS_SECONDS = float(os.environ.get('SMARTCITY_ALLOWED_LATENESS_S', '900'))
+SENSOR_INGEST = EventTimeIngest(schema.SENSOR_READING, WATERMARK_DELAY_SECONDS, ALLOWED_LATENESS_SECONDS)
+
+# Raw per-sensor readings kept in memory as compressed chunks (see smartcity.hotstore)
+HOT_HOURS = float(os.environ.get('SMARTCITY_HOT_HOURS', '6'))
+HOT_READINGS = HotStore(schema.SENSOR_READING, 'sensor', retention_s=HOT_HOURS * 3600)
+
+# Below the hot tier: days of memory-mapped segments, then Parquet (see smartcity.tiers)
+WARM_DAYS = float(os.environ.get('SMARTCITY_WARM_DAYS', '7'))
+COLD_DAYS = float(os.environ.get('SMARTCITY_COLD_DAYS', '365'))
+TIER_MAINTENANCE_SECONDS = 60
+_tier_thread = [None]
+_tier_lock = threading.Lock()
+
+
+def generate_sensor_readings(timestamp):
+    """One reading per registered sensor at `timestamp` -> (sensor IDs, (n, 2) aqi/traffic array)"""
+    hour = timestamp.hour
+    is_rush_hour = hour in [8, 9, 17, 18, 19, 20]
+    is_weekend = timestamp.weekday() >= 5
+    base_traffic = 75 if is_rush_hour and not is_weekend else 30 if is_weekend else 40
+    base_aqi = 140 if is_rush_hour and not is_weekend else 80
+
+    sensors = np.arange(len(REGISTRY.sensor_location))
+    # Busier cities read consistently higher than small towns
+    major = np.isin(REGISTRY.names[REGISTRY.district[REGISTRY.sensor_location]],
+                    ['Chennai', 'Coimbatore', 'Madurai', 'Vellore'])
+    aqi = base_aqi + 30 * major + np.random.randint(-20, 21, len(sensors))
+    traffic = base_traffic + 15 * major + np.random.randint(-15, 16, len(sensors))
+    return sensors, np.column_stack([aqi, np.clip(traffic, 0, 100)])
+
+
+def sensor_batch(first_tick, last_tick):
+    """SENSOR_READING records of every sensor for feed ticks first_tick..last_tick"""
+    batches = []
+    for t in range(first_tick, last_tick + 1):
+        timestamp = datetime.fromtimestamp(t * ROLLUP_FEED_SECONDS)
+        sensors, values = generate_sensor_readings(timestamp)
+        batch = np.empty(len(sensors), dtype=schema.SENSOR_READING)
+        batch['timestamp'] = pd.Timestamp(timestamp).value
+        batch['sensor'] = sensors
+        batch['seq'] = t  # one reading per sensor per tick, so the tick numbers each sensor's readings
+        batch['aqi'] = values[:, 0]
+        batch['traffic_density'] = values[:, 1]
+        batches.append(batch)
+    return np.concatenate(batches) if batches else np.empty(0, dtype=schema.SENSOR_READING)
+
+
+def _ingest_sensor_batch(batch):
+    """Pass readings (in arrival order) through SENSOR_INGEST and apply what it releases"""
+    released, corrections = SENSOR_INGEST.offer(batch)
+    for readings in (released, corrections):
+        if len(readings):
+            _apply_sensor_readings(readings)
+    return len(released) + len(corrections)
+
+
+def _apply_sensor_readings(readings):
+    sensors = readings['sensor']
+    locations = REGISTRY.sensor_location[sensors]
+    CUBE.ingest(readings['timestamp'], locations,
+                np.column_stack([readings['aqi'], readings['traffic_density']]), sensor_ids=sensors)
+    get_tiered_readings().append(readings, persist=shared_store.is_writer())
+
+
+def feed_rollup(now=None, backfill_minutes=15):
+    """Bring the rollup cube up to `now`, backfilling `backfill_minutes` on first use
+
+    In shared mode (see smartcity.shared_store) the readings come from the
+    shared sensor ring instead, so every process's cube sees the same data.
+    Either way readings go through SENSOR_INGEST, which drops duplicates and
+    applies out-of-order and late readings by event time.
+    """
+    store = shared_store.get()
+    if store is None and shared_store.SHARED_DIR is not None:
+        # Called before the warm-up thread opened the store: open it rather than feed this process alone
+        store = start_shared_feed(backfill_minutes)
+    if store is not None:
+        with _rollup_lock:
+            batch, _rollup_feed['cursor'], _ = store['sensors'].read_since(_rollup_feed.get('cursor', 0))
+            if len(batch) and _ingest_sensor_batch(batch):
+                tick = int(batch['timestamp'].max() // (ROLLUP_FEED_SECONDS * 10 ** 9))
+                _rollup_feed['last_tick'] = max(tick, _rollup_feed['last_tick'] or tick)
+                versions.bump('rollup')
+        return
+
+    now = now or datetime.now()
+    tick = int(now.timestamp() // ROLLUP_FEED_SECONDS)
+    with _rollup_lock:
+        last = _rollup_feed['last_tick']
+        first = tick - backfill_minutes * 60 // ROLLUP_FEED_SECONDS if last is None else last + 1
+        first = max(first, tick - backfill_minutes * 60 // ROLLUP_FEED_SECONDS)
+        if first > tick:
+            return
+        _ingest_sensor_batch(sensor_batch(first, tick))
+        _rollup_feed['last_tick'] = tick
+        versions.bump('rollup')
+
+
+def rollup_version():
+    """Feed tick the rollup cube was last brought up to (None before the first feed)"""
+    return _rollup_feed['last_tick']
+
+
+@st.cache_resource
+def get_tiered_readings():
+    """The hot/warm/cold reading tiers; warm segments and Parquet days live under DATA_DIR"""
+    return TieredReadings(
+        HOT_READINGS,
+        WarmSegments(os.path.join(DATA_DIR, 'warm'), schema.SENSOR_READING, 'sensor'),
+        ColdParquet(os.path.join(DATA_DIR, 'cold'), schema.SENSOR_READING, 'sensor'),
+        warm_seconds=WARM_DAYS * 86400,
+        # A warm segment is sorted once no late reading can be accepted for it any more
+        seal_after_seconds=WATERMARK_DELAY_SECONDS + ALLOWED_LATENESS_SECONDS,
+        cold_seconds=COLD_DAYS * 86400)
+
+
+def start_tier_maintenance():
+    """Start the thread that keeps the tiers fed, sealed and compacted (once per process)"""
+    with _tier_lock:
+        if _tier_thread[0] is None:
+            _tier_thread[0] = threading.Thread(target=_maintain_tiers, name='tier-maintenance', daemon=True)
+            _tier_thread[0].start()
+    return _tier_thread[0]
+
+
+def _maintain_tiers():
+    while True:
+        time.sleep(TIER_MAINTENANCE_SECONDS)
+        try:
+            # Keep consuming the feed without page traffic, so the warm tier has no gaps
+            feed_rollup()
+            if shared_store.is_writer():
+                get_tiered_readings().maintain()
+        except Exception:
+            logger.exception("Tier maintenance failed")
+
+
+def sensor_readings(sensor, minutes=60):
+    """Raw readings of one sensor over the last `minutes`, from whichever tiers hold them, as a DataFrame"""
+    tiers = get_tiered_readings()
+    newest = tiers.newest if tiers.newest is not None else pd.Timestamp(datetime.now()).value
+    rows, _ = tiers.read(newest - int(minutes * 60 * 10 ** 9), None, [sensor])
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(rows['timestamp']),
+        'aqi': rows['aqi'],
+        'traffic_density': rows['traffic_density']
+    })
+
+
+def location_readings(location_id, start, end, max_points=1500):
+    """Mean readings of a location's sensors (a district includes its areas) from `start` to `end`
+
+    Readings come from the hot, warm and cold tiers as needed and are
+    averaged into at most `max_points` equal time bins. Returns (DataFrame
+    with timestamp/aqi/traffic_density/readings, rows read per tier, ms).
+    """
+    started = time.perf_counter()
+    location_ids = np.concatenate([[location_id], REGISTRY.children(location_id)])
+    start_ns, end_ns = pd.Timestamp(start).value, pd.Timestamp(end).value
+    rows, served = get_tiered_readings().read(start_ns, end_ns, REGISTRY.sensors_of(location_ids))
+    tick_ns = ROLLUP_FEED_SECONDS * 10 ** 9
+    bin_ns = max(1, -(-(end_ns - start_ns) // (max_points * tick_ns))) * tick_ns  # whole feed ticks
+    frame = pd.DataFrame({'bin': rows['timestamp'] // bin_ns, 'aqi': rows['aqi'],
+                          'traffic_density': rows['traffic_density']})
+    binned = frame.groupby('bin').agg(aqi=('aqi', 'mean'), traffic_density=('traffic_density', 'mean'),
+                                      readings=('aqi', 'size')).reset_index()
+    binned.insert(0, 'timestamp', pd.to_datetime(binned.pop('bin') * bin_ns))
+    return binned, served, (time.perf_counter() - started) * 1000
+
+
+@st.cache_resource
+def _sensor_tree():
+    from smartcity.spatial import SensorTree
+
+    return SensorTree(REGISTRY.sensor_lat, REGISTRY.sensor_lon)
+
+
+def get_sensor_tree():
+    """KD-tree over the registered sensor positions (see smartcity.spatial), kept in step with the registry"""
+    tree = _sensor_tree()
+    tree.sync(REGISTRY.sensor_lat, REGISTRY.sensor_lon)
+    return tree
+
+
+def sensor_metric(metric, window_buckets=15):
+    """Mean of `metric` per sensor over the last `window_buckets` rollup buckets (NaN for silent sensors)"""
+    nodes = CUBE.sensor_base + np.arange(len(REGISTRY.sensor_location))
+    return CUBE.stats(nodes, window_buckets)['mean'][:, CUBE.metrics.index(metric)]
+
+
+def nearest_sensors(lat, lon, k=5, window_buckets=15):
+    """k nearest sensors to a point with their latest readings, and the IDW AQI estimate there
+
+    Returns (DataFrame ordered by distance, estimated AQI, elapsed milliseconds).
+    """
+    from smartcity import spatial
+
+    started = time.perf_counter()
+    feed_rollup()
+    tree = get_sensor_tree()
+    dist, idx = tree.query([lat], [lon], k)
+    dist, sensors = dist[0], idx[0]
+    aqi = CUBE.metrics.index('aqi')
+    traffic = CUBE.metrics.index('traffic_density')
+    latest = CUBE.stats(CUBE.sensor_base + sensors, window_buckets=1)
+    recent = CUBE.stats(CUBE.sensor_base + sensors, window_buckets)
+    estimate = spatial.idw_estimate(dist[None, :], recent['mean'][None, :, aqi])[0]
+    frame = pd.DataFrame({
+        'sensor': REGISTRY.sensor_code[sensors],
+        'location': REGISTRY.names[REGISTRY.sensor_location[sensors]],
+        'distance_km': (dist * spatial.KM_PER_DEG).round(2),
+        'aqi': latest['mean'][:, aqi].round(0),
+        'traffic_density': latest['mean'][:, traffic].round(0),
+        f'aqi_{window_buckets}min': recent['mean'][:, aqi].round(1)
+    })
+    return frame, estimate, (time.perf_counter() - started) * 1000
+
+
+# Surfaces are recomputed once per rollup feed tick, per metric and map viewport
+@versioned_cache(depends_on=('rollup',), max_entries=32)
+def interpolated_surface(metric, cells):
+    """RGBA image and bounds of the IDW `metric` surface over grid `cells` (see spatial.view_cells)"""
+    from smartcity import spatial
+
+    lats, lons, bounds = spatial.cell_grid(cells)
+    grid = spatial.surface(get_sensor_tree(), sensor_metric(metric), lats, lons)
+    return spatial.colorize(grid, metric), bounds
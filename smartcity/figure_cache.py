@@ -0,0 +1,113 @@
+"""Versioned figure cache for pages whose data changes rarely
+
+Figures are stored serialized (Plotly figure JSON, or rendered HTML for
+Folium maps) under a (page, data version, options) key. The data version is
+``content_key()`` of the frames the figure is drawn from rather than a
+dataset version: a generator whose cache entry was evicted may produce
+different data under the same dataset version, and the figure must match
+the tables next to it. Deserializing a
+stored figure is an order of magnitude cheaper than rebuilding it with
+plotly.express, so reruns triggered by unrelated sidebar clicks render almost
+instantly. Entries are evicted least-recently-used once the memory cap is hit.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+
+from smartcity import diagnostics
+
+MAX_BYTES = int(float(os.environ.get('SMARTCITY_FIGURE_CACHE_MB', '64')) * 1024 * 1024)
+
+
+def content_key(*frames):
+    """Hash of the contents of the DataFrames a figure is built from"""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in frames:
+        digest.update(repr(list(frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """Process-wide LRU of serialized figures bounded by total payload size"""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        diagnostics.note_cache(payload is not None)
+        return payload
+
+    def _put(self, key, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = payload
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    @staticmethod
+    def make_key(page, data_version, options=None):
+        return page, data_version, tuple(sorted((options or {}).items()))
+
+    def plotly(self, page, data_version, build, options=None):
+        """Return a Plotly figure for the key, calling `build()` only on a miss"""
+        key = self.make_key(page, data_version, options)
+        payload = self._get(key)
+        if payload is not None:
+            return pio.from_json(payload)
+        fig = build()
+        self._put(key, fig.to_json())
+        return fig
+
+    def html(self, page, data_version, build, options=None):
+        """Return rendered HTML for a Folium map, calling `build()` only on a miss"""
+        key = self.make_key(page, data_version, options)
+        payload = self._get(key)
+        if payload is None:
+            payload = build().get_root().render()
+            self._put(key, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+FIGURE_CACHE = FigureCache()
@@ -0,0 +1,83 @@
+"""District boundary geometry for the AQI Choropleth"""
+import json
+import os
+
+from smartcity import versions
+from smartcity.cache import versioned_cache
+
+GEOJSON_PATH = os.environ.get('SMARTCITY_GEOJSON', 'tamilnadu_districts.geojson')
+
+# Replacing the boundary file is a new version of the geometry
+versions.watch_file('district_geometry', GEOJSON_PATH)
+
+# Approximate centroids for all Tamil Nadu districts
+DISTRICT_CENTROIDS = {
+    'Ariyalur': (11.14, 79.08),
+    'Chengalpattu': (12.69, 79.97),
+    'Chennai': (13.08, 80.27),
+    'Coimbatore': (11.02, 76.96),
+    'Cuddalore': (11.74, 79.77),
+    'Dharmapuri': (12.13, 78.16),
+    'Dindigul': (10.36, 77.97),
+    'Erode': (11.34, 77.72),
+    'Kallakurichi': (11.94, 78.97),
+    'Kanchipuram': (12.83, 79.70),
+    'Kanyakumari': (8.08, 77.55),
+    'Karur': (10.96, 78.08),
+    'Krishnagiri': (12.52, 78.21),
+    'Madurai': (9.93, 78.12),
+    'Mayiladuthurai': (11.10, 79.65),
+    'Nagapattinam': (10.77, 79.84),
+    'Namakkal': (11.22, 78.17),
+    'Nilgiris': (11.41, 76.69),
+    'Perambalur': (11.23, 78.88),
+    'Pudukkottai': (10.38, 78.82),
+    'Ramanathapuram': (9.37, 78.83),
+    'Ranipet': (12.93, 79.33),
+    'Salem': (11.65, 78.16),
+    'Sivaganga': (9.85, 78.48),
+    'Tenkasi': (8.96, 77.31),
+    'Thanjavur': (10.78, 79.13),
+    'Theni': (10.01, 77.48),
+    'Thoothukudi': (8.79, 78.13),
+    'Tiruchirappalli': (10.79, 78.70),
+    'Tirunelveli': (8.73, 77.69),
+    'Tirupathur': (12.49, 78.56),
+    'Tiruppur': (11.11, 77.35),
+    'Tiruvallur': (13.14, 79.91),
+    'Tiruvannamalai': (12.23, 79.07),
+    'Tiruvarur': (10.77, 79.64),
+    'Vellore': (12.91, 79.13),
+    'Viluppuram': (11.94, 79.49),
+    'Virudhunagar': (9.58, 77.95)
+}
+
+
+def assign_district_names(gdf):
+    """Assign nearest district name to each polygon using centroid proximity"""
+    assigned_districts = []
+    for feature in gdf.geometry:
+        centroid = feature.centroid
+        min_dist = float('inf')
+        closest_name = None
+        for name, (lat, lon) in DISTRICT_CENTROIDS.items():
+            dist = (centroid.y - lat)**2 + (centroid.x - lon)**2
+            if dist < min_dist:
+                min_dist = dist
+                closest_name = name
+        assigned_districts.append(closest_name)
+    return assigned_districts
+
+
+@versioned_cache(depends_on=('district_geometry',), max_entries=2)
+def load_district_geojson(geojson_path=GEOJSON_PATH):
+    """Load district polygons as GeoJSON with a 'district' property on every feature"""
+    # geopandas/shapely are only needed here, keep them off the import path of other pages
+    import geopandas as gpd
+
+    with open(geojson_path, 'r') as f:
+        geo_data = json.load(f)
+
+    gdf = gpd.GeoDataFrame.from_features(geo_data["features"])
+    gdf["district"] = assign_district_names(gdf)
+    return json.loads(gdf.to_json())
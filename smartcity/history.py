@@ -0,0 +1,247 @@
+"""Embedded SQL store of historical readings
+
+Hourly readings per location are persisted in an on-disk SQLite database,
+next to the incident search index. Analysts query it with plain SQL, either
+from the parameterised ``TEMPLATES`` or ad hoc, and SQLite runs the scan and
+aggregation over its own page cache, so a query over months of readings
+returns only its result rows to pandas instead of loading the history.
+
+Queries run on a separate read-only connection (``mode=ro``, ``query_only``
+and an authorizer that allows reads only), are capped at ``row_limit``
+result rows and are aborted after ``timeout_s`` seconds.
+
+Tables::
+
+    locations(id, name, level, parent, district, lat, lon)
+    readings(ts, location_id, aqi, traffic_density, vehicles_count, avg_speed, incidents)
+
+``ts`` is local wall-clock time written as Unix seconds (as if it were UTC),
+so SQLite's ``'unixepoch'`` date functions read back local hours and days.
+The ``readings_v`` view joins the location names and adds ``hour``,
+``weekday`` (0 = Sunday), ``day`` and ``is_weekend`` columns.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    level TEXT NOT NULL,
+    parent TEXT,
+    district TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS readings (
+    ts INTEGER NOT NULL,
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    aqi REAL NOT NULL,
+    traffic_density REAL NOT NULL,
+    vehicles_count INTEGER NOT NULL,
+    avg_speed REAL NOT NULL,
+    incidents INTEGER NOT NULL,
+    PRIMARY KEY (location_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings (ts);
+CREATE VIEW IF NOT EXISTS readings_v AS
+SELECT r.ts, l.name AS location, l.level, l.parent, l.district,
+       CAST(strftime('%H', r.ts, 'unixepoch') AS INTEGER) AS hour,
+       CAST(strftime('%w', r.ts, 'unixepoch') AS INTEGER) AS weekday,
+       date(r.ts, 'unixepoch') AS day,
+       strftime('%w', r.ts, 'unixepoch') IN ('0', '6') AS is_weekend,
+       r.aqi, r.traffic_density, r.vehicles_count, r.avg_speed, r.incidents
+FROM readings r JOIN locations l ON l.id = r.location_id;
+"""
+
+READING_COLUMNS = ['ts', 'location_id', 'aqi', 'traffic_density', 'vehicles_count', 'avg_speed', 'incidents']
+
+# Parameterised queries for the SQL page: params are (label, kind, default) with kind in
+# 'location', 'district', 'int'; values are bound as named SQL parameters
+TEMPLATES = {
+    'Weekday rush-hour AQI by area': {
+        'description': "Mean AQI of a district's areas on weekday rush hours (8-9, 17-20)",
+        'sql': """SELECT location, ROUND(AVG(aqi), 1) AS mean_aqi, ROUND(AVG(traffic_density), 1) AS mean_traffic,
+       COUNT(*) AS hours
+FROM readings_v
+WHERE (district = :district AND level = 'area')
+  AND ts >= strftime('%s', 'now', 'localtime', '-' || :days || ' days')
+  AND NOT is_weekend AND hour IN (8, 9, 17, 18, 19, 20)
+GROUP BY location
+ORDER BY mean_aqi DESC""",
+        'params': {'district': ('District', 'district', 'Vellore'), 'days': ('Last N days', 'int', 30)}
+    },
+    'Hourly profile of a location': {
+        'description': "Mean AQI, traffic and speed by hour of day",
+        'sql': """SELECT hour, ROUND(AVG(aqi), 1) AS mean_aqi, ROUND(AVG(traffic_density), 1) AS mean_traffic,
+       ROUND(AVG(avg_speed), 1) AS mean_speed
+FROM readings_v
+WHERE location = :location AND ts >= strftime('%s', 'now', 'localtime', '-' || :days || ' days')
+GROUP BY hour
+ORDER BY hour""",
+        'params': {'location': ('Location', 'location', 'Vellore'), 'days': ('Last N days', 'int', 30)}
+    },
+    'Most polluted locations': {
+        'description': "Locations ranked by mean AQI, with their share of unhealthy hours (AQI > 150)",
+        'sql': """SELECT location, district, ROUND(AVG(aqi), 1) AS mean_aqi,
+       ROUND(100.0 * SUM(aqi > 150) / COUNT(*), 1) AS unhealthy_pct
+FROM readings_v
+WHERE ts >= strftime('%s', 'now', 'localtime', '-' || :days || ' days')
+GROUP BY location, district
+ORDER BY mean_aqi DESC
+LIMIT :top""",
+        'params': {'days': ('Last N days', 'int', 30), 'top': ('Top N', 'int', 10)}
+    },
+    'Daily district trend': {
+        'description': "Daily mean AQI and total incidents per district (areas roll up to their district)",
+        'sql': """SELECT day, district, ROUND(AVG(aqi), 1) AS mean_aqi, SUM(incidents) AS incidents
+FROM readings_v
+WHERE ts >= strftime('%s', 'now', 'localtime', '-' || :days || ' days')
+GROUP BY day, district
+ORDER BY day, district""",
+        'params': {'days': ('Last N days', 'int', 14)}
+    }
+}
+
+# Statement types a query connection may run (everything else is denied by the authorizer)
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION}
+if hasattr(sqlite3, 'SQLITE_RECURSIVE'):
+    _ALLOWED_ACTIONS.add(sqlite3.SQLITE_RECURSIVE)
+
+
+class QueryError(Exception):
+    """A rejected or failed analyst query"""
+
+
+def _authorize(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class HistoryStore:
+    """On-disk hourly readings with a read-only SQL query interface"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM readings').fetchone()[0]
+
+    def set_locations(self, registry):
+        """Mirror the location registry into the locations table"""
+        rows = [
+            (i, registry.names[i], 'district' if registry.parent[i] < 0 else 'area',
+             registry.names[registry.parent[i]] if registry.parent[i] >= 0 else None,
+             registry.names[registry.district[i]], float(registry.lat[i]), float(registry.lon[i]))
+            for i in range(len(registry))
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def add_readings(self, df):
+        """Insert readings (a DataFrame with READING_COLUMNS); existing (location_id, ts) rows are replaced"""
+        rows = df[READING_COLUMNS].itertuples(index=False, name=None)
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                f"INSERT OR REPLACE INTO readings VALUES ({', '.join('?' * len(READING_COLUMNS))})", rows)
+        return cursor.rowcount
+
+    def _unstored(self, df):
+        if not len(df):
+            return df
+        stored = pd.DataFrame(
+            self._conn.execute('SELECT location_id, ts FROM readings WHERE ts BETWEEN ? AND ?',
+                               (int(df['ts'].min()), int(df['ts'].max()))).fetchall(),
+            columns=['location_id', 'ts'])
+        keys = pd.MultiIndex.from_frame(df[['location_id', 'ts']])
+        return df[~keys.isin(pd.MultiIndex.from_frame(stored))]
+
+    def new_readings(self, df):
+        """The readings whose (location_id, ts) is not stored yet"""
+        with self._lock:
+            return self._unstored(df)
+
+    def add_new_readings(self, df):
+        """Insert only the readings whose (location_id, ts) is not stored yet -> the rows inserted"""
+        with self._lock, self._conn:
+            # Take the write lock first, so no other writer can store one of these hours in between
+            self._conn.execute('BEGIN IMMEDIATE')
+            df = self._unstored(df)
+            self._conn.executemany(f"INSERT INTO readings VALUES ({', '.join('?' * len(READING_COLUMNS))})",
+                                   df[READING_COLUMNS].itertuples(index=False, name=None))
+        return df
+
+    def scan(self, columns=READING_COLUMNS, chunk_rows=100000):
+        """Yield all readings in time order as DataFrames of at most `chunk_rows` rows"""
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT {', '.join(columns)} FROM readings ORDER BY ts")
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+
+    def latest_ts(self):
+        with self._lock:
+            return self._conn.execute('SELECT MAX(ts) FROM readings').fetchone()[0]
+
+    def query(self, sql, params=None, row_limit=1000, timeout_s=10.0):
+        """Run one read-only statement -> (DataFrame of at most `row_limit` rows, truncated flag)"""
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+        try:
+            conn.execute('PRAGMA query_only=ON')
+            conn.set_authorizer(_authorize)
+            deadline = time.monotonic() + timeout_s
+            conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+            try:
+                cursor = conn.execute(sql, params or {})
+                rows = cursor.fetchmany(row_limit + 1)
+            except sqlite3.OperationalError as exc:
+                if time.monotonic() > deadline:
+                    raise QueryError(f"query exceeded {timeout_s:g} s") from exc
+                raise QueryError(str(exc)) from exc
+            except (sqlite3.DatabaseError, sqlite3.ProgrammingError, sqlite3.Warning) as exc:
+                raise QueryError(str(exc)) from exc
+            columns = [d[0] for d in cursor.description or []]
+        finally:
+            conn.close()
+        return pd.DataFrame(rows[:row_limit], columns=columns), len(rows) > row_limit
+
+
+def hourly_history(registry, end, hours, seed=None):
+    """Synthetic readings for every location for the `hours` hours up to `end` (READING_COLUMNS)"""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range(end=pd.Timestamp(end).floor('h'), periods=hours, freq='h')
+    n_loc = len(registry)
+    hour = np.repeat(hours.hour.to_numpy(), n_loc)
+    weekend = np.repeat(hours.weekday.to_numpy() >= 5, n_loc)
+    rush = np.isin(hour, [8, 9, 17, 18, 19, 20]) & ~weekend
+    # Busier cities read consistently higher than small towns
+    major = np.isin(registry.names[registry.district], ['Chennai', 'Coimbatore', 'Madurai', 'Vellore'])
+    major = np.tile(major, len(hours))
+
+    traffic = 40 + 35 * np.sin((hour - 9) * np.pi / 12) + 20 * rush - 10 * weekend + 15 * major
+    traffic = np.clip(traffic + rng.normal(0, 8, len(hour)), 0, 100)
+    aqi = np.clip(70 + 0.8 * traffic + 30 * major + rng.normal(0, 15, len(hour)), 10, 400)
+    return pd.DataFrame({
+        'ts': np.repeat(hours.asi8 // 10 ** 9, n_loc),
+        'location_id': np.tile(np.arange(n_loc), len(hours)),
+        'aqi': aqi.round(1),
+        'traffic_density': traffic.round(1),
+        'vehicles_count': (traffic * 80 + rng.integers(0, 1000, len(hour))).astype('int64'),
+        'avg_speed': np.clip(65 - 0.45 * traffic + rng.normal(0, 4, len(hour)), 5, 80).round(1),
+        'incidents': rng.poisson(0.2 + 0.02 * traffic)
+    })
@@ -0,0 +1,223 @@
+"""Compressed in-memory hot tier of raw sensor readings
+
+Raw readings are kept per series (one series per sensor) for
+``retention_s`` seconds, so charts can show individual readings over hours
+rather than per-minute rollups. New readings go to an uncompressed head
+array per series. When the head reaches ``chunk_points`` readings it is
+sorted by time and sealed into a compressed ``Chunk``, one byte stream per
+column:
+
+* timestamps: delta-of-delta, zigzag, varint. Readings at a steady
+  interval cost one byte each.
+* integer columns: delta, zigzag, varint.
+* float columns: if every value in the chunk has at most three decimals
+  (sensors report AQI as whole numbers and traffic to 0.1 %), the values
+  are scaled to integers and stored as integer deltas. Otherwise each
+  value's bit pattern is XORed with the previous one's, as in Gorilla, and
+  the XOR is varint-coded. This is byte-aligned rather than bit-packed, so
+  encoding and decoding stay vectorised numpy.
+
+Encoding and decoding are exact. Reading a time range decodes only the
+chunks whose time span overlaps it. Whole chunks are dropped once they
+leave the retention window. Readings that arrive late go to the head like
+any other, so sealed chunks may overlap in time, and range reads sort
+their result.
+"""
+import threading
+
+import numpy as np
+
+NS = 1_000_000_000
+_SHIFTS = (7 * np.arange(10)).astype('uint64')
+
+
+def zigzag(values):
+    """Signed int64 -> uint64 with small magnitudes (of either sign) mapping to small numbers"""
+    values = values.astype('int64')
+    return ((values << 1) ^ (values >> 63)).view('uint64')
+
+
+def unzigzag(values):
+    values = values.astype('uint64')
+    return (values >> np.uint64(1)).view('int64') ^ -(values & np.uint64(1)).view('int64')
+
+
+def varint_encode(values):
+    """LEB128 bytes of a uint64 array (7 bits per byte, high bit set on all but the last byte)"""
+    values = np.asarray(values, dtype='uint64')
+    sizes = np.ones(len(values), dtype='int64')
+    for k in range(1, 10):
+        sizes += values >= np.uint64(1 << (7 * k))
+    groups = (values[:, None] >> _SHIFTS[None, :]) & np.uint64(0x7f)
+    position = np.arange(10)[None, :]
+    groups |= (position < (sizes - 1)[:, None]).astype('uint64') << np.uint64(7)
+    return groups.astype('uint8')[position < sizes[:, None]].tobytes()
+
+
+def varint_decode(data):
+    """Inverse of varint_encode -> uint64 array"""
+    raw = np.frombuffer(data, dtype='uint8')
+    if not len(raw):
+        return np.empty(0, dtype='uint64')
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    position = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    parts = (raw & 0x7f).astype('uint64') << (7 * position).astype('uint64')
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+# Decimal scales tried for float columns before falling back to XOR coding
+DECIMAL_SCALES = (1, 10, 100, 1000)
+
+
+def _encode_column(name, values):
+    """(kind, scale, bytes) for one column; kind and scale tell _decode_column how to read it back"""
+    if name == 'timestamp':
+        delta = np.diff(values.astype('int64'), prepend=0)
+        return 'dod', 1, varint_encode(zigzag(np.diff(delta, prepend=0)))
+    if values.dtype.kind == 'f':
+        if np.isfinite(values).all() and (np.abs(values) < 2 ** 40).all():
+            for scale in DECIMAL_SCALES:
+                scaled = np.round(values.astype('float64') * scale)
+                if np.array_equal((scaled / scale).astype(values.dtype), values):
+                    return 'scaled', scale, varint_encode(zigzag(np.diff(scaled.astype('int64'), prepend=0)))
+        bits = values.view(f'uint{values.dtype.itemsize * 8}').astype('uint64')
+        return 'xor', 1, varint_encode(bits ^ np.concatenate([[0], bits[:-1]]).astype('uint64'))
+    return 'delta', 1, varint_encode(zigzag(np.diff(values.astype('int64'), prepend=0)))
+
+
+def _decode_column(kind, scale, data, dtype):
+    codes = varint_decode(data)
+    if kind == 'xor':
+        bits = np.bitwise_xor.accumulate(codes)
+        return bits.astype(f'uint{dtype.itemsize * 8}').view(dtype)
+    values = np.cumsum(unzigzag(codes))
+    if kind == 'dod':
+        values = np.cumsum(values)
+    if kind == 'scaled':
+        return (values / scale).astype(dtype)
+    return values.astype(dtype)
+
+
+class Chunk:
+    """Sealed, compressed run of one series' readings (all columns but the series key)"""
+
+    def __init__(self, rows, key_field):
+        rows = rows[np.argsort(rows['timestamp'], kind='stable')]
+        self.dtype = rows.dtype
+        self.key_field = key_field
+        self.key = rows[key_field][0]
+        self.count = len(rows)
+        self.start = int(rows['timestamp'][0])
+        self.end = int(rows['timestamp'][-1])
+        self.columns = {name: _encode_column(name, np.ascontiguousarray(rows[name]))
+                        for name in rows.dtype.names if name != key_field}
+
+    @property
+    def nbytes(self):
+        return sum(len(data) for _, _, data in self.columns.values())
+
+    def decode(self):
+        rows = np.empty(self.count, dtype=self.dtype)
+        rows[self.key_field] = self.key
+        for name, (kind, scale, data) in self.columns.items():
+            rows[name] = _decode_column(kind, scale, data, self.dtype[name])
+        return rows
+
+
+class HotStore:
+    """Per-series raw readings: an uncompressed head plus sealed compressed chunks, bounded by age"""
+
+    def __init__(self, dtype, key_field, retention_s=6 * 3600, chunk_points=512):
+        self.dtype = dtype
+        self.key_field = key_field
+        self.retention_ns = int(retention_s * NS)
+        self.chunk_points = chunk_points
+        self._heads = {}  # key -> (array of up to chunk_points rows, rows used)
+        self._chunks = {}  # key -> [Chunk], in seal order
+        self.newest = None
+        self.since = None  # oldest reading time since this store started
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        """Add readings of any series; chunks older than the retention window are dropped"""
+        if not len(rows):
+            return
+        order = np.argsort(rows[self.key_field], kind='stable')
+        rows = rows[order]
+        keys, starts = np.unique(rows[self.key_field], return_index=True)
+        with self._lock:
+            for key, part in zip(keys.tolist(), np.split(rows, starts[1:])):
+                self._append_series(key, part)
+            newest = int(rows['timestamp'].max())
+            self.newest = newest if self.newest is None else max(self.newest, newest)
+            if self.since is None:
+                self.since = int(rows['timestamp'].min())
+            self._expire(self.newest - self.retention_ns)
+
+    def _append_series(self, key, rows):
+        head, used = self._heads.get(key, (None, 0))
+        if head is None:
+            head = np.empty(0, dtype=self.dtype)
+        while len(rows):
+            take = min(len(rows), self.chunk_points - used)
+            if used + take > len(head):
+                # Heads grow by doubling up to chunk_points, so sparse series stay small
+                grown = np.empty(min(self.chunk_points, max(2 * len(head), used + take, 16)), dtype=self.dtype)
+                grown[:used] = head[:used]
+                head = grown
+            head[used:used + take] = rows[:take]
+            used += take
+            rows = rows[take:]
+            if used == self.chunk_points:
+                self._chunks.setdefault(key, []).append(Chunk(head, self.key_field))
+                used = 0
+        self._heads[key] = (head, used)
+
+    def _expire(self, cutoff):
+        for key, chunks in self._chunks.items():
+            if chunks and min(chunk.end for chunk in chunks) < cutoff:
+                self._chunks[key] = [chunk for chunk in chunks if chunk.end >= cutoff]
+
+    def keys(self):
+        with self._lock:
+            return list(self._heads)
+
+    def covered_from(self):
+        """Time from which the store holds every reading it was given (None when empty)"""
+        if self.newest is None:
+            return None
+        return max(self.since, self.newest - self.retention_ns)
+
+    def readings(self, key, start_ns=None, end_ns=None):
+        """Readings of one series with start_ns <= timestamp <= end_ns, in time order"""
+        start_ns = -2 ** 63 if start_ns is None else start_ns
+        end_ns = 2 ** 63 - 1 if end_ns is None else end_ns
+        if self.newest is not None:
+            start_ns = max(start_ns, self.newest - self.retention_ns)
+        with self._lock:
+            chunks = [chunk for chunk in self._chunks.get(key, []) if chunk.end >= start_ns and chunk.start <= end_ns]
+            head, used = self._heads.get(key, (np.empty(0, dtype=self.dtype), 0))
+            head = head[:used].copy()
+        rows = np.concatenate([chunk.decode() for chunk in chunks] + [head])
+        rows = rows[(rows['timestamp'] >= start_ns) & (rows['timestamp'] <= end_ns)]
+        return rows[np.argsort(rows['timestamp'], kind='stable')]
+
+    def status(self):
+        with self._lock:
+            chunks = [chunk for series in self._chunks.values() for chunk in series]
+            sealed = sum(chunk.count for chunk in chunks)
+            open_rows = sum(used for _, used in self._heads.values())
+            encoded = sum(chunk.nbytes for chunk in chunks)
+            head_bytes = sum(head.nbytes for head, _ in self._heads.values())
+        readings = sealed + open_rows
+        return {
+            'series': len(self._heads),
+            'readings': readings,
+            'chunks': len(chunks),
+            'bytes': encoded + head_bytes,
+            'raw_bytes': readings * self.dtype.itemsize,
+            'bytes_per_sealed_reading': round(encoded / sealed, 2) if sealed else None,
+            'retention_s': self.retention_ns / NS,
+            'chunk_points': self.chunk_points
+        }
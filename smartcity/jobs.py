@@ -0,0 +1,382 @@
+"""In-process scheduler for heavy periodic analytics
+
+Expensive analytics (daily summaries, correlations over the stored history,
+sensor clustering) run as jobs on a process pool, away from page reruns.
+Pages only read the latest result of a job, its *artifact*, and stay
+responsive however long a job takes.
+
+A ``Job`` runs when one of its triggers fires:
+
+* ``cron``: a five-field cron expression (minute, hour, day of month,
+  month, day of week with 0 = Sunday). Fields take ``*``, numbers, ranges
+  ``a-b``, steps ``*/n`` or ``a-b/n`` and comma lists. As in cron, when
+  both the day of month and the day of week are restricted, either one
+  matching is enough.
+* ``on``: dataset names (see smartcity.versions). The job runs when new
+  data of any of them lands.
+* no artifact yet, and a manual ``run_now``.
+
+A job is split in two. ``prepare()`` runs in the scheduler thread and
+gathers cheap inputs from this process, such as a cube snapshot or a file
+path. ``run(*inputs)`` does the heavy work in a pool worker, so it must be
+a module-level function. Workers are started with ``spawn``, because
+forking a threaded server process can deadlock the child, and with a
+neutral ``__main__``: a Streamlit script run installs main.py as
+``__main__``, which a spawned child would otherwise re-run, starting a
+second copy of the app's services in every worker. A job never
+overlaps itself; a trigger that fires while the job is running is
+remembered and runs it again afterwards.
+
+Every successful run replaces the job's artifact and increments its
+version, so caches keyed on ``artifact.version`` are refreshed. Artifacts
+are pickled to ``data/jobs/<name>.pkl`` and reloaded at start. When
+several app processes share ``DATA_DIR``, only the ``leader`` process runs
+jobs. The other processes pick up the artifact files when they change.
+"""
+import calendar
+import collections
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# (low, high) of each cron field; day of week 7 is Sunday, like 0
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# Threads of the app's background services; none of them may run in a pool worker
+SERVICE_THREADS = {'cache-warmup', 'job-scheduler', 'shared-store-feed', 'tier-maintenance'}
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            first, last = low, high
+        elif '-' in spec:
+            first, last = (int(v) for v in spec.split('-'))
+        else:
+            first = last = int(spec)
+            if step:
+                # 'a/n' steps from a to the end of the range
+                last = high
+        if not low <= first <= last <= high:
+            raise ValueError(f"cron field {text!r} out of range {low}-{high}")
+        values.update(range(first, last + 1, int(step or 1)))
+    return frozenset(values)
+
+
+class Cron:
+    """Five-field cron expression matched at minute resolution"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression {expression!r} needs 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, low, high) for text, (low, high) in zip(fields, CRON_FIELDS))
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def matches(self, moment):
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and self._day_matches(moment))
+
+    def next_after(self, moment):
+        """First matching minute strictly after `moment` (None if there is none within 5 years)"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                days = calendar.monthrange(moment.year, moment.month)[1] - moment.day + 1
+                moment = (moment + timedelta(days=days)).replace(hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        return None
+
+
+class Job:
+    """A named unit of heavy work with its triggers"""
+
+    def __init__(self, name, run, prepare=None, cron=None, on=(), description=''):
+        self.name = name
+        self.run = run
+        self.prepare = prepare or tuple
+        self.cron = Cron(cron) if cron else None
+        self.on = tuple(on)
+        self.description = description
+
+
+Artifact = collections.namedtuple('Artifact', 'value version finished seconds')
+
+
+def _timed(run, inputs):
+    """Pool worker entry point: run the job -> (result, seconds spent in the worker)"""
+    services = sorted(SERVICE_THREADS & {thread.name for thread in threading.enumerate()})
+    if services:
+        raise RuntimeError(f"job worker {os.getpid()} is running app services {services}; "
+                           f"it re-ran the app script on start")
+    started = time.perf_counter()
+    return run(*inputs), time.perf_counter() - started
+
+
+class _neutral_main:
+    """Swap ``__main__`` for an empty module while pool workers are spawned
+
+    A spawned child re-imports the parent's ``__main__`` from its ``__spec__``
+    or ``__file__``; the stub has neither, so workers import only what the
+    pickled job needs.
+    """
+
+    def __enter__(self):
+        self._main = sys.modules['__main__']
+        self._stub = sys.modules['__main__'] = types.ModuleType('__main__')
+        return self
+
+    def __exit__(self, *exc):
+        # A script run may have installed its own __main__ meanwhile; keep that one
+        if sys.modules.get('__main__') is self._stub:
+            sys.modules['__main__'] = self._main
+        return False
+
+
+class Scheduler:
+    """Runs registered jobs on a process pool when their triggers fire and keeps their artifacts"""
+
+    def __init__(self, directory, workers=2, tick_seconds=5, leader=None, history=50):
+        self.directory = directory
+        self.workers = workers
+        self.tick_seconds = tick_seconds
+        self.leader = leader or (lambda: True)
+        self.jobs = {}
+        self._artifacts = {}  # name -> (Artifact, file mtime it was loaded from)
+        self._state = {}
+        self._runs = collections.deque(maxlen=history)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_tick = None
+
+    def register(self, job):
+        self.jobs[job.name] = job
+        self._state[job.name] = {
+            'state': 'idle', 'reason': None, 'runs': 0, 'failures': 0, 'last_error': None,
+            'last_started': None, 'last_seconds': None, 'last_wait_seconds': None, 'total_seconds': 0.0,
+            'future': None, 'submitted': None, 'data_version': None, 'requested': None
+        }
+        return job
+
+    # Artifacts
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.pkl')
+
+    def artifact(self, name):
+        """Latest artifact of a job, or None before its first successful run"""
+        path = self._path(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            cached = self._artifacts.get(name)
+        if cached is not None and (mtime is None or cached[1] == mtime):
+            return cached[0]
+        if mtime is None:
+            return None
+        # Written by an earlier run of this process or by the leader process
+        try:
+            with open(path, 'rb') as f:
+                artifact = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            logger.warning("Unreadable job artifact %s", path)
+            return cached[0] if cached else None
+        with self._lock:
+            self._artifacts[name] = (artifact, mtime)
+        return artifact
+
+    def _store(self, name, value, seconds):
+        previous = self.artifact(name)
+        artifact = Artifact(value, (previous.version if previous else 0) + 1,
+                            datetime.now().isoformat(timespec='seconds'), seconds)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        with self._lock:
+            self._artifacts[name] = (artifact, os.stat(path).st_mtime_ns)
+        return artifact
+
+    # Triggers
+
+    def run_now(self, name):
+        """Run a job at the next tick (again after the current run, if it is running)"""
+        self._state[name]['requested'] = 'manual'
+
+    def _due(self, job, state, now):
+        """Reason the job should run now, or None"""
+        from smartcity import versions
+
+        if state['requested']:
+            return state['requested']
+        if job.on:
+            current = versions.current(*job.on)
+            if state['data_version'] is None:
+                state['data_version'] = current
+            elif current != state['data_version']:
+                return 'data'
+        if job.cron and self._last_tick is not None:
+            minute = self._last_tick.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            while minute <= now:
+                if job.cron.matches(minute):
+                    return 'cron'
+                minute += timedelta(minutes=1)
+        if self.artifact(job.name) is None and state['runs'] == 0 and state['failures'] == 0:
+            return 'first run'
+        return None
+
+    def tick(self, now=None):
+        """Collect finished runs and start the jobs that are due"""
+        now = now or datetime.now()
+        if not self.leader():
+            self._last_tick = now
+            return
+        for name, job in self.jobs.items():
+            state = self._state[name]
+            if state['future'] is not None:
+                if state['future'].done():
+                    self._collect(job, state)
+                else:
+                    # Remember triggers that fire meanwhile, so the job runs again on the new data
+                    reason = self._due(job, state, now)
+                    if reason and reason != 'first run':
+                        state['requested'] = reason
+                    continue
+            reason = self._due(job, state, now)
+            if reason:
+                self._submit(job, state, reason)
+        self._last_tick = now
+
+    def _submit(self, job, state, reason):
+        from smartcity import versions
+
+        state.update(reason=reason, requested=None, last_started=datetime.now().isoformat(timespec='seconds'),
+                     submitted=time.perf_counter())
+        try:
+            inputs = job.prepare()
+            # After prepare(), which may itself land new data (e.g. append the latest hours)
+            if job.on:
+                state['data_version'] = versions.current(*job.on)
+            # Workers start on submit, so the swap covers both
+            with _neutral_main():
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                state['future'] = self._pool.submit(_timed, job.run, inputs)
+            state['state'] = 'running'
+        except Exception as exc:
+            self._fail(job, state, exc)
+
+    def _collect(self, job, state):
+        future, state['future'] = state['future'], None
+        elapsed = time.perf_counter() - state['submitted']
+        try:
+            value, seconds = future.result()
+        except BrokenProcessPool as exc:
+            # A worker died (e.g. out of memory): start a new pool for the next runs
+            self._pool = None
+            self._fail(job, state, exc)
+            return
+        except Exception as exc:
+            self._fail(job, state, exc)
+            return
+        try:
+            self._store(job.name, value, seconds)
+        except Exception as exc:
+            self._fail(job, state, exc)
+            return
+        state.update(state='idle', runs=state['runs'] + 1, last_seconds=seconds,
+                     last_wait_seconds=max(elapsed - seconds, 0.0), total_seconds=state['total_seconds'] + seconds)
+        self._runs.appendleft({'job': job.name, 'reason': state['reason'], 'started': state['last_started'],
+                               'seconds': round(seconds, 3), 'error': None})
+
+    def _fail(self, job, state, exc):
+        logger.warning("Job %s failed: %r", job.name, exc)
+        state.update(state='failed', failures=state['failures'] + 1, last_error=repr(exc), future=None)
+        self._runs.appendleft({'job': job.name, 'reason': state['reason'], 'started': state['last_started'],
+                               'seconds': round(time.perf_counter() - state['submitted'], 3),
+                               'error': repr(exc)})
+
+    # Thread
+
+    def _loop(self):
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Job scheduler tick failed")
+            time.sleep(self.tick_seconds)
+
+    def start(self):
+        """Start the scheduler thread once per process"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def status(self):
+        """One row per job for the Jobs page"""
+        now = datetime.now()
+        rows = []
+        for name, job in self.jobs.items():
+            state = self._state[name]
+            artifact = self.artifact(name)
+            next_cron = job.cron.next_after(now) if job.cron else None
+            rows.append({
+                'job': name,
+                'state': state['state'] if self.leader() else 'other process',
+                'triggers': ', '.join(filter(None, [job.cron.expression if job.cron else None,
+                                                    ' / '.join(f'new {d}' for d in job.on)])),
+                'next_cron': next_cron.isoformat(sep=' ', timespec='minutes') if next_cron else None,
+                'last_reason': state['reason'],
+                'last_started': state['last_started'],
+                'last_seconds': None if state['last_seconds'] is None else round(state['last_seconds'], 3),
+                'last_wait_seconds': None if state['last_wait_seconds'] is None
+                else round(state['last_wait_seconds'], 3),
+                'mean_seconds': round(state['total_seconds'] / state['runs'], 3) if state['runs'] else None,
+                'runs': state['runs'],
+                'failures': state['failures'],
+                'last_error': state['last_error'],
+                'artifact_version': artifact.version if artifact else None,
+                'artifact_finished': artifact.finished if artifact else None
+            })
+        return rows
+
+    def recent_runs(self):
+        return list(self._runs)
@@ -0,0 +1,156 @@
+"""Location and sensor registry
+
+Districts, areas and sensors form a three-level hierarchy loaded from
+``locations.json`` (override with ``SMARTCITY_LOCATIONS``). Every location
+has a stable integer ID (districts first, then areas, both in file order),
+which is also its code in the ``schema`` location catalogue. Per-location
+attributes are parallel NumPy arrays indexed by ID::
+
+    REGISTRY.lat[ids], REGISTRY.parent[ids], REGISTRY.district[ids]
+
+so coordinate lookups and rollups to the parent district are array indexing
+instead of dict merges. Sensors get sequential integer IDs and unique codes
+(``TN-0001`` ...). They are listed explicitly in the file or laid out
+deterministically around their location from the ``sensors`` spec.
+"""
+import json
+import os
+
+import numpy as np
+
+from smartcity import schema
+
+LOCATIONS_PATH = os.environ.get('SMARTCITY_LOCATIONS',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locations.json'))
+
+DISTRICT = 0
+AREA = 1
+
+
+class LocationRegistry:
+    """Districts -> areas -> sensors with integer IDs and coordinate arrays"""
+
+    def __init__(self, locations, sensors=None):
+        """`locations`: list of dicts with name, lat, lon, level and parent (index or None)"""
+        self.names = np.array([loc['name'] for loc in locations], dtype=object)
+        self.lat = np.array([loc['lat'] for loc in locations], dtype='float64')
+        self.lon = np.array([loc['lon'] for loc in locations], dtype='float64')
+        self.level = np.array([loc['level'] for loc in locations], dtype='int8')
+        self.parent = np.array([-1 if loc['parent'] is None else loc['parent'] for loc in locations], dtype='int16')
+        # District each location rolls up to (a district is its own district)
+        self.district = np.where(self.parent < 0, np.arange(len(locations)), self.parent).astype('int16')
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        if len(self._ids) != len(self.names):
+            raise ValueError("location names must be unique")
+
+        sensors = sensors or {'location': [], 'lat': [], 'lon': [], 'code': []}
+        self.sensor_location = np.asarray(sensors['location'], dtype='int16')
+        self.sensor_lat = np.asarray(sensors['lat'], dtype='float64')
+        self.sensor_lon = np.asarray(sensors['lon'], dtype='float64')
+        self.sensor_code = np.asarray(sensors['code'], dtype=object)
+        # Sensors grouped by location: sensors of location i are _sensor_order[_sensor_start[i]:_sensor_start[i + 1]]
+        self._sensor_order = np.argsort(self.sensor_location, kind='stable')
+        self._sensor_start = np.searchsorted(self.sensor_location[self._sensor_order], np.arange(len(self.names) + 1))
+
+        schema.register_locations(self.names)
+
+    @classmethod
+    def from_dict(cls, doc):
+        """Build from the locations.json document"""
+        districts = doc['districts']
+        locations = [{'name': d['name'], 'lat': d['lat'], 'lon': d['lon'], 'level': DISTRICT, 'parent': None}
+                     for d in districts]
+        for district_id, d in enumerate(districts):
+            locations += [{'name': a['name'], 'lat': a['lat'], 'lon': a['lon'], 'level': AREA, 'parent': district_id}
+                          for a in d.get('areas', [])]
+
+        spec = doc.get('sensors', {})
+        if isinstance(spec, list):
+            ids = {loc['name']: i for i, loc in enumerate(locations)}
+            sensors = {
+                'location': [ids[s['location']] for s in spec],
+                'lat': [s['lat'] for s in spec],
+                'lon': [s['lon'] for s in spec],
+                'code': [s['code'] for s in spec]
+            }
+        else:
+            sensors = layout_sensors([loc['lat'] for loc in locations], [loc['lon'] for loc in locations], **spec)
+        return cls(locations, sensors)
+
+    @classmethod
+    def from_file(cls, path=LOCATIONS_PATH):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_mapping(cls, mapping, **sensor_spec):
+        """Flat registry of districts from a {name: {'lat', 'lon'}} mapping"""
+        return cls.from_dict({
+            'districts': [{'name': name, 'lat': c['lat'], 'lon': c['lon']} for name, c in mapping.items()],
+            'sensors': sensor_spec
+        })
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, name):
+        return self._ids[name]
+
+    def ids(self, names):
+        """Vectorised name -> ID lookup"""
+        return np.fromiter((self._ids[name] for name in names), dtype='int16')
+
+    @property
+    def districts(self):
+        return np.flatnonzero(self.level == DISTRICT)
+
+    def children(self, location_id):
+        return np.flatnonzero(self.parent == location_id)
+
+    def mapping(self, ids):
+        """{name: {'lat', 'lon'}} for the given IDs (the shape the table builders take)"""
+        return {self.names[i]: {'lat': float(self.lat[i]), 'lon': float(self.lon[i])} for i in ids}
+
+    def sensors_of(self, location_ids):
+        """Sensor IDs belonging to the given locations, grouped by location in the given order"""
+        location_ids = np.asarray(location_ids)
+        starts = self._sensor_start[location_ids]
+        counts = self._sensor_start[location_ids + 1] - starts
+        # Position of each output sensor within its location's run of sensors
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self._sensor_order[np.repeat(starts, counts) + offsets]
+
+    def sensor_counts(self, location_ids):
+        location_ids = np.asarray(location_ids)
+        return self._sensor_start[location_ids + 1] - self._sensor_start[location_ids]
+
+    def rollup(self, location_ids, values, how='sum'):
+        """Aggregate per-location values to their districts; returns an array indexed by location ID"""
+        districts = self.district[location_ids]
+        totals = np.bincount(districts, weights=values, minlength=len(self))
+        if how == 'sum':
+            return totals
+        if how == 'mean':
+            counts = np.bincount(districts, minlength=len(self))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return totals / counts
+        raise ValueError(f"unknown rollup {how!r}")
+
+
+def layout_sensors(lats, lons, per_location=(3, 7), spread_deg=0.08, prefix='TN', seed=0):
+    """Deterministic sensor placement: per_location[0]..per_location[1] sensors scattered around each location"""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(per_location[0], per_location[1] + 1, size=len(lats))
+    location = np.repeat(np.arange(len(lats)), counts)
+    lat = np.asarray(lats, dtype='float64')[location] + rng.uniform(-spread_deg, spread_deg, len(location))
+    lon = np.asarray(lons, dtype='float64')[location] + rng.uniform(-spread_deg, spread_deg, len(location))
+    width = max(4, len(str(len(location))))
+    return {
+        'location': location,
+        'lat': lat,
+        'lon': lon,
+        'code': [f"{prefix}-{i + 1:0{width}d}" for i in range(len(location))]
+    }
+
+
+REGISTRY = LocationRegistry.from_file()
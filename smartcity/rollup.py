@@ -0,0 +1,206 @@
+"""Pre-aggregated hierarchy cube: sensor -> area -> district -> Tamil Nadu
+
+Every reading is added once, at ingest, to each of its ancestors in the
+location registry (its sensor, its location, the location's district and the
+state). Per node, time bucket and metric the cube keeps count, sum, min and
+max in ring arrays of ``buckets`` slots of ``bucket_seconds`` each, so the
+statistics of any node over the last k buckets are read from k slots no
+matter how many readings went into them. Drill-down is a child lookup
+followed by the same read.
+
+Nodes are numbered so registry IDs carry over: location ``i`` is node ``i``,
+the state is node ``len(registry)`` and sensor ``s`` is node
+``len(registry) + 1 + s``.
+"""
+import threading
+
+import numpy as np
+
+from smartcity.registry import REGISTRY
+
+METRICS = ('aqi', 'traffic_density')
+BUCKET_SECONDS = 60
+BUCKETS = 180  # three hours of one-minute buckets
+
+STATE_NAME = 'Tamil Nadu'
+NS = 1_000_000_000
+
+
+class HierarchyCube:
+    """Incremental count/sum/min/max per (node, time bucket, metric)"""
+
+    def __init__(self, registry=REGISTRY, metrics=METRICS, bucket_seconds=BUCKET_SECONDS, buckets=BUCKETS):
+        self.registry = registry
+        self.metrics = tuple(metrics)
+        self.bucket_ns = int(bucket_seconds * NS)
+        self.buckets = buckets
+        self.state = len(registry)
+        self.sensor_base = len(registry) + 1
+        nodes = self.sensor_base + len(registry.sensor_location)
+
+        # Ancestor nodes of every location and sensor node (-1 pads shorter paths)
+        location_paths = np.full((len(registry), 3), -1, dtype='int64')
+        location_paths[:, 0] = np.arange(len(registry))
+        is_area = registry.parent >= 0
+        location_paths[is_area, 1] = registry.parent[is_area]
+        location_paths[:, 2] = self.state
+        self._location_paths = location_paths
+        self._sensor_paths = np.column_stack([
+            self.sensor_base + np.arange(len(registry.sensor_location)),
+            location_paths[registry.sensor_location]
+        ])
+
+        shape = (nodes, buckets, len(self.metrics))
+        self.count = np.zeros((nodes, buckets), dtype='int64')
+        self.sum = np.zeros(shape, dtype='float64')
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        # Absolute bucket number held by each ring slot (-1 = never used)
+        self.slot_bucket = np.full(buckets, -1, dtype='int64')
+        self.latest_bucket = -1
+        self._lock = threading.Lock()
+
+    def _claim_slots(self, bucket_numbers):
+        """Reset ring slots that are being reused for newer buckets"""
+        for bucket in np.unique(bucket_numbers):
+            slot = bucket % self.buckets
+            if self.slot_bucket[slot] != bucket:
+                self.count[:, slot] = 0
+                self.sum[:, slot] = 0
+                self.min[:, slot] = np.inf
+                self.max[:, slot] = -np.inf
+                self.slot_bucket[slot] = bucket
+
+    def ingest(self, timestamps_ns, location_ids, values, sensor_ids=None):
+        """Add readings: int64 epoch-ns timestamps, location IDs and an (n, len(metrics)) value array
+
+        With `sensor_ids`, readings are also counted at the sensor level (their
+        location is taken from the registry). Readings older than the ring are
+        dropped.
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype='int64')
+        values = np.asarray(values, dtype='float64').reshape(len(timestamps_ns), len(self.metrics))
+        if sensor_ids is not None:
+            paths = self._sensor_paths[np.asarray(sensor_ids)]
+        else:
+            paths = self._location_paths[np.asarray(location_ids)]
+        bucket_numbers = timestamps_ns // self.bucket_ns
+
+        with self._lock:
+            newest = max(self.latest_bucket, int(bucket_numbers.max(initial=-1)))
+            keep = bucket_numbers > newest - self.buckets
+            if not keep.all():
+                timestamps_ns, values, paths, bucket_numbers = (
+                    timestamps_ns[keep], values[keep], paths[keep], bucket_numbers[keep])
+            if len(bucket_numbers) == 0:
+                return 0
+            self._claim_slots(bucket_numbers)
+            self.latest_bucket = newest
+
+            # One update per (reading, ancestor) pair
+            depth = paths.shape[1]
+            nodes = paths.ravel()
+            slots = np.repeat(bucket_numbers % self.buckets, depth)
+            rows = np.repeat(values, depth, axis=0)
+            valid = nodes >= 0
+            nodes, slots, rows = nodes[valid], slots[valid], rows[valid]
+            np.add.at(self.count, (nodes, slots), 1)
+            np.add.at(self.sum, (nodes, slots), rows)
+            np.minimum.at(self.min, (nodes, slots), rows)
+            np.maximum.at(self.max, (nodes, slots), rows)
+        return len(bucket_numbers)
+
+    def _window_slots(self, window_buckets, now_ns=None):
+        latest = self.latest_bucket if now_ns is None else int(now_ns // self.bucket_ns)
+        wanted = np.arange(latest - min(window_buckets, self.buckets) + 1, latest + 1)
+        slots = wanted % self.buckets
+        return slots[self.slot_bucket[slots] == wanted]
+
+    def stats(self, nodes, window_buckets=15, now_ns=None):
+        """{'count', 'mean', 'min', 'max'} over the last `window_buckets` buckets for each node
+
+        `nodes` may be a single node or an array; metric arrays have shape
+        (len(nodes), len(metrics)).
+        """
+        nodes = np.atleast_1d(nodes)
+        with self._lock:
+            slots = self._window_slots(window_buckets, now_ns)
+            count = self.count[np.ix_(nodes, slots)].sum(axis=1)
+            total = self.sum[np.ix_(nodes, slots)].sum(axis=1)
+            low = self.min[np.ix_(nodes, slots)].min(axis=1, initial=np.inf)
+            high = self.max[np.ix_(nodes, slots)].max(axis=1, initial=-np.inf)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count[:, None]
+        low[np.isinf(low)] = np.nan
+        high[np.isinf(high)] = np.nan
+        return {'count': count, 'mean': mean, 'min': low, 'max': high}
+
+    def series(self, node, window_buckets=60):
+        """Per-bucket statistics of one node, oldest first, as a DataFrame (empty buckets omitted)"""
+        import pandas as pd
+
+        with self._lock:
+            slots = self._window_slots(window_buckets)
+            buckets = self.slot_bucket[slots]
+            count = self.count[node, slots]
+            total = self.sum[node, slots]
+            low = self.min[node, slots]
+            high = self.max[node, slots]
+        used = count > 0
+        data = {'bucket_start': pd.to_datetime(buckets[used] * self.bucket_ns), 'readings': count[used]}
+        for i, metric in enumerate(self.metrics):
+            data[f'{metric}_mean'] = total[used, i] / count[used]
+            data[f'{metric}_min'] = low[used, i]
+            data[f'{metric}_max'] = high[used, i]
+        return pd.DataFrame(data)
+
+    def children(self, node):
+        """Child nodes: state -> districts, location -> its areas and then its own sensors"""
+        registry = self.registry
+        if node == self.state:
+            return registry.districts
+        if node >= self.sensor_base:
+            return np.empty(0, dtype='int64')
+        areas = registry.children(node)
+        sensors = self.sensor_base + registry.sensors_of([node])
+        return np.concatenate([areas, sensors])
+
+    def name(self, node):
+        if node == self.state:
+            return STATE_NAME
+        if node >= self.sensor_base:
+            return self.registry.sensor_code[node - self.sensor_base]
+        return self.registry.names[node]
+
+    def level(self, node):
+        if node == self.state:
+            return 'state'
+        if node >= self.sensor_base:
+            return 'sensor'
+        return 'district' if self.registry.parent[node] < 0 else 'area'
+
+    def path(self, node):
+        """Nodes from the state down to `node`"""
+        if node == self.state:
+            return [node]
+        if node >= self.sensor_base:
+            return self.path(int(self.registry.sensor_location[node - self.sensor_base])) + [node]
+        parent = int(self.registry.parent[node])
+        return [self.state] + ([parent] if parent >= 0 else []) + [node]
+
+    def frame(self, nodes, window_buckets=15, now_ns=None):
+        """Stats of `nodes` as a DataFrame with one row per node"""
+        import pandas as pd
+
+        nodes = np.atleast_1d(nodes)
+        stats = self.stats(nodes, window_buckets, now_ns)
+        data = {'node': nodes, 'name': [self.name(n) for n in nodes],
+                'level': [self.level(n) for n in nodes], 'readings': stats['count']}
+        for i, metric in enumerate(self.metrics):
+            data[f'{metric}_mean'] = stats['mean'][:, i]
+            data[f'{metric}_min'] = stats['min'][:, i]
+            data[f'{metric}_max'] = stats['max'][:, i]
+        return pd.DataFrame(data)
+
+
+CUBE = HierarchyCube()
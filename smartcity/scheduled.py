@@ -0,0 +1,42 @@
+"""The app's scheduled analytics jobs (see smartcity.jobs and smartcity.analytics)
+
+Heavy analytics run off the UI path on the job scheduler; pages read the
+artifacts. Only the pages that show a job's results and the background
+service start import this module.
+"""
+import os
+
+from smartcity import analytics, shared_store
+from smartcity.data import DATA_DIR, HISTORY_DAYS, REGISTRY, extend_history, get_history_store
+from smartcity.feed import feed_rollup, sensor_metric
+from smartcity.jobs import Job, Scheduler
+
+JOB_WORKERS = int(os.environ.get('SMARTCITY_JOB_WORKERS', '2'))
+JOBS = Scheduler(os.path.join(DATA_DIR, 'jobs'), workers=JOB_WORKERS, leader=shared_store.is_writer)
+
+
+def _history_job_inputs(days):
+    def prepare():
+        extend_history()
+        return get_history_store().path, days
+    return prepare
+
+
+def _sensor_group_inputs():
+    feed_rollup()
+    return REGISTRY.sensor_lat, REGISTRY.sensor_lon, sensor_metric('aqi')
+
+
+JOBS.register(Job('daily_summary', analytics.daily_summaries, _history_job_inputs(HISTORY_DAYS),
+                  cron='5 * * * *', on=('history',),
+                  description='Per-district daily AQI, unhealthy hours and incidents (Time Trends)'))
+JOBS.register(Job('history_correlations', analytics.history_correlations, _history_job_inputs(30),
+                  cron='15 */6 * * *', on=('history',),
+                  description='AQI correlations over 30 days of stored history (Correlation Study)'))
+JOBS.register(Job('sensor_groups', analytics.sensor_groups, _sensor_group_inputs, cron='*/5 * * * *',
+                  description='k-means sensor groups with their recent AQI (Sensor Clusters)'))
+
+
+def start_jobs():
+    """Start the job scheduler thread (once per process)"""
+    return JOBS.start()
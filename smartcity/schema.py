@@ -0,0 +1,164 @@
+"""Column schemas for readings and location tables
+
+Every table the app builds is stored in a compact typed form:
+
+* ``location`` is a categorical over the process-wide location catalogue, so
+  each row holds a small integer code (the location ID) instead of a Python
+  string, and filters/groupbys by location compare integers;
+* bounded metrics (AQI, traffic %, speed, incidents) are ``int16``, counts
+  that can exceed 32k are ``int32`` and coordinates/measurements ``float32``;
+* timestamps are int64 epoch nanoseconds. Raw reading arrays hold them as
+  plain ``int64``; DataFrames hold them as ``datetime64[ns]``, which is the
+  same int64 storage with datetime semantics for plotting.
+
+Conversion happens at the edges: ``readings_from_records`` packs incoming
+dict readings into a structured array, ``readings_to_frame`` and ``conform``
+produce typed DataFrames, and categorical values read back as plain ``str``.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Structured dtype of one raw realtime reading (30 bytes per reading, packed)
+READING = np.dtype([
+    ('timestamp', 'int64'),
+    ('location', 'int16'),
+    ('traffic_density', 'int16'),
+    ('lat', 'float32'),
+    ('lon', 'float32'),
+    ('aqi', 'int16'),
+    ('avg_speed', 'int16'),
+    ('vehicles_count', 'int32'),
+    ('incidents', 'int16')
+])
+
+# Structured dtype of one per-sensor reading fed to the rollup cube (24 bytes); `seq` counts
+# each sensor's readings, so (sensor, seq) identifies a reading across retried deliveries
+SENSOR_READING = np.dtype([
+    ('timestamp', 'int64'),
+    ('sensor', 'int32'),
+    ('seq', 'uint32'),
+    ('aqi', 'float32'),
+    ('traffic_density', 'float32')
+])
+
+# DataFrame column dtypes per table ('category' columns use the location catalogue when named location)
+SCHEMAS = {
+    'reading': {
+        'timestamp': 'datetime64[ns]',
+        'location': 'category',
+        'lat': 'float32',
+        'lon': 'float32',
+        'traffic_density': 'int16',
+        'aqi': 'int16',
+        'vehicles_count': 'int32',
+        'avg_speed': 'int16',
+        'incidents': 'int16'
+    },
+    'location_snapshot': {
+        'location': 'category',
+        'lat': 'float32',
+        'lon': 'float32',
+        'aqi': 'int16',
+        'traffic_density': 'int16',
+        'vehicles_count': 'int32',
+        'cars': 'int32',
+        'bikes': 'int32',
+        'trucks': 'int32',
+        'avg_speed': 'int16',
+        'incidents': 'int16',
+        'population': 'int32'
+    },
+    'time_series': {
+        'timestamp': 'datetime64[ns]',
+        'traffic_volume': 'float32',
+        'aqi': 'float32',
+        'hour': 'int16',
+        'day_of_week': 'category',
+        'date': 'category'
+    },
+    'distribution': {
+        'location': 'category',
+        'aqi': 'float32'
+    }
+}
+
+# Location catalogue: append-only, so a name keeps its ID for the life of the process
+_location_names = []
+_location_index = {}
+_location_dtype = [pd.CategoricalDtype([])]
+_lock = threading.Lock()
+
+
+def register_locations(names):
+    """Add unseen location names to the catalogue; returns the current categorical dtype"""
+    with _lock:
+        added = False
+        for name in names:
+            if name not in _location_index:
+                _location_index[name] = len(_location_names)
+                _location_names.append(name)
+                added = True
+        if added:
+            _location_dtype[0] = pd.CategoricalDtype(_location_names)
+        return _location_dtype[0]
+
+
+def location_dtype():
+    return _location_dtype[0]
+
+
+def location_id(name):
+    """Integer ID of a catalogued location"""
+    return _location_index[name]
+
+
+def location_ids(names):
+    """Vectorised name -> ID lookup (-1 for names outside the catalogue)"""
+    return pd.Categorical(names, dtype=location_dtype()).codes.astype('int16')
+
+
+def location_names(ids):
+    """Vectorised ID -> name lookup as a categorical"""
+    return pd.Categorical.from_codes(np.asarray(ids), dtype=location_dtype())
+
+
+def conform(df, table):
+    """Cast a DataFrame's columns to the schema of `table` (columns not in the schema are kept as-is)"""
+    schema = SCHEMAS[table]
+    dtypes = {}
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if column == 'location':
+            dtypes[column] = register_locations(pd.unique(df[column]))
+        else:
+            dtypes[column] = dtype
+    return df.astype(dtypes, copy=False)
+
+
+def readings_from_records(records):
+    """Pack dict readings (as produced by the realtime generator) into a READING array"""
+    records = list(records)
+    out = np.empty(len(records), dtype=READING)
+    if not records:
+        return out
+    register_locations(r['location'] for r in records)
+    for field in READING.names:
+        values = [r[field] for r in records]
+        if field == 'timestamp':
+            out[field] = pd.to_datetime(values).asi8
+        elif field == 'location':
+            out[field] = [_location_index[v] for v in values]
+        else:
+            out[field] = values
+    return out
+
+
+def readings_to_frame(readings):
+    """Typed DataFrame ('reading' schema) from a READING array"""
+    data = {field: readings[field] for field in READING.names}
+    data['timestamp'] = readings['timestamp'].view('datetime64[ns]')
+    data['location'] = location_names(readings['location'])
+    return pd.DataFrame(data, columns=list(SCHEMAS['reading']))
@@ -0,0 +1,241 @@
+"""Full-text and faceted search over incident reports
+
+Reports are kept in an on-disk SQLite database. The report text is indexed
+with an FTS5 inverted index (ranked with BM25) and the location, incident
+type and timestamp facets are plain indexed columns, so a query only touches
+the postings and index ranges it needs instead of scanning every report.
+
+Text queries return the best BM25 matches. Their facet counts cover every
+match, not just the returned page: the (time, location, type) of all
+matches of a query text are read once and kept in a small LRU, so changing
+the facet filters or the time window, or rerunning the page, counts from
+memory instead of walking the postings again.
+"""
+import collections
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'any', 'at', 'by', 'for', 'from', 'in', 'last', 'near',
+    'of', 'on', 'or', 'past', 'show', 'the', 'to', 'with', 'within'
+}
+
+TIME_UNITS = {
+    'min': 'minutes', 'mins': 'minutes', 'minute': 'minutes', 'minutes': 'minutes',
+    'hr': 'hours', 'hrs': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'day': 'days', 'days': 'days',
+    'week': 'weeks', 'weeks': 'weeks'
+}
+
+# Matches kept for facet counting, over all cached query texts
+FACET_CACHE_ROWS = 2_000_000
+
+TIME_PATTERN = re.compile(
+    r'\b(?:last|past|within)\s+(\d+)?\s*(' + '|'.join(TIME_UNITS) + r')\b', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    incident_type TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_ts ON reports (ts);
+CREATE INDEX IF NOT EXISTS idx_reports_location_ts ON reports (location, ts);
+CREATE INDEX IF NOT EXISTS idx_reports_type_ts ON reports (incident_type, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    text, content='reports', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+
+def parse_query(query, locations, incident_types, now=None):
+    """Split a free-text query into facets and remaining search terms
+
+    "accident near Katpadi last 2 hours" becomes
+    {'types': ['Accident'], 'locations': ['Katpadi'], 'since': now - 2h, 'text': ''}
+    """
+    now = now or datetime.now()
+    remaining = query or ''
+
+    since = None
+    match = TIME_PATTERN.search(remaining)
+    if match:
+        amount = int(match.group(1) or 1)
+        since = now - timedelta(**{TIME_UNITS[match.group(2).lower()]: amount})
+        remaining = remaining[:match.start()] + ' ' + remaining[match.end():]
+    elif re.search(r'\btoday\b', remaining, re.IGNORECASE):
+        since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        remaining = re.sub(r'\btoday\b', ' ', remaining, flags=re.IGNORECASE)
+
+    def extract(names):
+        found = []
+        nonlocal remaining
+        # Longest names first so "New Bus Stand" wins over a shorter overlap
+        for name in sorted(names, key=len, reverse=True):
+            pattern = re.compile(r'\b' + re.escape(name) + r'\b', re.IGNORECASE)
+            if pattern.search(remaining):
+                found.append(name)
+                remaining = pattern.sub(' ', remaining)
+        return found
+
+    found_types = extract(incident_types)
+    found_locations = extract(locations)
+
+    terms = [t for t in TOKEN_PATTERN.findall(remaining.lower()) if t not in STOP_WORDS]
+
+    return {
+        'text': ' '.join(terms),
+        'locations': found_locations,
+        'types': found_types,
+        'since': since
+    }
+
+
+def to_match_expression(text):
+    """Turn user text into a safe FTS5 MATCH expression (terms OR-ed, BM25 ranks)"""
+    terms = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+    return ' OR '.join(f'"{t}"' for t in terms)
+
+
+class IncidentIndex:
+    """On-disk inverted index of incident reports with location/type/time facets"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA cache_size=-65536')
+        self._conn.executescript(SCHEMA)
+        # match expression -> DataFrame of the (ts, location, type) of every match, sorted by ts
+        self._matches = collections.OrderedDict()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def add_reports(self, reports):
+        """Index an iterable of {'timestamp', 'location', 'type', 'text'} dicts"""
+        rows = [
+            (int(r['timestamp'].timestamp()), r['location'], r['type'], r['text'])
+            for r in reports
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            start = self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM reports').fetchone()[0]
+            self._conn.executemany(
+                'INSERT INTO reports (ts, location, incident_type, text) VALUES (?, ?, ?, ?)', rows)
+            self._conn.execute(
+                'INSERT INTO reports_fts (rowid, text) SELECT id, text FROM reports WHERE id > ?',
+                (start,))
+            self._matches.clear()
+        return len(rows)
+
+    def _all_matches(self, match):
+        """Time, location and type of every report matching `match`, oldest first (cached per match)"""
+        with self._lock:
+            matches = self._matches.get(match)
+            if matches is not None:
+                self._matches.move_to_end(match)
+                return matches
+            rows = self._conn.execute(
+                'SELECT r.ts, r.location, r.incident_type FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid '
+                'WHERE reports_fts MATCH ?', (match,)).fetchall()
+            matches = pd.DataFrame(rows, columns=['ts', 'location', 'type']).astype(
+                {'location': 'category', 'type': 'category'}).sort_values('ts', ignore_index=True)
+            self._matches[match] = matches
+            while sum(map(len, self._matches.values())) > FACET_CACHE_ROWS and len(self._matches) > 1:
+                self._matches.popitem(last=False)
+        return matches
+
+    def _match_facets(self, match, locations, types, since, until):
+        """Facet counts over every match of `match` that passes the facet filters"""
+        matches = self._all_matches(match)
+        ts = matches['ts'].to_numpy()
+        first = 0 if since is None else np.searchsorted(ts, int(since.timestamp()), side='left')
+        last = len(ts) if until is None else np.searchsorted(ts, int(until.timestamp()), side='right')
+        matches = matches.iloc[first:last]
+        if locations:
+            matches = matches[matches['location'].isin(locations)]
+        if types:
+            matches = matches[matches['type'].isin(types)]
+        counts = matches.groupby(['location', 'type'], observed=True).size().rename('count').reset_index()
+        return counts.astype({'location': str, 'type': str})
+
+    def _filters(self, locations, types, since, until):
+        clauses, params = [], []
+        if locations:
+            clauses.append(f"r.location IN ({','.join('?' * len(locations))})")
+            params.extend(locations)
+        if types:
+            clauses.append(f"r.incident_type IN ({','.join('?' * len(types))})")
+            params.extend(types)
+        if since is not None:
+            clauses.append('r.ts >= ?')
+            params.append(int(since.timestamp()))
+        if until is not None:
+            clauses.append('r.ts <= ?')
+            params.append(int(until.timestamp()))
+        return clauses, params
+
+    def search(self, text='', locations=None, types=None, since=None, until=None, limit=50):
+        """Return (results DataFrame, facet counts dict, elapsed milliseconds)
+
+        Text queries return the `limit` best BM25 matches (FTS5 ranks the whole
+        posting list); without text the newest matching reports come first.
+        The facet counts cover every match: from the cached matches of the
+        query text, or, without text, from one grouped query over the
+        indexed facet columns.
+        """
+        started = time.perf_counter()
+        clauses, params = self._filters(locations, types, since, until)
+        match = to_match_expression(text)
+
+        if match:
+            source = 'reports_fts JOIN reports r ON r.id = reports_fts.rowid'
+            clauses.insert(0, 'reports_fts MATCH ?')
+            params.insert(0, match)
+            score, order = '-bm25(reports_fts)', 'ORDER BY bm25(reports_fts)'
+        else:
+            source = 'reports r'
+            score, order = 'NULL', 'ORDER BY r.ts DESC'
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT r.ts, r.location, r.incident_type, r.text, {score} '
+                f'FROM {source} {where} {order} LIMIT ?',
+                params + [limit]).fetchall()
+            if not match:
+                counts = pd.DataFrame(self._conn.execute(
+                    f'SELECT r.location, r.incident_type, COUNT(*) FROM {source} {where} '
+                    f'GROUP BY r.location, r.incident_type', params).fetchall(),
+                    columns=['location', 'type', 'count'])
+        if match:
+            counts = self._match_facets(match, locations, types, since, until)
+
+        facets = {
+            'location': counts.groupby('location')['count'].sum().sort_values(ascending=False).to_dict(),
+            'incident_type': counts.groupby('type')['count'].sum().sort_values(ascending=False).to_dict()
+        }
+
+        results = pd.DataFrame(rows, columns=['timestamp', 'location', 'type', 'report', 'score'])
+        results['timestamp'] = pd.to_datetime([datetime.fromtimestamp(ts) for ts in results['timestamp']])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return results, facets, elapsed_ms
@@ -0,0 +1,235 @@
+"""Per-session memory accounting and bounded realtime buffers
+
+Each browser session keeps its own realtime window in ``st.session_state``.
+The window is a ``RealtimeBuffer``: a packed reading array capped both by age
+(``SMARTCITY_REALTIME_WINDOW_S``, default 180 s) and by point count
+(``SMARTCITY_REALTIME_MAX_POINTS``, default 500), so no session can grow
+without bound however fast it reruns.
+
+``touch()`` is called once per rerun. It registers the session, periodically
+measures the deep size of its session state and, at most every
+``EVICT_EVERY`` seconds, clears the buffers of sessions that have been idle
+longer than ``SMARTCITY_SESSION_IDLE_S`` (default 600 s). An idle session's
+window has aged out of the rolling window anyway, so eviction loses nothing
+the Dashboard would still show. The registry holds the buffers weakly, and
+the sweep forgets sessions that Streamlit no longer reports as active,
+whether or not they ever held a buffer.
+"""
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from smartcity import schema
+
+WINDOW_SECONDS = float(os.environ.get('SMARTCITY_REALTIME_WINDOW_S', '180'))
+MAX_POINTS = int(os.environ.get('SMARTCITY_REALTIME_MAX_POINTS', '500'))
+IDLE_SECONDS = float(os.environ.get('SMARTCITY_SESSION_IDLE_S', '600'))
+
+# Re-measure a session's state at most this often, and sweep for idle sessions at most this often
+ACCOUNT_EVERY = 10.0
+EVICT_EVERY = 30.0
+
+_sessions = {}
+_lock = threading.Lock()
+_last_sweep = [0.0]
+
+
+class RealtimeBuffer:
+    """Rolling window of realtime readings bounded by age and count
+
+    Readings are stored as a packed ``schema.READING`` array rather than one
+    dict per point. The array is allocated on first append with room for twice
+    ``max_points``, so appends and trims only move the window bounds; live
+    rows are compacted to the front when the end is reached. ``clear()``
+    releases the array.
+
+    Rows are kept in event-time order: a reading older than the newest one
+    is inserted at its place, and a repeat of a (timestamp, location)
+    reading already in the window is ignored.
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, max_points=MAX_POINTS):
+        self.window_seconds = window_seconds
+        self.max_points = max_points
+        self._rows = np.empty(0, dtype=schema.READING)
+        self._start = 0
+        self._end = 0
+        self.evictions = 0
+
+    def append(self, point):
+        """Add one reading (a dict as produced by the realtime generator); returns False for a repeat"""
+        row = schema.readings_from_records([point])[0]
+        live = self._rows[self._start:self._end]
+        position = int(np.searchsorted(live['timestamp'], row['timestamp'], side='left'))
+        same_time = live[position:int(np.searchsorted(live['timestamp'], row['timestamp'], side='right'))]
+        if (same_time['location'] == row['location']).any():
+            return False
+        if self._end == len(self._rows):
+            live = self._end - self._start
+            rows = self._rows if len(self._rows) else np.empty(2 * self.max_points, dtype=schema.READING)
+            rows[:live] = self._rows[self._start:self._end]
+            self._rows, self._start, self._end = rows, 0, live
+        position += self._start
+        if position < self._end:
+            self._rows[position + 1:self._end + 1] = self._rows[position:self._end]
+        self._rows[position] = row
+        self._end += 1
+        if self._end - self._start > self.max_points:
+            self._start = self._end - self.max_points
+        return True
+
+    def trim(self, now):
+        """Drop readings older than the window"""
+        cutoff = pd.Timestamp(now - timedelta(seconds=self.window_seconds)).value
+        timestamps = self._rows['timestamp'][self._start:self._end]
+        self._start += int(np.searchsorted(timestamps, cutoff, side='right'))
+
+    def clear(self):
+        self._rows = np.empty(0, dtype=schema.READING)
+        self._start = self._end = 0
+
+    def readings(self):
+        """View of the live READING rows, oldest first"""
+        return self._rows[self._start:self._end]
+
+    def to_frame(self):
+        """Typed DataFrame of the window (see schema.readings_to_frame)"""
+        return schema.readings_to_frame(self.readings())
+
+    def __len__(self):
+        return self._end - self._start
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate bytes held by `obj`, following containers and DataFrames"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+    if isinstance(obj, RealtimeBuffer):
+        return sys.getsizeof(obj) + obj._rows.nbytes
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+def session_usage(session_state):
+    """Bytes per session-state key, largest first"""
+    usage = {}
+    for key in list(session_state.keys()):
+        try:
+            usage[str(key)] = deep_sizeof(session_state[key])
+        except Exception:  # widget state that is not readable outside its script run
+            continue
+    return dict(sorted(usage.items(), key=lambda item: item[1], reverse=True))
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'standalone'
+
+
+def _session_closed(session_id):
+    """Whether Streamlit has closed the session (never true outside a running server)"""
+    from streamlit import runtime
+
+    return runtime.exists() and not runtime.get_instance().is_active_session(session_id)
+
+
+def touch(session_state):
+    """Record activity for the current session; called once per rerun"""
+    now = time.monotonic()
+    session_id = _session_id()
+    buffer = session_state.get('realtime_data')
+
+    with _lock:
+        entry = _sessions.get(session_id)
+        if entry is None:
+            entry = _sessions[session_id] = {'measured_at': None, 'usage': {}, 'buffer': None}
+        entry['last_seen'] = now
+        entry['page'] = session_state.get('page')
+        if isinstance(buffer, RealtimeBuffer):
+            entry['buffer'] = weakref.ref(buffer)
+        measure = entry['measured_at'] is None or now - entry['measured_at'] >= ACCOUNT_EVERY
+        if measure:
+            entry['measured_at'] = now
+
+    if measure:
+        usage = session_usage(session_state)
+        with _lock:
+            entry['usage'] = usage
+
+    if now - _last_sweep[0] >= EVICT_EVERY:
+        evict_idle(now)
+
+
+def evict_idle(now=None, idle_seconds=None):
+    """Clear the realtime buffers of idle sessions and forget closed ones; returns buffers cleared"""
+    now = time.monotonic() if now is None else now
+    idle_seconds = IDLE_SECONDS if idle_seconds is None else idle_seconds
+    cleared = 0
+    with _lock:
+        _last_sweep[0] = now
+        for session_id, entry in list(_sessions.items()):
+            buffer = entry['buffer']() if entry['buffer'] is not None else None
+            if (entry['buffer'] is not None and buffer is None) or _session_closed(session_id):
+                del _sessions[session_id]  # session closed (its buffer, if any, collected)
+                continue
+            if buffer is not None and len(buffer) and now - entry['last_seen'] > idle_seconds:
+                buffer.clear()
+                buffer.evictions += 1
+                entry['usage'].pop('realtime_data', None)
+                cleared += 1
+    return cleared
+
+
+def top_consumers(limit=10):
+    """Sessions ordered by measured session-state size"""
+    now = time.monotonic()
+    with _lock:
+        rows = []
+        for session_id, entry in _sessions.items():
+            buffer = entry['buffer']() if entry['buffer'] is not None else None
+            usage = entry['usage']
+            rows.append({
+                'session': session_id[:8],
+                'page': entry['page'],
+                'idle_s': round(now - entry['last_seen'], 1),
+                'bytes': sum(usage.values()),
+                'realtime_points': len(buffer) if buffer is not None else 0,
+                'buffer_evictions': buffer.evictions if buffer is not None else 0,
+                'largest_keys': ', '.join(f"{key} ({size / 1024:.0f} KB)" for key, size in list(usage.items())[:3])
+            })
+    rows.sort(key=lambda row: row['bytes'], reverse=True)
+    return rows[:limit]
+
+
+def totals():
+    with _lock:
+        return {
+            'sessions': len(_sessions),
+            'bytes': sum(sum(entry['usage'].values()) for entry in _sessions.values()),
+            'window_seconds': WINDOW_SECONDS,
+            'max_points': MAX_POINTS,
+            'idle_seconds': IDLE_SECONDS
+        }
@@ -0,0 +1,254 @@
+"""Shared-memory realtime store for running several app processes
+
+Streamlit serves every session of an app from one process, so one process
+is one core. To run several app processes (each started with ``serve.py`` on
+its own port, behind a local balancer) they must all show the same live
+data. With ``SMARTCITY_SHARED_DIR`` set, the realtime readings and the
+per-sensor rollup feed live in memory-mapped ring files in that directory
+instead of in per-process objects:
+
+* one process wins an exclusive ``flock`` on ``writer.lock`` and becomes the
+  single writer: its feed thread generates the readings and appends them to
+  the rings. The lock is released by the kernel when the process exits, and
+  the other processes retry it periodically, so a new writer takes over;
+* every process, the writer included, is a reader. Rings are mapped with
+  ``MAP_SHARED``, so all processes read the same page-cache pages without a
+  copy of the store each; a read copies only the rows it returns.
+
+Each ring is a fixed array of records plus a small header holding the total
+number of records ever written (``head``) and a sequence counter. The writer
+makes the counter odd while it writes and even again when done (a seqlock),
+and readers retry any read that overlapped a write, so a reader never sees a
+half-written batch and never blocks the writer. A writer that dies mid-write
+leaves the counter odd; readers stop waiting for it after
+``STALE_WRITE_SECONDS`` and the next writer rounds it up to even.
+
+Without ``SMARTCITY_SHARED_DIR`` nothing here is used and each process keeps
+its own state as before. With it, the role is decided by the directory
+alone: a process that has not opened the store yet is a reader, never a
+stand-alone process.
+"""
+import fcntl
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = os.environ.get('SMARTCITY_SHARED_DIR')
+
+# How often a reader process retries the writer lock
+ELECT_EVERY = 5.0
+# A write still in progress after this long was left by a writer that died mid-batch
+STALE_WRITE_SECONDS = 1.0
+
+# Ring header: uint64 words
+MAGIC = 0x534D435452494E47  # 'SMCTRING'
+_MAGIC, _ITEMSIZE, _CAPACITY, _SEQ, _HEAD = range(5)
+HEADER_BYTES = 64
+
+_lock = threading.Lock()
+_store = None
+
+
+class SharedRing:
+    """Fixed-capacity ring of structured records in a memory-mapped file
+
+    Only the process holding the writer lock may call ``append``; any
+    number of processes may read.
+    """
+
+    def __init__(self, path, dtype, capacity):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)
+        size = HEADER_BYTES + self.capacity * self.dtype.itemsize
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)  # serialise first-time initialisation
+            fresh = os.fstat(fd).st_size != size
+            if fresh:
+                os.ftruncate(fd, size)
+            self._header = np.memmap(path, dtype='uint64', mode='r+', shape=(HEADER_BYTES // 8,))
+            self._records = np.memmap(path, dtype=self.dtype, mode='r+', offset=HEADER_BYTES,
+                                      shape=(self.capacity,))
+            if fresh or self._header[_MAGIC] != MAGIC:
+                self._header[:] = 0
+                self._header[_ITEMSIZE] = self.dtype.itemsize
+                self._header[_CAPACITY] = self.capacity
+                self._header[_MAGIC] = MAGIC
+                self._header.flush()
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    @property
+    def head(self):
+        """Number of records written since the ring was created"""
+        return int(self._header[_HEAD])
+
+    def append(self, rows):
+        """Write a batch of records (writer only)"""
+        rows = np.asarray(rows, dtype=self.dtype)[-self.capacity:]
+        head = self.head
+        positions = (head + np.arange(len(rows))) % self.capacity
+        self._header[_SEQ] += 1  # odd: write in progress
+        self._records[positions] = rows
+        self._header[_HEAD] = head + len(rows)
+        self._header[_SEQ] += 1
+
+    def recover(self):
+        """Close a write left open by a writer that died mid-batch (new writer only)
+
+        Rounds the sequence counter up to even, so readers stop waiting for it
+        and the parity of later writes is right again.
+        """
+        if int(self._header[_SEQ]) & 1:
+            logger.warning("Ring %s: closing a write interrupted by the previous writer", self.path)
+            self._header[_SEQ] += 1
+
+    def _consistent(self, read):
+        """Run `read()` until it did not overlap a write
+
+        A write that stays open for STALE_WRITE_SECONDS is taken as abandoned
+        (until the next writer calls ``recover``) and read through, rather
+        than blocking every reader.
+        """
+        stale_since = None
+        while True:
+            seq = int(self._header[_SEQ])
+            if seq & 1:
+                now = time.monotonic()
+                if stale_since is None or stale_since[0] != seq:
+                    stale_since = (seq, now)
+                if now - stale_since[1] < STALE_WRITE_SECONDS:
+                    time.sleep(0)
+                    continue
+            result = read()
+            if int(self._header[_SEQ]) == seq:
+                return result
+
+    def read_since(self, cursor):
+        """(records written after position `cursor`, new cursor, records lost to overwriting)"""
+        def read():
+            head = self.head
+            start = max(cursor, head - self.capacity)
+            rows = self._records[np.arange(start, head) % self.capacity]
+            return np.array(rows), head, start - cursor
+        return self._consistent(read)
+
+    def latest(self, since=None, field='timestamp'):
+        """Records still in the ring, oldest first, optionally only those with `field` >= `since`"""
+        rows, _, _ = self.read_since(0)
+        if since is not None:
+            rows = rows[rows[field] >= since]
+        return rows
+
+
+class SharedStore:
+    """The rings of one shared directory plus this process's writer role"""
+
+    def __init__(self, directory, rings):
+        """`rings`: {name: (dtype, capacity)}"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rings = {
+            name: SharedRing(os.path.join(directory, f'{name}-{np.dtype(dtype).itemsize}x{capacity}.ring'),
+                             dtype, capacity)
+            for name, (dtype, capacity) in rings.items()
+        }
+        self.is_writer = False
+        self._lock_fd = None
+        self._thread = None
+
+    def __getitem__(self, name):
+        return self.rings[name]
+
+    def try_become_writer(self):
+        """Take the writer lock if no other process holds it"""
+        if self.is_writer:
+            return True
+        fd = os.open(os.path.join(self.directory, 'writer.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        # The previous writer may have died between the two sequence increments of a write
+        for ring in self.rings.values():
+            ring.recover()
+        self._lock_fd = fd
+        self.is_writer = True
+        return True
+
+    def start_feed(self, feeds):
+        """Start the election/feed thread once per process
+
+        `feeds`: list of (ring name, interval seconds, produce(now) -> records).
+        Until this process holds the writer lock the thread only retries the
+        lock; afterwards it appends each feed's records every interval.
+        """
+        with _lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(feeds,),
+                                                name='shared-store-feed', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def _run(self, feeds):
+        while not self.try_become_writer():
+            time.sleep(ELECT_EVERY)
+        logger.info("Process %s is the shared store writer", os.getpid())
+
+        due = [0.0] * len(feeds)
+        while True:
+            now = time.time()
+            for i, (ring, interval, produce) in enumerate(feeds):
+                if now >= due[i]:
+                    try:
+                        self.rings[ring].append(produce(now))
+                    except Exception:
+                        logger.exception("Shared store feed %s failed", ring)
+                    due[i] = now + interval
+            time.sleep(max(0.05, min(due) - time.time()))
+
+    def status(self):
+        return {
+            'directory': self.directory,
+            'role': 'writer' if self.is_writer else 'reader',
+            'pid': os.getpid(),
+            'rings': {name: {'head': ring.head, 'capacity': ring.capacity} for name, ring in self.rings.items()}
+        }
+
+
+def open_store(rings):
+    """The process-wide store for SMARTCITY_SHARED_DIR (None when shared mode is off)"""
+    global _store
+    if SHARED_DIR is None:
+        return None
+    with _lock:
+        if _store is None:
+            _store = SharedStore(SHARED_DIR, rings)
+    return _store
+
+
+def get():
+    """The store if it has been opened in this process"""
+    return _store
+
+
+def is_writer():
+    """Whether this process writes the shared files under DATA_DIR (the shared store writer, or the only process)
+
+    In shared mode a process is not the writer until it has opened the store
+    and won the election, however early it asks.
+    """
+    if SHARED_DIR is None:
+        return True
+    return _store is not None and _store.is_writer
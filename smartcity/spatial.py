@@ -0,0 +1,212 @@
+"""Interpolated AQI/traffic surfaces from sensor points
+
+Sensor positions go into a KD-tree (``scipy.spatial.cKDTree``) once. A
+surface is the inverse-distance-weighted (IDW) estimate of a metric at the
+cells of a grid over the map viewport, using each cell's ``k`` nearest
+sensors. The tree query and the weighting run on blocks of
+``CHUNK_CELLS`` cells, so memory stays bounded on large grids.
+
+The grid resolution follows the map zoom: one cell per ``CELL_PX`` screen
+pixels, capped at ``MAX_CELLS`` per side. The cost of a surface therefore
+depends on the viewport, not on the number of sensors (each cell is one
+O(log n) tree query). Cell rows are spaced evenly in Web Mercator, so the
+image lines up with the Leaflet basemap when overlaid.
+
+The same tree answers point queries (k nearest sensors to a map click). It
+is updated incrementally: sensors added after construction go to a small
+pending array that is searched by brute force alongside the tree, and the
+tree is rebuilt only once the pending array exceeds ``REBUILD_FRACTION`` of
+the indexed sensors.
+
+Distances use degrees with longitude scaled by cos(latitude), which is
+accurate enough at city/state scale and keeps the tree two-dimensional.
+"""
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+CELL_PX = 4
+MAX_CELLS = 320
+CHUNK_CELLS = 65536
+TILE_PX = 256
+# Viewports are widened to multiples of this many cells so that small pans hit the same cached surface
+BLOCK_CELLS = 32
+
+# Cells farther than this from every sensor are left transparent (degrees)
+MAX_DISTANCE_DEG = 1.0
+KM_PER_DEG = 111.32
+
+# Pending (unindexed) sensors allowed before the tree is rebuilt, as a fraction of the indexed ones
+REBUILD_FRACTION = 0.1
+REBUILD_MIN = 64
+
+# AQI category colours (as on the Dashboard) and a traffic ramp (as the density heatmap)
+COLORMAPS = {
+    'aqi': ([0, 50, 100, 150, 200, 300], ['#00e400', '#ffff00', '#ff7e00', '#ff0000', '#8f3f97', '#7e0023']),
+    'traffic_density': ([0, 30, 50, 70, 85, 100], ['#0000ff', '#00ff00', '#ffff00', '#ffa500', '#ff0000', '#8b0000'])
+}
+
+
+def _project(lat, lon, lat0):
+    return np.column_stack([np.asarray(lat, dtype='float64'),
+                            np.asarray(lon, dtype='float64') * np.cos(np.radians(lat0))])
+
+
+class SensorTree:
+    """KD-tree over sensor coordinates with incremental additions
+
+    Sensor indices are positions in insertion order: the constructor's
+    sensors are 0..n-1 and each ``add`` continues the numbering.
+    """
+
+    def __init__(self, lat, lon):
+        self.lat0 = float(np.mean(lat)) if len(lat) else 0.0
+        self._lock = threading.Lock()
+        points = _project(lat, lon, self.lat0)
+        # (tree over the first `indexed` points, pending points after them); replaced as a whole
+        self._state = (cKDTree(points), np.empty((0, 2)))
+        self.rebuilds = 0
+
+    def __len__(self):
+        tree, pending = self._state
+        return tree.n + len(pending)
+
+    def add(self, lat, lon):
+        """Index more sensors; returns their indices"""
+        points = _project(lat, lon, self.lat0)
+        with self._lock:
+            tree, pending = self._state
+            first = tree.n + len(pending)
+            pending = np.concatenate([pending, points])
+            if len(pending) > max(REBUILD_MIN, REBUILD_FRACTION * tree.n):
+                tree, pending = cKDTree(np.concatenate([tree.data, pending])), np.empty((0, 2))
+                self.rebuilds += 1
+            self._state = (tree, pending)
+        return np.arange(first, first + len(points))
+
+    def sync(self, lat, lon):
+        """Add any sensors of the full `lat`/`lon` arrays beyond those already indexed"""
+        known = len(self)
+        if len(lat) > known:
+            self.add(lat[known:], lon[known:])
+
+    def query(self, lat, lon, k):
+        """(distances, sensor indices) of the `k` nearest sensors to each point, shape (n, k)"""
+        tree, pending = self._state
+        k = min(k, tree.n + len(pending))
+        points = _project(lat, lon, self.lat0)
+        dist, idx = tree.query(points, k=k, workers=-1)
+        dist, idx = dist.reshape(len(points), k), idx.reshape(len(points), k)
+        if len(pending):
+            pending_dist = np.sqrt(((points[:, None, :] - pending[None, :, :]) ** 2).sum(axis=2))
+            dist = np.concatenate([dist, pending_dist], axis=1)
+            idx = np.concatenate([idx, np.broadcast_to(tree.n + np.arange(len(pending)), pending_dist.shape)], axis=1)
+            order = np.argsort(dist, axis=1)[:, :k]
+            dist, idx = np.take_along_axis(dist, order, 1), np.take_along_axis(idx, order, 1)
+        return dist, idx
+
+
+def idw_estimate(dist, neighbour_values, power=2.0, max_distance=MAX_DISTANCE_DEG):
+    """IDW estimates from (n, k) neighbour distances and values; NaN beyond `max_distance`"""
+    valid = ~np.isnan(neighbour_values)
+    with np.errstate(divide='ignore'):
+        weights = np.where(valid, 1.0 / np.maximum(dist, 1e-9) ** power, 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        estimate = (weights * np.where(valid, neighbour_values, 0.0)).sum(axis=1) / total
+    estimate[(dist[:, 0] > max_distance) | (total == 0)] = np.nan
+    return estimate
+
+
+def idw(tree, values, lat, lon, k=8, power=2.0, max_distance=MAX_DISTANCE_DEG):
+    """IDW estimate of `values` (one per sensor) at the given points"""
+    values = np.asarray(values, dtype='float64')
+    lat, lon = np.asarray(lat, dtype='float64'), np.asarray(lon, dtype='float64')
+    out = np.full(len(lat), np.nan)
+    for start in range(0, len(lat), CHUNK_CELLS):
+        stop = start + CHUNK_CELLS
+        dist, idx = tree.query(lat[start:stop], lon[start:stop], k)
+        out[start:stop] = idw_estimate(dist, values[idx], power, max_distance)
+    return out
+
+
+def _mercator_y(lat):
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def _mercator_lat(y):
+    return np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+
+
+def _cell_size(cells):
+    zoom, scale = cells[:2]
+    # Degrees of longitude and Mercator units per cell
+    return (360.0 / (TILE_PX * 2 ** zoom) * CELL_PX * scale,
+            2 * np.pi / (TILE_PX * 2 ** zoom) * CELL_PX * scale)
+
+
+def view_bounds(center, zoom, width_px, height_px):
+    """((south, west), (north, east)) shown by a map of the given pixel size at `center` and `zoom`"""
+    lat, lon = center
+    half_lon = width_px / 2 * 360.0 / (TILE_PX * 2 ** zoom)
+    half_y = height_px / 2 * 2 * np.pi / (TILE_PX * 2 ** zoom)
+    y = _mercator_y(lat)
+    return ((float(_mercator_lat(y - half_y)), lon - half_lon), (float(_mercator_lat(y + half_y)), lon + half_lon))
+
+
+def view_cells(bounds, zoom, max_cells=MAX_CELLS):
+    """Snap a ((south, west), (north, east)) viewport at `zoom` outwards to whole grid cells
+
+    Returns the hashable cell range (zoom, scale, col0, col1, row0, row1)
+    used as the surface cache key. The range is widened to whole blocks of
+    BLOCK_CELLS, so small pans reuse cached surfaces. When zoomed far out,
+    cells are coarsened by a power of two to stay within `max_cells` per
+    side.
+    """
+    (south, west), (north, east) = bounds
+    south, north = max(south, -85.0), min(north, 85.0)
+    zoom = int(zoom)
+    cell_lon, cell_y = _cell_size((zoom, 1))
+    span = max((east - west) / cell_lon, (_mercator_y(north) - _mercator_y(south)) / cell_y) + 2 * BLOCK_CELLS
+    scale = 2 ** max(0, int(np.ceil(np.log2(max(span, 1) / max_cells))))
+    cell_lon, cell_y = _cell_size((zoom, scale))
+
+    def block(value, size, round_up):
+        cells = np.ceil(value / size) if round_up else np.floor(value / size)
+        rounded = np.ceil(cells / BLOCK_CELLS) if round_up else np.floor(cells / BLOCK_CELLS)
+        return int(rounded) * BLOCK_CELLS
+
+    return (zoom, scale,
+            block(west, cell_lon, False), block(east, cell_lon, True),
+            block(_mercator_y(south), cell_y, False), block(_mercator_y(north), cell_y, True))
+
+
+def cell_grid(cells):
+    """Cell-centre latitudes (north to south, as image rows) and longitudes, and the grid's bounds"""
+    _, _, col0, col1, row0, row1 = cells
+    cell_lon, cell_y = _cell_size(cells)
+    lons = (col0 + np.arange(max(col1 - col0, 1)) + 0.5) * cell_lon
+    lats = _mercator_lat((row1 - np.arange(max(row1 - row0, 1)) - 0.5) * cell_y)
+    bounds = [[float(_mercator_lat(row0 * cell_y)), col0 * cell_lon],
+              [float(_mercator_lat(row1 * cell_y)), col1 * cell_lon]]
+    return lats, lons, bounds
+
+
+def surface(tree, values, lats, lons, k=8, power=2.0):
+    """IDW grid of shape (len(lats), len(lons))"""
+    grid_lat = np.repeat(lats, len(lons))
+    grid_lon = np.tile(lons, len(lats))
+    return idw(tree, values, grid_lat, grid_lon, k, power).reshape(len(lats), len(lons))
+
+
+def colorize(grid, metric, opacity=0.6):
+    """RGBA uint8 image of a surface using the metric's colour stops (NaN cells transparent)"""
+    stops, colors = COLORMAPS[metric]
+    rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype='float64')
+    flat = np.nan_to_num(grid, nan=stops[0]).ravel()
+    image = np.empty((flat.size, 4), dtype='uint8')
+    for channel in range(3):
+        image[:, channel] = np.interp(flat, stops, rgb[:, channel]).round()
+    image[:, 3] = np.where(np.isnan(grid.ravel()), 0, int(255 * opacity))
+    return image.reshape(grid.shape + (4,))
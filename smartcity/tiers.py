@@ -0,0 +1,331 @@
+"""Tiered retention of raw sensor readings: hot RAM, warm mapped segments, cold Parquet
+
+* hot: the last hours, in RAM as compressed chunks (smartcity.hotstore).
+* warm: the last days, as append-only segment files of raw records, one per
+  ``segment_seconds`` of event time. Readings are appended to the segment's
+  ``.open`` file as they are released. Once a segment can no longer receive
+  late readings, the maintenance pass sorts it by (sensor, time) into its
+  sealed file. Segments are read through ``np.memmap``: the kernel pages
+  them in on demand, and one sensor's readings in a sealed segment are a
+  contiguous slice of the mapping, so nothing is copied until rows from
+  several pieces are combined.
+* cold: anything older is compacted into one Parquet file per day, sorted
+  by (sensor, time) in row groups, so a read for a few sensors and hours
+  only decodes the row groups whose statistics match.
+
+``TieredReadings.read(start, end, keys)`` serves any range from the tiers
+that hold it. The hot tier answers from the time it has been complete, the
+warm tier from its oldest segment up to that point, and the cold tier
+before that, so no reading is returned twice.
+
+Only one process writes the warm and cold tiers (see ``append``'s
+`persist`). Any process may read them.
+"""
+import os
+import threading
+
+import numpy as np
+
+NS = 1_000_000_000
+DAY_NS = 86400 * NS
+_MIN_TS = -2 ** 63
+_MAX_TS = 2 ** 63 - 1
+
+
+def _select(rows, key_field, keys, start_ns, end_ns, sorted_by_key=False):
+    """Rows of `keys` (all when None) with start_ns <= timestamp <= end_ns"""
+    if keys is not None and sorted_by_key:
+        pieces = []
+        for key in keys:
+            lo, hi = np.searchsorted(rows[key_field], [key, key + 1])
+            part = rows[lo:hi]
+            lo = np.searchsorted(part['timestamp'], start_ns, side='left')
+            hi = np.searchsorted(part['timestamp'], end_ns, side='right')
+            pieces.append(part[lo:hi])
+        return pieces
+    mask = (rows['timestamp'] >= start_ns) & (rows['timestamp'] <= end_ns)
+    if keys is not None:
+        mask &= np.isin(rows[key_field], keys)
+    return [rows[mask]]
+
+
+class WarmSegments:
+    """Append-only segment files of raw records, read through memory maps"""
+
+    def __init__(self, directory, dtype, key_field, segment_seconds=3600):
+        self.dtype = np.dtype(dtype)
+        self.key_field = key_field
+        self.segment_ns = int(segment_seconds * NS)
+        # Files of another record layout must not be mapped with this one
+        self.directory = os.path.join(directory, f'{key_field}-{self.dtype.itemsize}')
+        os.makedirs(self.directory, exist_ok=True)
+        self._checked = set()  # open files whose length was checked by this process
+        # Newest timestamp written before this process's first append (see append)
+        self._resume_after = None
+        self._lock = threading.Lock()
+
+    def _path(self, index, sealed):
+        return os.path.join(self.directory, f'{index}.seg' if sealed else f'{index}.open.seg')
+
+    def indices(self):
+        """Segment numbers present (open or sealed), oldest first"""
+        found = set()
+        for name in os.listdir(self.directory):
+            if name.endswith('.seg'):
+                found.add(int(name.split('.')[0]))
+        return sorted(found)
+
+    def newest(self):
+        """Newest timestamp in the segment files (None when there are none)"""
+        for index in reversed(self.indices()):
+            stamps = [part['timestamp'].max() for part in (self._map(self._path(index, True)),
+                                                           self._map(self._path(index, False))) if len(part)]
+            if stamps:
+                return int(max(stamps))
+        return None
+
+    def append(self, rows):
+        """Append rows to their open segments
+
+        Rows at or before the newest reading already on disk when this
+        process first appends are skipped: a restarted feed regenerates its
+        backfill window, and the previous writer already persisted those
+        timestamps.
+        """
+        with self._lock:
+            if self._resume_after is None:
+                newest = self.newest()
+                self._resume_after = _MIN_TS if newest is None else newest
+            rows = rows[rows['timestamp'] > self._resume_after]
+            segments = rows['timestamp'] // self.segment_ns
+            for index in np.unique(segments).tolist():
+                path = self._path(index, sealed=False)
+                if path not in self._checked:
+                    # Drop a record torn by a crash mid-write, so later appends stay aligned
+                    size = os.path.getsize(path) if os.path.exists(path) else 0
+                    if size % self.dtype.itemsize:
+                        os.truncate(path, size - size % self.dtype.itemsize)
+                    self._checked.add(path)
+                with open(path, 'ab') as f:
+                    f.write(np.ascontiguousarray(rows[segments == index]).tobytes())
+
+    def _map(self, path):
+        try:
+            count = os.path.getsize(path) // self.dtype.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode='r', shape=(count,))
+
+    def read(self, start_ns, end_ns, keys=None):
+        """Pieces (arrays, mostly views of the mappings) holding the matching rows"""
+        first, last = start_ns // self.segment_ns, end_ns // self.segment_ns
+        pieces = []
+        for index in self.indices():
+            if first <= index <= last:
+                pieces += _select(self._map(self._path(index, True)), self.key_field, keys, start_ns, end_ns,
+                                  sorted_by_key=True)
+                pieces += _select(self._map(self._path(index, False)), self.key_field, keys, start_ns, end_ns)
+        return pieces
+
+    def take(self, index):
+        """All rows of one segment (sealed and open), sorted by (key, time)"""
+        rows = np.concatenate([np.array(self._map(self._path(index, True))),
+                               np.array(self._map(self._path(index, False)))])
+        return rows[np.lexsort((rows['timestamp'], rows[self.key_field]))]
+
+    def seal(self, before_ns):
+        """Sort open segments that end before `before_ns` into their sealed files; returns how many"""
+        sealed = 0
+        for index in self.indices():
+            if (index + 1) * self.segment_ns > before_ns:
+                break
+            open_path = self._path(index, sealed=False)
+            if not os.path.exists(open_path):
+                continue
+            with self._lock:
+                rows = self.take(index)
+                tmp = f'{self._path(index, True)}.tmp'
+                rows.tofile(tmp)
+                os.replace(tmp, self._path(index, True))
+                os.remove(open_path)
+                self._checked.discard(open_path)
+            sealed += 1
+        return sealed
+
+    def drop(self, index):
+        with self._lock:
+            for sealed in (True, False):
+                if os.path.exists(self._path(index, sealed)):
+                    os.remove(self._path(index, sealed))
+
+    def status(self):
+        indices = self.indices()
+        sizes = [os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory)
+                 if name.endswith('.seg')]
+        return {'segments': len(indices),
+                'open': sum(os.path.exists(self._path(i, False)) for i in indices),
+                'bytes': sum(sizes),
+                'readings': sum(sizes) // self.dtype.itemsize}
+
+
+class ColdParquet:
+    """One Parquet file per day, rows sorted by (key, time)"""
+
+    def __init__(self, directory, dtype, key_field, row_group_rows=65536):
+        self.dtype = np.dtype(dtype)
+        self.key_field = key_field
+        self.directory = directory
+        self.row_group_rows = row_group_rows
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, day):
+        return os.path.join(self.directory, f'{day}.parquet')
+
+    def days(self):
+        return sorted(int(name.split('.')[0]) for name in os.listdir(self.directory) if name.endswith('.parquet'))
+
+    def _to_table(self, rows):
+        import pyarrow as pa
+        return pa.table({name: rows[name] for name in self.dtype.names})
+
+    def _to_rows(self, table):
+        rows = np.empty(table.num_rows, dtype=self.dtype)
+        for name in self.dtype.names:
+            rows[name] = table.column(name).to_numpy()
+        return rows
+
+    def write(self, day, rows):
+        """Merge `rows` into the day's file (rewritten atomically); repeated readings are kept once"""
+        import pyarrow.parquet as pq
+
+        path = self._path(day)
+        if os.path.exists(path):
+            rows = np.concatenate([self._to_rows(pq.read_table(path)), rows])
+        # A crash between writing a day and dropping its segments compacts those rows again
+        rows = rows[np.lexsort((rows['timestamp'], rows[self.key_field]))]
+        repeat = (rows[self.key_field][1:] == rows[self.key_field][:-1]) & (rows['timestamp'][1:] == rows['timestamp'][:-1])
+        rows = rows[np.concatenate([[True], ~repeat])] if len(rows) else rows
+        tmp = f'{path}.tmp'
+        pq.write_table(self._to_table(rows), tmp, row_group_size=self.row_group_rows, compression='zstd')
+        os.replace(tmp, path)
+
+    def read(self, start_ns, end_ns, keys=None):
+        import pyarrow.parquet as pq
+
+        filters = [('timestamp', '>=', start_ns), ('timestamp', '<=', end_ns)]
+        if keys is not None:
+            filters.append((self.key_field, 'in', [int(k) for k in keys]))
+        pieces = []
+        for day in self.days():
+            if start_ns // DAY_NS <= day <= end_ns // DAY_NS:
+                pieces.append(self._to_rows(pq.read_table(self._path(day), filters=filters)))
+        return pieces
+
+    def expire(self, before_ns):
+        """Delete days that end before `before_ns`"""
+        dropped = 0
+        for day in self.days():
+            if (day + 1) * DAY_NS <= before_ns:
+                os.remove(self._path(day))
+                dropped += 1
+        return dropped
+
+    def status(self):
+        days = self.days()
+        return {'days': len(days), 'bytes': sum(os.path.getsize(self._path(d)) for d in days)}
+
+
+class TieredReadings:
+    """One read API over the hot, warm and cold tiers, plus the maintenance that moves data down"""
+
+    def __init__(self, hot, warm, cold, warm_seconds, seal_after_seconds, cold_seconds=None):
+        self.hot = hot
+        self.warm = warm
+        self.cold = cold
+        self.warm_ns = int(warm_seconds * NS)
+        self.seal_after_ns = int(seal_after_seconds * NS)
+        self.cold_ns = None if cold_seconds is None else int(cold_seconds * NS)
+        self.newest = None
+        self._maintain_lock = threading.Lock()
+        self.last_maintenance = {}
+
+    def append(self, rows, persist=True):
+        """Add released readings to the hot tier and, with `persist`, to the warm tier"""
+        if not len(rows):
+            return
+        self.hot.append(rows)
+        if persist:
+            self.warm.append(rows)
+        newest = int(rows['timestamp'].max())
+        self.newest = newest if self.newest is None else max(self.newest, newest)
+
+    def read(self, start_ns=None, end_ns=None, keys=None):
+        """Readings of `keys` (all when None) in [start_ns, end_ns], time-ordered -> (rows, rows per tier)"""
+        start_ns = _MIN_TS if start_ns is None else int(start_ns)
+        end_ns = _MAX_TS if end_ns is None else int(end_ns)
+        hot_from = self.hot.covered_from()
+        indices = self.warm.indices()
+        warm_from = indices[0] * self.warm.segment_ns if indices else None
+        warm_until = end_ns if hot_from is None else min(end_ns, hot_from - 1)
+        cold_until = min(warm_until, warm_from - 1) if warm_from is not None else warm_until
+
+        served = {}
+        pieces = []
+        if hot_from is not None and end_ns >= hot_from:
+            hot_keys = keys if keys is not None else self.hot.keys()
+            part = [self.hot.readings(key, max(start_ns, hot_from), end_ns) for key in hot_keys]
+            served['hot'] = sum(len(p) for p in part)
+            pieces += part
+        if warm_from is not None and warm_until >= max(start_ns, warm_from):
+            part = self.warm.read(max(start_ns, warm_from), warm_until, keys)
+            served['warm'] = sum(len(p) for p in part)
+            pieces += part
+        if cold_until >= start_ns:
+            part = self.cold.read(start_ns, cold_until, keys)
+            served['cold'] = sum(len(p) for p in part)
+            pieces += part
+        pieces = [p for p in pieces if len(p)]
+        if not pieces:
+            return np.empty(0, dtype=self.warm.dtype), served
+        rows = np.concatenate(pieces)
+        return rows[np.argsort(rows['timestamp'], kind='stable')], served
+
+    def covered_from(self):
+        """Timestamp of the oldest reading any tier can serve (None when all are empty)"""
+        candidates = []
+        days = self.cold.days()
+        if days:
+            candidates.append(days[0] * DAY_NS)
+        indices = self.warm.indices()
+        if indices:
+            candidates.append(indices[0] * self.warm.segment_ns)
+        if self.hot.covered_from() is not None:
+            candidates.append(self.hot.covered_from())
+        return min(candidates) if candidates else None
+
+    def maintain(self, now_ns=None):
+        """Seal settled warm segments, compact old ones to Parquet and expire old days"""
+        now_ns = self.newest if now_ns is None else now_ns
+        if now_ns is None:
+            return {}
+        with self._maintain_lock:
+            sealed = self.warm.seal(now_ns - self.seal_after_ns)
+            compacted = 0
+            by_day = {}
+            for index in self.warm.indices():
+                if (index + 1) * self.warm.segment_ns <= now_ns - self.warm_ns:
+                    by_day.setdefault(index * self.warm.segment_ns // DAY_NS, []).append(index)
+            for day, indices in by_day.items():
+                self.cold.write(day, np.concatenate([self.warm.take(i) for i in indices]))
+                for index in indices:
+                    self.warm.drop(index)
+                compacted += len(indices)
+            expired = self.cold.expire(now_ns - self.cold_ns) if self.cold_ns is not None else 0
+            self.last_maintenance = {'sealed': sealed, 'compacted_segments': compacted, 'expired_days': expired}
+        return self.last_maintenance
+
+    def status(self):
+        return {'hot': self.hot.status(), 'warm': self.warm.status(), 'cold': self.cold.status(),
+                'last_maintenance': self.last_maintenance}
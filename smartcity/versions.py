@@ -0,0 +1,52 @@
+"""Data versions of the source datasets
+
+Every source dataset has a version token. Anything derived from a dataset
+(figures, aggregates, geometries) keys its cache on the versions it was built
+from, so a new version makes the stale entries unreachable.
+
+Versions are either bumped explicitly when new data lands (``bump``) or read
+from a registered source such as a file's modification time (``watch_file``)
+or a fixed refresh period (``every``).
+"""
+import os
+import threading
+import time
+
+_versions = {}
+_sources = {}
+_lock = threading.Lock()
+
+
+def current(*datasets):
+    """Version tuple of the given datasets, e.g. current('static_data') -> (0,)"""
+    return tuple(
+        (_versions.get(name, 0), _sources[name]()) if name in _sources else _versions.get(name, 0)
+        for name in datasets
+    )
+
+
+def bump(dataset):
+    """Record that a new version of `dataset` has landed"""
+    with _lock:
+        _versions[dataset] = _versions.get(dataset, 0) + 1
+        return _versions[dataset]
+
+
+def watch_file(dataset, path):
+    """Version `dataset` by the modification time of the file it is loaded from"""
+    def mtime():
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    _sources[dataset] = mtime
+
+
+def every(dataset, seconds):
+    """Give `dataset` a new version every `seconds` (data that is produced on a schedule)"""
+    _sources[dataset] = lambda: int(time.time() // seconds)
+
+
+def snapshot():
+    """Current version of every known dataset"""
+    return {name: current(name)[0] for name in set(_versions) | set(_sources)}
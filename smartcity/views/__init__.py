@@ -0,0 +1,71 @@
+"""Page registry
+
+Each page lives in its own module with a ``render()`` function. Modules are
+imported only when their page is first selected, so the plotting and geo
+stacks a page needs (plotly.express, folium, geopandas, ...) are not paid for
+by sessions that never open it.
+"""
+import importlib
+import sys
+import threading
+import time
+
+from smartcity import diagnostics
+
+# (page name, sidebar icon, module under smartcity.views)
+PAGES = [
+    ('Dashboard', '', 'dashboard'),
+    ('Traffic Heatmap', '', 'traffic_heatmap'),
+    ('AQI Choropleth', '', 'aqi_choropleth'),
+    ('Sensor Clusters', '', 'sensor_clusters'),
+    ('Time Trends', '', 'time_trends'),
+    ('Pollution Matrix', '', 'pollution_matrix'),
+    ('Distribution Analysis', '', 'distribution_analysis'),
+    ('Correlation Study', '', 'correlation_study'),
+    ('Dot Map', '', 'dot_map'),
+    # ('Hexagonal Binning', '', 'hexagonal_binning'),
+    ('Network Graph', '', 'network_graph'),
+    ('Text Analysis', '', 'text_analysis'),
+    ('Scenario Simulator', '', 'scenario_simulator'),
+    ('SQL Query', '', 'sql_query')
+]
+
+# Pages reachable only by URL (?page=Diagnostics, ?page=Jobs), not listed in the sidebar
+HIDDEN_PAGES = [
+    ('Diagnostics', '', 'diagnostics_page'),
+    ('Jobs', '', 'jobs_page')
+]
+
+PAGE_MODULES = {name: module for name, _, module in PAGES + HIDDEN_PAGES}
+
+# Import cost of each page, measured the first time this process loads it
+IMPORT_COSTS = {}
+_import_lock = threading.Lock()
+
+
+def load_page(name):
+    """Import a page module on first use and record what the import cost"""
+    module_name = f"{__name__}.{PAGE_MODULES[name]}"
+    # Only trust sys.modules once the import has finished: another session's
+    # thread may be halfway through executing the module
+    if name in IMPORT_COSTS:
+        return sys.modules[module_name]
+
+    with _import_lock:
+        if name in IMPORT_COSTS:
+            return sys.modules[module_name]
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        IMPORT_COSTS[name] = {
+            'seconds': time.perf_counter() - started,
+            'new_modules': len(sys.modules) - modules_before
+        }
+    return module
+
+
+def render_page(name):
+    """Render the selected page"""
+    module = load_page(name)
+    with diagnostics.span(name, 'total'):
+        module.render()
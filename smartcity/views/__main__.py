@@ -0,0 +1,53 @@
+"""Import-time report: cold import cost of every page in a fresh interpreter
+
+Usage: python -m smartcity.views [--repeat N]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from smartcity.views import PAGES
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import smartcity.data
+shared = time.perf_counter() - started
+modules_before = len(sys.modules)
+started = time.perf_counter()
+import smartcity.views.{module}
+page = time.perf_counter() - started
+print(json.dumps({{'shared': shared, 'page': page, 'new_modules': len(sys.modules) - modules_before}}))
+"""
+
+
+def measure(module, repeat):
+    """Import one page module in `repeat` fresh interpreters"""
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'shared_ms': statistics.median(s['shared'] for s in samples) * 1000,
+        'page_ms': statistics.median(s['page'] for s in samples) * 1000,
+        'new_modules': samples[0]['new_modules']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per page')
+    args = parser.parse_args()
+
+    print(f"{'Page':<24}{'shared (ms)':>12}{'page (ms)':>12}{'modules':>10}")
+    for name, _, module in PAGES:
+        cost = measure(module, args.repeat)
+        print(f"{name:<24}{cost['shared_ms']:>12.1f}{cost['page_ms']:>12.1f}{cost['new_modules']:>10}")
+
+
+if __name__ == '__main__':
+    main()
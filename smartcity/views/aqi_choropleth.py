@@ -0,0 +1,155 @@
+"""AQI Choropleth page"""
+import streamlit as st
+import folium
+import plotly.graph_objects as go
+from smartcity import diagnostics, versions
+from smartcity.data import district_aqi_frames, extend_history
+from smartcity.figure_cache import FIGURE_CACHE, content_key
+from smartcity.geo import load_district_geojson
+from smartcity.views.point_query import render_point_query
+
+# Animated time windows -> hours of stored history
+WINDOWS = {'Last 24 hours': 24, 'Last 7 days': 24 * 7}
+FRAME_MS = 300
+
+
+def build_animation(geojson, frames):
+    """Hourly animated choropleth with a time slider
+
+    The district geometry is in the base trace only; every frame carries just
+    the AQI values of that hour, so playing or scrubbing swaps one array of
+    numbers on the client instead of re-sending the GeoJSON.
+    """
+    labels = frames.index.strftime('%a %d %b %H:00').tolist()
+    values = frames.to_numpy()
+    fig = go.Figure(
+        data=[go.Choroplethmapbox(
+            geojson=geojson,
+            featureidkey='properties.district',
+            locations=frames.columns.tolist(),
+            z=values[0],
+            zmin=float(values.min()),
+            zmax=float(values.max()),
+            colorscale='YlOrRd',
+            marker_opacity=0.8,
+            marker_line_width=0.5,
+            colorbar=dict(title=dict(text="AQI")),
+            hovertemplate='<b>%{location}</b><br>AQI: %{z:.0f}<extra></extra>'
+        )],
+        frames=[go.Frame(name=label, data=[go.Choroplethmapbox(z=row)], traces=[0])
+                for label, row in zip(labels, values)]
+    )
+
+    still = dict(mode='immediate', frame=dict(duration=0, redraw=True), transition=dict(duration=0))
+    fig.update_layout(
+        mapbox=dict(style='carto-positron', center=dict(lat=11.1271, lon=78.6569), zoom=5.8),
+        height=650,
+        margin=dict(l=0, r=0, t=10, b=0),
+        sliders=[dict(
+            active=0,
+            steps=[dict(method='animate', label=label, args=[[label], still]) for label in labels],
+            currentvalue=dict(prefix="Hour: ", font=dict(size=14, color='#333')),
+            # One step per hour is too dense to label; the current hour is shown above the slider
+            font=dict(color='rgba(0,0,0,0)'),
+            tickcolor='rgba(0,0,0,0)',
+            pad=dict(t=10, b=10)
+        )],
+        updatemenus=[dict(
+            type='buttons',
+            direction='left',
+            showactive=False,
+            x=0, y=0, xanchor='left', yanchor='top',
+            pad=dict(t=60),
+            buttons=[
+                dict(label='▶ Play', method='animate',
+                     args=[None, dict(frame=dict(duration=FRAME_MS, redraw=True), fromcurrent=True,
+                                      transition=dict(duration=0))]),
+                dict(label='❚❚ Pause', method='animate', args=[[None], still])
+            ]
+        )]
+    )
+    return fig
+
+
+def render_latest(geo_data_corrected, df):
+    """Folium snapshot of the latest hour, with the click-to-query nearest sensor lookup"""
+    with diagnostics.span('AQI Choropleth', 'figure'):
+        m = folium.Map(location=[11.1271, 78.6569], zoom_start=7, tiles='CartoDB positron')
+
+
+        folium.Choropleth(
+            geo_data=geo_data_corrected,
+            data=df,
+            columns=['district', 'aqi'],
+            key_on='feature.properties.district',
+            fill_color='YlOrRd',
+            fill_opacity=0.8,
+            line_opacity=0.3,
+            legend_name='Air Quality Index (AQI)',
+            highlight=True,
+        ).add_to(m)
+
+
+        folium.GeoJson(
+            geo_data_corrected,
+            tooltip=folium.features.GeoJsonTooltip(
+                fields=['district'],
+                aliases=['District:'],
+                labels=True,
+                sticky=False
+            )
+        ).add_to(m)
+
+    # Display map in Streamlit
+    map_state = diagnostics.folium_map('AQI Choropleth', m, width=1200, height=600,
+                                       returned_objects=['last_clicked'])
+    render_point_query('AQI Choropleth', map_state)
+
+
+def render_legend(district_count):
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> AQI Choropleth Classification</h4>
+    <p><strong>Visualization Technique:</strong> True choropleth mapping using district polygons (All {district_count} Tamil Nadu Districts)</p>
+    <p><strong>Time Slider:</strong> Hourly district means from the stored history; districts without sensors follow the statewide hourly swing. The district boundaries are sent once and each frame only carries {district_count} AQI values.</p>
+    <table style='width:100%; border-collapse: collapse;'>
+        <tr><td style='background:#00e400; color:white; padding:5px;'><strong>0–50 Good</strong></td><td>Air quality satisfactory</td></tr>
+        <tr><td style='background:#ffff00; padding:5px;'><strong>51–100 Moderate</strong></td><td>Acceptable quality</td></tr>
+        <tr><td style='background:#ff7e00; color:white; padding:5px;'><strong>101–150 USG</strong></td><td>Unhealthy for sensitive groups</td></tr>
+        <tr><td style='background:#ff0000; color:white; padding:5px;'><strong>151–200 Unhealthy</strong></td><td>Health effects for all</td></tr>
+        <tr><td style='background:#8f3f97; color:white; padding:5px;'><strong>201–300 Very Unhealthy</strong></td><td>Serious health effects</td></tr>
+        <tr><td style='background:#7e0023; color:white; padding:5px;'><strong>301+ Hazardous</strong></td><td>Emergency conditions</td></tr>
+    </table>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def render():
+    st.markdown("##  Air Quality Index Choropleth Map")
+
+    window = st.radio("Time", ['Latest hour'] + list(WINDOWS), horizontal=True)
+    hours = WINDOWS.get(window, 24)
+
+    with diagnostics.span('AQI Choropleth', 'data'):
+        extend_history()
+        frames = district_aqi_frames(hours)
+        geo_data_corrected = load_district_geojson()
+
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Data snapshot: {frames.index[-1]:%Y-%m-%d %H:00}"
+        + ("" if window == 'Latest hour' else f" | {len(frames)} hourly frames from {frames.index[0]:%Y-%m-%d %H:00}")
+        + "</p>",
+        unsafe_allow_html=True
+    )
+
+    if window != 'Latest hour':
+        with diagnostics.span('AQI Choropleth', 'figure'):
+            fig = FIGURE_CACHE.plotly('AQI Choropleth',
+                                      (content_key(frames), versions.current('district_geometry')),
+                                      lambda: build_animation(geo_data_corrected, frames),
+                                      options={'hours': hours})
+        diagnostics.plotly_chart('AQI Choropleth', fig, use_container_width=True)
+    else:
+        render_latest(geo_data_corrected, frames.iloc[-1].rename('aqi').rename_axis('district').reset_index())
+
+    render_legend(len(frames.columns))
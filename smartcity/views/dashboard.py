@@ -0,0 +1,260 @@
+"""Dashboard page"""
+from datetime import datetime
+import random
+import streamlit as st
+import plotly.graph_objects as go
+from smartcity import diagnostics
+from smartcity.data import REGISTRY, location_ids, realtime_frame, update_realtime_data
+from smartcity.feed import HOT_HOURS, HOT_READINGS, WARM_DAYS, feed_rollup, sensor_readings
+from smartcity.rollup import CUBE, STATE_NAME
+
+
+def render():
+    # REAL-TIME DASHBOARD - DEFAULT TO VELLORE
+    st.markdown("<h1 style='text-align: center;'> Real-Time Traffic & Pollution Dashboard</h1>",
+                unsafe_allow_html=True)
+
+    # Location selector for dashboard
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        all_locations = REGISTRY.names[location_ids(st.session_state.show_vellore_areas)].tolist()
+
+        selected_loc = st.selectbox(
+            " Select Location for Real-time Monitoring",
+            all_locations,
+            index=all_locations.index('Vellore') if 'Vellore' in all_locations else 0
+        )
+        st.session_state.selected_location = selected_loc
+
+    st.markdown(
+        f"<p style='text-align: center;' class='timestamp-text'>Monitoring <span class='vellore-highlight'>{selected_loc}</span> | Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+    st.markdown("<div style='text-align: center;'><span class='realtime-badge'>● LIVE</span></div>",
+                unsafe_allow_html=True)
+
+    # Update realtime data for selected location
+    with diagnostics.span('Dashboard', 'data'):
+        update_realtime_data(selected_loc)
+
+    with diagnostics.span('Dashboard', 'frame'):
+        rt_df = realtime_frame()
+        rt_df_location = rt_df[rt_df['location'] == selected_loc]
+
+        if len(rt_df_location) == 0:
+            rt_df_location = rt_df.tail(10)
+
+    if len(rt_df) > 0:
+        # KPI Metrics
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            current_aqi = rt_df_location.iloc[-1]['aqi']
+            prev_aqi = rt_df_location.iloc[-2]['aqi'] if len(rt_df_location) > 1 else current_aqi
+            st.metric("Current AQI", f"{current_aqi:.0f}",
+                      delta=f"{current_aqi - prev_aqi:.0f}",
+                      delta_color="inverse")
+
+        with col2:
+            current_traffic = rt_df_location.iloc[-1]['traffic_density']
+            prev_traffic = rt_df_location.iloc[-2]['traffic_density'] if len(rt_df_location) > 1 else current_traffic
+            st.metric("Traffic Density", f"{current_traffic:.0f}%",
+                      delta=f"{current_traffic - prev_traffic:.0f}%")
+
+        with col3:
+            current_speed = rt_df_location.iloc[-1]['avg_speed']
+            st.metric("Avg Speed", f"{current_speed:.0f} km/h",
+                      delta=f"{random.randint(-5, 5)} km/h")
+
+        with col4:
+            total_incidents = rt_df_location['incidents'].sum()
+            st.metric("Active Incidents", f"{total_incidents}",
+                      delta=f"{random.randint(-2, 2)}")
+
+        st.markdown("---")
+
+        # Real-time streaming charts
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown(f"###  Traffic Density Stream - {selected_loc} (Last 3 Minutes)")
+
+            with diagnostics.span('Dashboard', 'figure'):
+                fig_traffic = go.Figure()
+
+                fig_traffic.add_trace(go.Scatter(
+                    x=rt_df_location['timestamp'],
+                    y=rt_df_location['traffic_density'],
+                    mode='lines+markers',
+                    name='Traffic Density',
+                    line=dict(color='#667eea', width=3),
+                    marker=dict(size=8, symbol='circle'),
+                    fill='tozeroy',
+                    fillcolor='rgba(102, 126, 234, 0.2)'
+                ))
+
+                fig_traffic.update_layout(
+                    xaxis_title="Time (HH:MM:SS)",
+                    yaxis_title="Traffic Density (%)",
+                    template='plotly_white',
+                    height=350,
+                    hovermode='x unified',
+                    showlegend=False,
+                    xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+                    yaxis=dict(showgrid=True, gridcolor='#f0f0f0', range=[0, 100])
+                )
+
+            diagnostics.plotly_chart('Dashboard', fig_traffic, use_container_width=True)
+
+            st.markdown(f"""
+            <div class='legend-box'>
+            <p><strong> Real-time Traffic Analysis:</strong> Live traffic density at {selected_loc}. 
+            Measurements taken every 2 seconds. Values above 70% indicate heavy congestion requiring intervention.</p>
+            <p><strong>Time Range:</strong> Last 3 minutes | <strong>Current Time:</strong> {datetime.now().strftime('%H:%M:%S')}</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col2:
+            st.markdown(f"###  Air Quality Index Stream - {selected_loc} (Last 3 Minutes)")
+
+            with diagnostics.span('Dashboard', 'figure'):
+                fig_aqi = go.Figure()
+
+                colors = ['#00e400' if x <= 50 else '#ffff00' if x <= 100 else '#ff7e00' if x <= 150
+                else '#ff0000' if x <= 200 else '#8f3f97' for x in rt_df_location['aqi']]
+
+                fig_aqi.add_trace(go.Scatter(
+                    x=rt_df_location['timestamp'],
+                    y=rt_df_location['aqi'],
+                    mode='lines+markers',
+                    name='AQI',
+                    line=dict(color='#ff6b6b', width=3),
+                    marker=dict(size=8, color=colors, symbol='circle'),
+                    fill='tozeroy',
+                    fillcolor='rgba(255, 107, 107, 0.2)'
+                ))
+
+                fig_aqi.add_hline(y=100, line_dash="dash", line_color="orange",
+                                  annotation_text="Moderate (100)", annotation_position="right")
+                fig_aqi.add_hline(y=150, line_dash="dash", line_color="red",
+                                  annotation_text="Unhealthy (150)", annotation_position="right")
+
+                fig_aqi.update_layout(
+                    xaxis_title="Time (HH:MM:SS)",
+                    yaxis_title="Air Quality Index (AQI)",
+                    template='plotly_white',
+                    height=350,
+                    hovermode='x unified',
+                    showlegend=False,
+                    xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+                    yaxis=dict(showgrid=True, gridcolor='#f0f0f0', range=[0, 300])
+                )
+
+            diagnostics.plotly_chart('Dashboard', fig_aqi, use_container_width=True)
+
+            st.markdown(f"""
+            <div class='legend-box'>
+            <p><strong> Real-time Air Quality:</strong> Continuous AQI monitoring at {selected_loc}. 
+            Color changes indicate pollution severity levels.</p>
+            <p><strong>Time Range:</strong> Last 3 minutes | <strong>Current Time:</strong> {datetime.now().strftime('%H:%M:%S')}</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # Recent events table
+        st.markdown(f"###  Recent Monitoring Events - {selected_loc} (Last 3 Minutes)")
+
+        display_df = rt_df_location[
+            ['timestamp', 'location', 'traffic_density', 'aqi', 'avg_speed', 'incidents']].copy()
+        display_df['timestamp'] = display_df['timestamp'].dt.strftime('%H:%M:%S')
+        display_df = display_df.sort_values('timestamp', ascending=False)
+        display_df.columns = ['Time', 'Location', 'Traffic %', 'AQI', 'Speed (km/h)', 'Incidents']
+
+        st.dataframe(display_df, use_container_width=True, hide_index=True)
+
+        st.markdown("""
+        <div class='legend-box'>
+        <p><strong> Real-time Intelligence:</strong> Individual sensor readings from the last 3 minutes. 
+        High traffic + high AQI + low speed = severe congestion hotspot requiring immediate action.</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Drill-down over the pre-aggregated rollup cube (no raw readings are re-scanned)
+    st.markdown("###  Drill-down: Tamil Nadu → District → Area (Last 15 Minutes)")
+    with diagnostics.span('Dashboard', 'rollup'):
+        feed_rollup()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        district_names = [STATE_NAME] + REGISTRY.names[REGISTRY.districts].tolist()
+        district = st.selectbox("District", district_names,
+                                index=district_names.index('Vellore'), key='drill_district')
+    node = CUBE.state if district == STATE_NAME else REGISTRY.id(district)
+    with col2:
+        areas = REGISTRY.names[REGISTRY.children(node)].tolist() if node != CUBE.state else []
+        if areas:
+            area = st.selectbox("Area", [f"All of {district}"] + areas, key='drill_area')
+            if area in areas:
+                node = REGISTRY.id(area)
+
+    with diagnostics.span('Dashboard', 'rollup'):
+        node_stats = CUBE.frame([node]).iloc[0]
+        children = CUBE.frame(CUBE.children(node))
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(" > ".join(CUBE.name(n) for n in CUBE.path(node)), f"{node_stats['readings']:,} readings")
+    with col2:
+        st.metric("Mean AQI", f"{node_stats['aqi_mean']:.0f}")
+    with col3:
+        st.metric("AQI Range", f"{node_stats['aqi_min']:.0f} – {node_stats['aqi_max']:.0f}")
+    with col4:
+        st.metric("Mean Traffic", f"{node_stats['traffic_density_mean']:.0f}%")
+
+    if len(children):
+        children_df = children[['name', 'level', 'readings', 'aqi_mean', 'aqi_min', 'aqi_max',
+                                'traffic_density_mean']].round(1)
+        children_df.columns = ['Name', 'Level', 'Readings', 'Mean AQI', 'Min AQI', 'Max AQI', 'Mean Traffic %']
+        st.dataframe(children_df, use_container_width=True, hide_index=True)
+
+    # Individual readings of one sensor under the selected node, from the retention tiers
+    sensors = REGISTRY.sensors_of(REGISTRY.districts if node == CUBE.state else [node])
+    if len(sensors):
+        st.markdown("###  Sensor Readings (Raw)")
+        spans = [15, 60, 180, 360, 720, 1440]
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            sensor = st.selectbox("Sensor", sensors.tolist(), format_func=lambda s: REGISTRY.sensor_code[s],
+                                  key='drill_sensor')
+        with col2:
+            minutes = st.select_slider("Last minutes", spans, value=spans[min(1, len(spans) - 1)],
+                                       key='drill_sensor_minutes')
+
+        with diagnostics.span('Dashboard', 'sensor_readings'):
+            readings = sensor_readings(sensor, minutes)
+
+        with diagnostics.span('Dashboard', 'figure'):
+            fig_sensor = go.Figure()
+            fig_sensor.add_trace(go.Scatter(x=readings['timestamp'], y=readings['aqi'], mode='lines',
+                                            name='AQI', line=dict(color='#ff6b6b', width=2)))
+            fig_sensor.add_trace(go.Scatter(x=readings['timestamp'], y=readings['traffic_density'], mode='lines',
+                                            name='Traffic %', line=dict(color='#667eea', width=2)))
+            fig_sensor.update_layout(
+                xaxis_title="Time",
+                yaxis_title="AQI / Traffic %",
+                template='plotly_white',
+                height=350,
+                hovermode='x unified',
+                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+            )
+
+        diagnostics.plotly_chart('Dashboard', fig_sensor, use_container_width=True)
+
+        hot = HOT_READINGS.status()
+        st.markdown(f"""
+        <div class='legend-box'>
+        <p><strong> Raw Sensor Readings:</strong> Every reading of {REGISTRY.sensor_code[sensor]}
+        ({len(readings):,} in the last {minutes} minutes). The last {HOT_HOURS:g} hours are kept in memory as
+        compressed chunks ({hot['readings']:,} readings of {hot['series']} sensors in {hot['bytes'] / 1024:,.0f} KB,
+        {hot['raw_bytes'] / 1024:,.0f} KB uncompressed), the last {WARM_DAYS:g} days in memory-mapped segment files
+        and older readings in Parquet.</p>
+        </div>
+        """, unsafe_allow_html=True)
@@ -0,0 +1,102 @@
+"""Diagnostics page"""
+from datetime import datetime
+import streamlit as st
+import pandas as pd
+from smartcity import cache, diagnostics, sessions, shared_store, versions
+from smartcity.feed import SENSOR_INGEST, get_tiered_readings
+from smartcity.figure_cache import FIGURE_CACHE
+from smartcity.views import IMPORT_COSTS
+
+
+def render():
+    st.markdown("##  Render Diagnostics")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Per-page stage timings for this server process | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        enabled = st.toggle("Record render spans", value=diagnostics.enabled())
+        diagnostics.set_enabled(enabled)
+    with col2:
+        if st.button("Reset statistics", use_container_width=True):
+            diagnostics.reset()
+    with col3:
+        st.download_button("Prometheus metrics", diagnostics.to_prometheus(),
+                           file_name='smartcity_metrics.txt', mime='text/plain',
+                           use_container_width=True)
+        st.download_button("JSON export", diagnostics.to_json(),
+                           file_name='smartcity_metrics.json', mime='application/json',
+                           use_container_width=True)
+
+    if not enabled:
+        st.info("Span recording is off. Switch it on (or start the server with SMARTCITY_DIAGNOSTICS=1) "
+                "and open the pages you want to profile.")
+
+    # Aggregated stages
+    st.markdown("###  Stage Timings")
+    summary = diagnostics.summary()
+    if summary:
+        summary_df = pd.DataFrame(summary).round({'mean_ms': 2, 'max_ms': 2, 'mean_bytes': 0})
+        summary_df.columns = ['Page', 'Stage', 'Runs', 'Mean (ms)', 'Max (ms)', 'Mean Bytes',
+                              'Cache Hits', 'Cache Misses', 'Errors']
+        st.dataframe(summary_df, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No spans recorded yet.")
+
+    st.markdown("###  Recent Spans")
+    recent = diagnostics.recent(100)
+    if recent:
+        st.dataframe(pd.DataFrame(recent), use_container_width=True, hide_index=True)
+
+    # Per-session memory
+    st.markdown("###  Session Memory")
+    session_totals = sessions.totals()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Tracked Sessions", session_totals['sessions'])
+    with col2:
+        st.metric("Session State", f"{session_totals['bytes'] / 1024 ** 2:.1f} MB")
+    with col3:
+        st.metric("Realtime Cap", f"{session_totals['max_points']} pts / {session_totals['window_seconds']:.0f} s")
+    with col4:
+        st.metric("Idle Eviction", f"{session_totals['idle_seconds']:.0f} s")
+    consumers = sessions.top_consumers(10)
+    if consumers:
+        consumers_df = pd.DataFrame(consumers)
+        consumers_df['bytes'] = (consumers_df['bytes'] / 1024).round(1)
+        consumers_df = consumers_df.rename(columns={'bytes': 'KB'})
+        st.dataframe(consumers_df, use_container_width=True, hide_index=True)
+
+    store = shared_store.get()
+    if store is not None:
+        st.markdown("**Shared realtime store**")
+        st.json(store.status())
+
+    st.markdown("**Sensor feed (event time)**")
+    st.caption("Duplicates are dropped by (sensor, sequence); readings behind the watermark are applied as "
+               "corrections to their own buckets, or dropped once past the allowed lateness.")
+    st.json(SENSOR_INGEST.status())
+    st.markdown("**Raw reading tiers (hot RAM, warm segments, cold Parquet)**")
+    st.json(get_tiered_readings().status())
+
+    # Caches
+    st.markdown("###  Caches")
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        st.markdown("**Data caches**")
+        cache_df = pd.DataFrame.from_dict(cache.metrics(), orient='index')
+        if not cache_df.empty:
+            cache_df['depends_on'] = cache_df['depends_on'].apply(', '.join)
+        st.dataframe(cache_df, use_container_width=True)
+    with col2:
+        st.markdown("**Figure cache**")
+        st.json(FIGURE_CACHE.stats())
+        st.markdown("**Dataset versions**")
+        st.json({name: str(version) for name, version in versions.snapshot().items()})
+
+    if IMPORT_COSTS:
+        st.markdown("###  Page Import Costs")
+        import_df = pd.DataFrame.from_dict(IMPORT_COSTS, orient='index')
+        import_df['ms'] = (import_df.pop('seconds') * 1000).round(1)
+        st.dataframe(import_df, use_container_width=True)
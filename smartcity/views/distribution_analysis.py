@@ -0,0 +1,84 @@
+"""Distribution Analysis page"""
+from datetime import datetime
+import streamlit as st
+import plotly.express as px
+from smartcity import diagnostics
+from smartcity.data import generate_distribution_data, generate_static_data
+from smartcity.figure_cache import FIGURE_CACHE, content_key
+
+
+def build_figure(dist_df_filtered):
+    """Build the AQI box plot with reference lines"""
+    fig = px.box(dist_df_filtered, x='location', y='aqi', color='location',
+                 title="AQI Distribution Comparison Across Locations",
+                 labels={'aqi': 'Air Quality Index (AQI)', 'location': 'Location'})
+
+    fig.update_layout(
+        template='plotly_white',
+        showlegend=False,
+        height=550,
+        xaxis_tickangle=-45,
+        xaxis=dict(showgrid=False, title="Location"),
+        yaxis=dict(showgrid=True, gridcolor='#f0f0f0', title="Air Quality Index (AQI)")
+    )
+
+    # Add reference lines
+    fig.add_hline(y=50, line_dash="dash", line_color="green",
+                  annotation_text="Good (50)", annotation_position="right")
+    fig.add_hline(y=100, line_dash="dash", line_color="yellow",
+                  annotation_text="Moderate (100)", annotation_position="right")
+    fig.add_hline(y=150, line_dash="dash", line_color="orange",
+                  annotation_text="Unhealthy (150)", annotation_position="right")
+    return fig
+
+
+def render():
+    st.markdown("##  Statistical Distribution Analysis - Box Plot")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Sample size: 40 measurements per location | Date: {datetime.now().strftime('%Y-%m-%d')}</p>",
+        unsafe_allow_html=True)
+
+    with diagnostics.span('Distribution Analysis', 'data'):
+        df = generate_static_data(st.session_state.show_vellore_areas)
+
+        # Generate distribution data
+        dist_df = generate_distribution_data(st.session_state.show_vellore_areas)
+
+    # Select top locations
+    top_locations = df.nlargest(12, 'aqi')['location'].tolist()
+    if 'Vellore' not in top_locations:
+        top_locations.append('Vellore')
+    dist_df_filtered = dist_df[dist_df['location'].isin(top_locations)]
+
+    with diagnostics.span('Distribution Analysis', 'figure'):
+        fig = FIGURE_CACHE.plotly('Distribution Analysis', content_key(dist_df_filtered),
+                                  lambda: build_figure(dist_df_filtered),
+                                  options={'vellore_areas': st.session_state.show_vellore_areas})
+
+    diagnostics.plotly_chart('Distribution Analysis', fig, use_container_width=True)
+
+    # Statistical summary
+    st.markdown("###  Statistical Summary Table")
+    summary_stats = dist_df_filtered.groupby('location', observed=True)['aqi'].agg(['mean', 'median', 'std', 'min', 'max']).round(1)
+    summary_stats = summary_stats.sort_values('mean', ascending=False)
+    summary_stats.columns = ['Mean', 'Median', 'Std Dev', 'Min', 'Max']
+    st.dataframe(summary_stats, use_container_width=True)
+
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> Box Plot Statistical Guide</h4>
+    <p><strong>Visualization Type:</strong> Box and Whisker Plot (Module 5 - Diverse Visual Analysis)</p>
+    <p><strong>X-Axis:</strong> Geographic Location (Tamil Nadu districts and Vellore areas)</p>
+    <p><strong>Y-Axis:</strong> Air Quality Index (0-300 scale)</p>
+    <p><strong>Box Components:</strong></p>
+    <ul>
+        <li><strong>Center Line:</strong> Median (50th percentile) - typical AQI</li>
+        <li><strong>Box Edges:</strong> 25th and 75th percentiles (middle 50% of data)</li>
+        <li><strong>Whiskers:</strong> Minimum and maximum within 1.5×IQR</li>
+        <li><strong>Dots:</strong> Outliers (pollution spikes/unusual events)</li>
+        <li><strong>Box Height:</strong> Variability (taller = more unstable air quality)</li>
+    </ul>
+    <p><strong>Interpretation:</strong> Compare medians for chronic pollution. Check box heights for consistency. Outliers indicate industrial activity or traffic incidents.</p>
+    <p><strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+    """, unsafe_allow_html=True)
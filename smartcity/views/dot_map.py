@@ -0,0 +1,125 @@
+"""Dot Map page"""
+from datetime import datetime
+import streamlit as st
+import plotly.express as px
+from smartcity import diagnostics
+from smartcity.data import generate_static_data
+from smartcity.figure_cache import FIGURE_CACHE, content_key
+
+
+def build_figure(df):
+    """Build the dot map of AQI and traffic density"""
+    # ✅ Use scatter_mapbox for detailed background map
+    fig = px.scatter_mapbox(
+        df,
+        lat='lat',
+        lon='lon',
+        size='aqi',
+        color='traffic_density',
+        hover_name='location',
+        hover_data={'aqi': True, 'traffic_density': True},
+        title='Dot Map: Traffic and Pollution Distribution',
+        color_continuous_scale='Reds',
+        size_max=30,
+        zoom=6,
+        height=600
+    )
+
+    fig.update_layout(
+        mapbox_style='open-street-map',  # ✅ Detailed labeled map
+        mapbox_center={"lat": 11.0, "lon": 78.5},
+        margin={"r":0,"t":40,"l":0,"b":0},
+        template='plotly_white'
+    )
+    return fig
+
+
+def render():
+    st.markdown("## ⚫ Dot Map Visualization - Geographic Distribution")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Point-based geospatial representation | Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    with diagnostics.span('Dot Map', 'data'):
+        df = generate_static_data(st.session_state.show_vellore_areas)
+
+    with diagnostics.span('Dot Map', 'figure'):
+        fig = FIGURE_CACHE.plotly('Dot Map', content_key(df),
+                                  lambda: build_figure(df),
+                                  options={'vellore_areas': st.session_state.show_vellore_areas})
+
+    diagnostics.plotly_chart('Dot Map', fig, use_container_width=True)
+
+    # Legend section
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4>📋 Dot Map Interpretation</h4>
+    <p><strong>Visualization Type:</strong> Dot Map (Module 4 - Geospatial visualization)</p>
+    <p><strong>Geographic Scope:</strong> Tamil Nadu state with focus on monitored locations</p>
+    <p><strong>Dot Size:</strong> Proportional to Air Quality Index (larger dots = higher pollution)</p>
+    <p><strong>Dot Color:</strong> Traffic Density percentage (darker red = more congestion)</p>
+    <p><strong>Spatial Patterns:</strong> Clusters in urban centers (Chennai, Coimbatore, Madurai, Vellore). Scattered rural points show lower pollution.</p>
+    <p><strong>Usage:</strong> Quick visual identification of hotspots. Compare relative pollution levels at a glance.</p>
+    <p><strong>Timestamp:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# Hexagonal Binning page (disabled in the page registry)
+#
+# def render():
+#     st.markdown("## ⬡ Hexagonal Binning - Density Visualization")
+#     st.markdown(
+#         f"<p style='color:#666; font-style:italic;'>Spatial aggregation technique | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+#         unsafe_allow_html=True)
+#
+#     # Generate more data points for hexbin
+#     df = generate_static_data(st.session_state.show_vellore_areas)
+#     expanded_data = []
+#     for _, row in df.iterrows():
+#         for i in range(20):
+#             expanded_data.append({
+#                 'lat': row['lat'] + np.random.normal(0, 0.1),
+#                 'lon': row['lon'] + np.random.normal(0, 0.1),
+#                 'aqi': row['aqi'] + np.random.normal(0, 15)
+#             })
+#
+#     hex_df = pd.DataFrame(expanded_data)
+#
+#     fig = go.Figure()
+#
+#     fig.add_trace(go.Histogram2d(
+#         x=hex_df['lon'],
+#         y=hex_df['lat'],
+#         z=hex_df['aqi'],
+#         colorscale='Reds',
+#         colorbar=dict(title=dict(text="Avg AQI", side="right")),
+#         nbinsx=15,
+#         nbinsy=15
+#     ))
+#
+#     fig.update_layout(
+#         title='Hexagonal Binning: Spatial Pollution Density',
+#         xaxis_title='Longitude',
+#         yaxis_title='Latitude',
+#         template='plotly_white',
+#         height=600,
+#         xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+#         yaxis=dict(showgrid=True, gridcolor='#f0f0f0')
+#     )
+#
+#     st.plotly_chart(fig, use_container_width=True)
+#
+#     st.markdown(f"""
+#     <div class='legend-box'>
+#     <h4> Hexagonal Binning Analysis</h4>
+#     <p><strong>Visualization Type:</strong> Hexagonal Binning / 2D Histogram (Module 4 - Geospatial visualization)</p>
+#     <p><strong>X-Axis:</strong> Longitude (geographic coordinate)</p>
+#     <p><strong>Y-Axis:</strong> Latitude (geographic coordinate)</p>
+#     <p><strong>Color Intensity:</strong> Average AQI in each hexagonal bin</p>
+#     <p><strong>Method:</strong> Aggregates nearby pollution readings into hexagonal cells for pattern visualization</p>
+#     <p><strong>Advantages:</strong> Reduces visual clutter, shows density patterns, identifies pollution hotspot regions</p>
+#     <p><strong>Interpretation:</strong> Darker red hexagons indicate concentrated pollution zones. Use for regional policy planning and resource allocation.</p>
+#     <p><strong>Sample Size:</strong> {len(hex_df)} data points | <strong>Time:</strong> {datetime.now().strftime('%H:%M:%S')}</p>
+#     </div>
+#     """, unsafe_allow_html=True)
@@ -0,0 +1,55 @@
+"""Jobs page"""
+from datetime import datetime
+import streamlit as st
+import pandas as pd
+from smartcity.scheduled import JOBS
+
+
+def render():
+    st.markdown("##  Background Jobs")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Scheduled analytics of this server process | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    status = JOBS.status()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Jobs", len(status))
+    with col2:
+        st.metric("Running", sum(row['state'] == 'running' for row in status))
+    with col3:
+        st.metric("Runs", sum(row['runs'] for row in status))
+    with col4:
+        st.metric("Failures", sum(row['failures'] for row in status))
+
+    st.markdown("###  Job Status")
+    status_df = pd.DataFrame(status)
+    status_df.columns = ['Job', 'State', 'Triggers', 'Next Scheduled', 'Last Trigger', 'Last Started',
+                         'Last Run (s)', 'Queued (s)', 'Mean Run (s)', 'Runs', 'Failures', 'Last Error',
+                         'Artifact Version', 'Artifact Finished']
+    st.dataframe(status_df, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        job = st.selectbox("Job", list(JOBS.jobs), format_func=lambda name: f"{name} - {JOBS.jobs[name].description}")
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("Run now", use_container_width=True):
+            JOBS.run_now(job)
+            st.success(f"{job} will start within {JOBS.tick_seconds} s")
+
+    st.markdown("###  Recent Runs")
+    runs = JOBS.recent_runs()
+    if runs:
+        st.dataframe(pd.DataFrame(runs), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No runs finished in this process yet.")
+
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> Background Job Scheduler</h4>
+    <p><strong>Triggers:</strong> A cron expression (minute hour day month weekday), new data of a dataset, or "Run now".</p>
+    <p><strong>Run (s):</strong> Time spent in the worker process. <strong>Queued (s):</strong> Time waiting for a free worker and moving the result back.</p>
+    <p><strong>Workers:</strong> {JOBS.workers} processes (<code>SMARTCITY_JOB_WORKERS</code>). Pages read the latest successful result; a failed run keeps the previous one.</p>
+    </div>
+    """, unsafe_allow_html=True)
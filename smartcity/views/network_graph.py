@@ -0,0 +1,101 @@
+"""Network Graph page"""
+from datetime import datetime
+import random
+import streamlit as st
+import plotly.graph_objects as go
+from smartcity import diagnostics
+from smartcity.data import generate_static_data
+from smartcity.figure_cache import FIGURE_CACHE, content_key
+
+
+def build_figure(df):
+    """Build the inter-city traffic flow network on a map"""
+    # Create network connections (simplified)
+    locations = df['location'].tolist()
+
+    edges = []
+    edge_weights = []
+    for i, loc1 in enumerate(locations[:8]):
+        for j, loc2 in enumerate(locations[:8]):
+            if i < j:
+                weight = random.randint(50, 500)
+                edges.append((loc1, loc2))
+                edge_weights.append(weight)
+
+    # Create figure using Mapbox (for detailed map with labels)
+    fig = go.Figure()
+
+
+    for idx, (source, target) in enumerate(edges):
+        source_data = df[df['location'] == source].iloc[0]
+        target_data = df[df['location'] == target].iloc[0]
+
+        fig.add_trace(go.Scattermapbox(
+            lon=[source_data['lon'], target_data['lon']],
+            lat=[source_data['lat'], target_data['lat']],
+            mode='lines',
+            line=dict(width=edge_weights[idx] / 100, color='rgba(102, 126, 234, 0.4)'),
+            hoverinfo='skip',
+            showlegend=False
+        ))
+
+
+    fig.add_trace(go.Scattermapbox(
+        lon=df['lon'][:8],
+        lat=df['lat'][:8],
+        mode='markers+text',
+        marker=dict(
+            size=df['vehicles_count'][:8] / 1000,
+            color=df['aqi'][:8],
+            colorscale='Reds',
+            showscale=True,
+            colorbar=dict(title=dict(text="AQI", side="right"))
+        ),
+        text=df['location'][:8],
+        textposition='top center',
+        hovertemplate='<b>%{text}</b><br>AQI: %{marker.color:.0f}<extra></extra>',
+        showlegend=False
+    ))
+
+    fig.update_layout(
+        mapbox_style='open-street-map',  # Detailed, labeled background
+        mapbox_center=dict(lat=11.0, lon=78.5),
+        mapbox_zoom=6,
+        height=600,
+        title='Network Graph: Inter-city Traffic Flow Connections',
+        margin={"r":0, "t":40, "l":0, "b":0},
+        template='plotly_white'
+    )
+    return fig
+
+
+def render():
+    st.markdown("## 🕸️ Network Graph - Traffic Flow Connectivity")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Network and tree visualization | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    with diagnostics.span('Network Graph', 'data'):
+        df = generate_static_data(False)  # Use only major cities
+
+    with diagnostics.span('Network Graph', 'figure'):
+        fig = FIGURE_CACHE.plotly('Network Graph', content_key(df),
+                                  lambda: build_figure(df))
+
+    diagnostics.plotly_chart('Network Graph', fig, use_container_width=True)
+
+    # Legend/Description section
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> Network Graph Analysis</h4>
+    <p><strong>Visualization Type:</strong> Network/Tree Visualization (Module 2 - Visual Analytics)</p>
+    <p><strong>Nodes (Circles):</strong> Major cities in Tamil Nadu</p>
+    <p><strong>Node Size:</strong> Vehicle count (larger = more vehicles)</p>
+    <p><strong>Node Color:</strong> Air Quality Index (darker red = worse pollution)</p>
+    <p><strong>Edges (Lines):</strong> Traffic flow connections between cities</p>
+    <p><strong>Edge Thickness:</strong> Traffic volume on that route</p>
+    <p><strong>Network Insight:</strong> Identifies key transportation hubs and pollution spread patterns. Thicker connections indicate major highways requiring monitoring.</p>
+    <p><strong>Application:</strong> Plan inter-city public transport, optimize highway pollution control, identify transit corridors</p>
+    <p><strong>Analysis Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,29 @@
+"""Click-to-query panel shared by the map pages (not a page itself)"""
+import math
+import streamlit as st
+from smartcity import diagnostics
+from smartcity.feed import nearest_sensors
+
+
+def render_point_query(page, map_state):
+    """Nearest sensors and estimated AQI at the point last clicked on the page's map"""
+    clicked = (map_state or {}).get('last_clicked')
+    st.markdown("###  Point Query")
+    if not clicked:
+        st.caption("Click anywhere on the map to list the nearest sensors and estimate AQI at that point.")
+        return
+
+    k = st.slider("Nearest sensors", 1, 20, 5, key=f"{page}_point_query_k")
+    with diagnostics.span(page, 'point_query'):
+        sensors, estimate, elapsed_ms = nearest_sensors(clicked['lat'], clicked['lng'], k)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Clicked Point", f"{clicked['lat']:.4f}, {clicked['lng']:.4f}")
+    with col2:
+        st.metric("Estimated AQI", "n/a" if math.isnan(estimate) else f"{estimate:.0f}")
+    with col3:
+        st.metric("Answered In", f"{elapsed_ms:.1f} ms")
+    st.dataframe(sensors, use_container_width=True, hide_index=True)
+    st.caption("AQI estimate: inverse-distance weighting of these sensors' last 15 minutes; "
+               "sensor columns show the latest minute.")
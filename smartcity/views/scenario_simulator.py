@@ -0,0 +1,154 @@
+"""Scenario Simulator page"""
+from datetime import datetime
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from smartcity import diagnostics, scenarios
+from smartcity.data import REGISTRY, run_scenario, scenario_model
+
+DRAW_CHOICES = [1000, 2000, 5000, 10000]
+BASELINE_COLOR = '#7f8c8d'
+SCENARIO_COLOR = '#27ae60'
+
+
+def build_distribution_figure(baseline, scenario, location):
+    """Overlaid histograms of the projected daily mean AQI with and without the policies"""
+    fig = go.Figure()
+    fig.add_trace(go.Histogram(x=baseline, name='No policy', marker_color=BASELINE_COLOR, opacity=0.6, nbinsx=60))
+    fig.add_trace(go.Histogram(x=scenario, name='With policies', marker_color=SCENARIO_COLOR, opacity=0.6, nbinsx=60))
+    fig.update_layout(
+        title=f"Projected Daily Mean AQI - {location}",
+        barmode='overlay',
+        xaxis_title="Daily mean AQI",
+        yaxis_title="Draws",
+        template='plotly_white',
+        height=420
+    )
+    return fig
+
+
+def build_hourly_figure(baseline_bands, scenario_bands, location):
+    """Hourly median AQI with 5th-95th percentile bands, with and without the policies"""
+    hours = list(range(24))
+    fig = go.Figure()
+    for name, bands, color, fill in [('No policy', baseline_bands, BASELINE_COLOR, 'rgba(127, 140, 141, 0.2)'),
+                                     ('With policies', scenario_bands, SCENARIO_COLOR, 'rgba(39, 174, 96, 0.2)')]:
+        fig.add_trace(go.Scatter(x=hours, y=bands[2], line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=hours, y=bands[0], line=dict(width=0), fill='tonexty', fillcolor=fill,
+                                 name=f'{name} (5th-95th pct)', hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=hours, y=bands[1], line=dict(color=color, width=3), name=f'{name} (median)'))
+    fig.add_hline(y=scenarios.UNHEALTHY_AQI, line=dict(color='#c0392b', dash='dot'), annotation_text="Unhealthy")
+    fig.update_layout(
+        title=f"Hourly AQI Range - {location}",
+        xaxis_title="Hour of Day (0-23)",
+        yaxis_title="AQI",
+        template='plotly_white',
+        height=420,
+        xaxis=dict(dtick=2)
+    )
+    return fig
+
+
+def render():
+    st.markdown("##  Scenario Simulator - Traffic Policies vs Air Quality")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Monte Carlo what-if analysis | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    district_names = REGISTRY.names[REGISTRY.districts].tolist()
+    with st.form('scenario'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("**Odd-even days**")
+            odd_even = st.checkbox("Apply odd-even", value=True)
+            odd_even_districts = st.multiselect("Districts", district_names, default=['Vellore'], key='odd_even_districts')
+            odd_even_hours = st.slider("Hours", 0, 23, (8, 20), key='odd_even_hours')
+            odd_even_bikes = st.checkbox("Include two-wheelers", value=False)
+            odd_even_compliance = st.slider("Compliance (%)", 0, 100, (60, 85), key='odd_even_compliance')
+        with col2:
+            st.markdown("**Truck ban at rush hour**")
+            truck_ban = st.checkbox("Apply truck ban", value=True)
+            truck_districts = st.multiselect("Districts", district_names, default=['Vellore'], key='truck_districts')
+            st.caption(f"Rush hours: {', '.join(f'{h}:00' for h in scenarios.RUSH_HOURS)}")
+            truck_compliance = st.slider("Compliance (%)", 0, 100, (70, 95), key='truck_compliance')
+        with col3:
+            st.markdown("**Statewide traffic reduction**")
+            reduction = st.slider("All vehicles, all hours (%)", 0, 30, 0)
+            draws = st.select_slider("Monte Carlo draws", DRAW_CHOICES, value=5000)
+        st.form_submit_button("Run scenario", use_container_width=True)
+
+    policies = []
+    if odd_even and odd_even_districts:
+        policies.append((tuple(int(REGISTRY.id(d)) for d in odd_even_districts),
+                         tuple(range(odd_even_hours[0], odd_even_hours[1] + 1)),
+                         0.5, 0.5 if odd_even_bikes else 0.0, 0.0,
+                         (odd_even_compliance[0] / 100, odd_even_compliance[1] / 100)))
+    if truck_ban and truck_districts:
+        policies.append((tuple(int(REGISTRY.id(d)) for d in truck_districts), scenarios.RUSH_HOURS,
+                         0.0, 0.0, 1.0, (truck_compliance[0] / 100, truck_compliance[1] / 100)))
+    if reduction:
+        fraction = reduction / 100
+        policies.append((tuple(int(d) for d in REGISTRY.districts), tuple(range(24)),
+                         fraction, fraction, fraction, (1.0, 1.0)))
+
+    with diagnostics.span('Scenario Simulator', 'data'):
+        model = scenario_model()
+        results, elapsed_ms = run_scenario(tuple(policies), draws)
+
+    names = REGISTRY.names.tolist()
+    location = st.selectbox("Location", names, index=names.index('Vellore'), key='scenario_location')
+    i = names.index(location)
+    change = results['scenario'] - results['baseline']
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(f"{location} Daily AQI (median)", f"{np.median(results['scenario'][:, i]):.1f}",
+                  f"{np.median(change[:, i]):+.1f} vs no policy", delta_color='inverse')
+    with col2:
+        st.metric("Chance of > 5 AQI Improvement", f"{(change[:, i] < -5).mean() * 100:.0f}%")
+    with col3:
+        st.metric("Unhealthy Hours / Day", f"{results['scenario_unhealthy'][:, i].mean():.1f}",
+                  f"{(results['scenario_unhealthy'][:, i] - results['baseline_unhealthy'][:, i]).mean():+.1f}",
+                  delta_color='inverse')
+    with col4:
+        st.metric("Simulation", f"{elapsed_ms:.0f} ms", f"{draws:,} draws x {len(model)} locations x 24 h",
+                  delta_color='off')
+
+    with diagnostics.span('Scenario Simulator', 'figure'):
+        fig1 = build_distribution_figure(results['baseline'][:, i], results['scenario'][:, i], location)
+        fig2 = build_hourly_figure(results['baseline_hourly'][:, i], results['scenario_hourly'][:, i], location)
+    col1, col2 = st.columns(2)
+    with col1:
+        diagnostics.plotly_chart('Scenario Simulator', fig1, use_container_width=True)
+    with col2:
+        diagnostics.plotly_chart('Scenario Simulator', fig2, use_container_width=True)
+
+    st.markdown("###  Projected Change by Location")
+    with diagnostics.span('Scenario Simulator', 'dataframe'):
+        table = pd.DataFrame({
+            'Location': names,
+            'District': REGISTRY.names[REGISTRY.district],
+            'AQI (no policy)': np.median(results['baseline'], axis=0).round(1),
+            'AQI (with policies)': np.median(results['scenario'], axis=0).round(1),
+            'Change (median)': np.median(change, axis=0).round(1),
+            'Change 5th pct': np.percentile(change, 5, axis=0).round(1),
+            'Change 95th pct': np.percentile(change, 95, axis=0).round(1),
+            'Traffic Change (%)': (results['traffic_change'] * 100).round(1),
+            'Unhealthy h (no policy)': results['baseline_unhealthy'].mean(axis=0).round(1),
+            'Unhealthy h (with policies)': results['scenario_unhealthy'].mean(axis=0).round(1),
+            'Fitted AQI per % Traffic': model.slope.round(2)
+        }).sort_values('Change (median)')
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> Monte Carlo Scenario Model</h4>
+    <p><strong>Visualization Type:</strong> Distribution plots of simulated outcomes (what-if analysis)</p>
+    <p><strong>Model:</strong> For every location, AQI = intercept + slope × traffic density + noise, fitted on the last 30 days of stored hourly history. Traffic density follows each location's hourly profile and day-to-day spread.</p>
+    <p><strong>Vehicle Mix:</strong> The cars, bikes and trucks of each location set how much traffic a policy removes (by count) and how much of the traffic-driven AQI goes with it (by emissions, truck = {scenarios.EMISSION_WEIGHTS[2]:g} × car, two-wheeler = {scenarios.EMISSION_WEIGHTS[1]:g} × car).</p>
+    <p><strong>Uncertainty:</strong> Every draw samples the fitted slope, a day of traffic, policy compliance within the chosen range and residual noise. The same draw is evaluated with and without the policies.</p>
+    <p><strong>Policies:</strong> Odd-even days take half of the cars (and optionally two-wheelers) off the road in the chosen hours; the truck ban removes trucks at rush hour; areas follow their district.</p>
+    <p><strong>Hourly Bands:</strong> 5th-95th percentile over the first {scenarios.BAND_DRAWS:,} draws.</p>
+    </div>
+    """, unsafe_allow_html=True)
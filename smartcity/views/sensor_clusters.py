@@ -0,0 +1,102 @@
+"""Sensor Clusters page"""
+from datetime import datetime
+import streamlit as st
+import folium
+from folium import plugins
+from smartcity import diagnostics
+from smartcity.data import generate_sensor_cluster_data
+from smartcity.scheduled import JOBS
+from smartcity.views.point_query import render_point_query
+
+
+def render():
+    st.markdown("##  Monitoring Sensor Network - Cluster Visualization")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Static sensor network snapshot | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+
+    # Generate static sensor data
+    with diagnostics.span('Sensor Clusters', 'data'):
+        sensor_data = generate_sensor_cluster_data(st.session_state.show_vellore_areas)
+
+    # Create map with static data
+    with diagnostics.span('Sensor Clusters', 'figure'):
+        m = folium.Map(location=[11.5, 78.5], zoom_start=7)
+        marker_cluster = plugins.MarkerCluster().add_to(m)
+
+        # Add static sensors to map
+        for sensor in sensor_data:
+            folium.Marker(
+                location=[sensor['lat'], sensor['lon']],
+                popup=f"""
+                    <b>Sensor ID: {sensor['sensor_id']}</b><br>
+                    Location: {sensor['location']}<br>
+                    AQI: {sensor['aqi']:.0f}<br>
+                    Traffic: {sensor['traffic']:.0f}%<br>
+                    Status: Active<br>
+                    <i>Static Data - Network Snapshot</i>
+                """,
+                icon=folium.Icon(
+                    color='green' if sensor['aqi'] < 100 else 'orange' if sensor['aqi'] < 150 else 'red',
+                    icon='cloud' if sensor['aqi'] < 100 else 'warning-sign',
+                    prefix='glyphicon'
+                )
+            ).add_to(marker_cluster)
+
+        # Sensor groups from the scheduled clustering job, drawn as circles over the markers
+        groups = JOBS.artifact('sensor_groups')
+        if groups is not None:
+            layer = folium.FeatureGroup(name='Sensor groups').add_to(m)
+            for group in groups.value.itertuples():
+                folium.Circle(
+                    location=[group.lat, group.lon], radius=max(group.radius_km, 1) * 1000,
+                    color='red' if group.mean_aqi >= 150 else 'orange' if group.mean_aqi >= 100 else 'green',
+                    fill=True, fill_opacity=0.08, weight=1,
+                    tooltip=f"{group.sensors} sensors | mean AQI {group.mean_aqi:.0f}"
+                ).add_to(layer)
+
+    map_state = diagnostics.folium_map('Sensor Clusters', m, width=1200, height=600,
+                                       returned_objects=['last_clicked'])
+    render_point_query('Sensor Clusters', map_state)
+
+    # Sensor statistics
+    st.markdown("###  Sensor Network Statistics")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Total Sensors", len(sensor_data))
+    with col2:
+        green_sensors = len([s for s in sensor_data if s['aqi'] < 100])
+        st.metric("Good AQI Sensors", green_sensors)
+    with col3:
+        orange_sensors = len([s for s in sensor_data if 100 <= s['aqi'] < 150])
+        st.metric("Moderate AQI Sensors", orange_sensors)
+    with col4:
+        red_sensors = len([s for s in sensor_data if s['aqi'] >= 150])
+        st.metric("Poor AQI Sensors", red_sensors)
+
+    st.markdown("###  Sensor Groups by Recent AQI")
+    if groups is None:
+        st.info("Sensor groups are being computed in the background. They appear here once the first run finishes.")
+    else:
+        st.dataframe(groups.value.rename(columns={
+            'lat': 'Centre Lat', 'lon': 'Centre Lon', 'sensors': 'Sensors', 'mean_aqi': 'Mean AQI (15 min)',
+            'peak_aqi': 'Peak AQI', 'radius_km': 'Radius (km)'}), use_container_width=True, hide_index=True)
+        st.caption(f"k-means over sensor positions, computed {groups.finished} in {groups.seconds:.2f} s "
+                   f"(run {groups.version}, every 5 minutes)")
+
+    st.markdown("""
+    <div class='legend-box'>
+    <h4> Cluster Map Interpretation</h4>
+    <p><strong>Visualization Type:</strong> Cluster map with marker aggregation (Geospatial Module)</p>
+    <p><span style='color:#00aa00'>●</span> Green: Good air quality sensors (AQI < 100)</p>
+    <p><span style='color:#ff9900'>●</span> Orange: Moderate pollution (AQI 100-150)</p>
+    <p><span style='color:#ff0000'>●</span> Red: High pollution (AQI > 150)</p>
+    <p><strong>Circles:</strong> Groups of nearby sensors, coloured by their mean AQI over the last 15 minutes.</p>
+    <p><strong>Cluster Numbers:</strong> Indicates sensor density in that region. Zoom in to see individual sensors.</p>
+    <p><strong>Data Type:</strong> Static network snapshot - shows sensor distribution and coverage areas</p>
+    <p><strong>Total Sensors:</strong> {} deployed across Tamil Nadu monitoring network</p>
+    <p><strong>Note:</strong> This view does not auto-refresh. Data is cached until a new version of the network data lands.</p>
+    </div>
+    """.format(len(sensor_data)), unsafe_allow_html=True)
@@ -0,0 +1,81 @@
+"""SQL Query page"""
+from datetime import datetime
+import streamlit as st
+from smartcity import diagnostics
+from smartcity.data import REGISTRY, extend_history, get_history_store, run_history_query
+from smartcity.history import TEMPLATES, QueryError
+
+CUSTOM = 'Custom SQL'
+
+
+def render():
+    st.markdown("##  SQL Query - Historical Readings")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Read-only SQL over the on-disk hourly history | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    with diagnostics.span('SQL Query', 'data'):
+        store = get_history_store()
+        extend_history()
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        template_name = st.selectbox("Query template", list(TEMPLATES) + [CUSTOM])
+    with col2:
+        row_limit = st.number_input("Row limit", min_value=10, max_value=100000, value=1000, step=100)
+
+    template = TEMPLATES.get(template_name, {
+        'description': "Any single SELECT over readings, locations or the readings_v view",
+        'sql': "SELECT district, ROUND(AVG(aqi), 1) AS mean_aqi\nFROM readings_v\nGROUP BY district\nORDER BY mean_aqi DESC",
+        'params': {}
+    })
+    st.caption(template['description'])
+
+    # Template parameters, bound as named SQL parameters (never pasted into the SQL text)
+    params = {}
+    if template['params']:
+        cols = st.columns(len(template['params']))
+        for col, (name, (label, kind, default)) in zip(cols, template['params'].items()):
+            with col:
+                if kind == 'int':
+                    params[name] = st.number_input(label, min_value=1, value=default, key=f"sql_param_{name}")
+                else:
+                    options = REGISTRY.names[REGISTRY.districts if kind == 'district' else slice(None)].tolist()
+                    params[name] = st.selectbox(label, options, index=options.index(default),
+                                                key=f"sql_param_{kind}_{name}")
+
+    sql = st.text_area("SQL", value=template['sql'], height=220, key=f"sql_text_{template_name}")
+
+    with st.expander("Schema"):
+        st.code("""readings(ts, location_id, aqi, traffic_density, vehicles_count, avg_speed, incidents)
+locations(id, name, level, parent, district, lat, lon)
+readings_v(ts, location, level, parent, district, hour, weekday, day, is_weekend,
+           aqi, traffic_density, vehicles_count, avg_speed, incidents)""", language='sql')
+        st.markdown(f"**Readings stored:** {len(store):,} hourly rows")
+
+    with diagnostics.span('SQL Query', 'query'):
+        try:
+            result, truncated, elapsed_ms = run_history_query(sql, tuple(sorted(params.items())), int(row_limit))
+        except QueryError as exc:
+            st.error(f"Query failed: {exc}")
+            return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows", f"{len(result):,}")
+    with col2:
+        st.metric("Query Time", f"{elapsed_ms:.0f} ms")
+    with col3:
+        st.metric("Columns", len(result.columns))
+    if truncated:
+        st.warning(f"Result truncated to the first {int(row_limit):,} rows; raise the row limit or aggregate further.")
+
+    st.dataframe(result, use_container_width=True, hide_index=True)
+    st.download_button("Download CSV", result.to_csv(index=False), file_name='query_result.csv', mime='text/csv')
+
+    st.markdown("""
+    <div class='legend-box'>
+    <p><strong> SQL Analysis:</strong> Queries run inside the embedded database over the full hourly history,
+    so only the result rows are loaded. Results are cached until new hours are added.</p>
+    </div>
+    """, unsafe_allow_html=True)
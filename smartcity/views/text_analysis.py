@@ -0,0 +1,147 @@
+"""Text Analysis page"""
+from datetime import datetime, timedelta
+import random
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from smartcity import diagnostics
+from smartcity.data import REGISTRY, INCIDENT_TYPES, get_incident_index
+from smartcity.search import parse_query
+
+
+def render():
+    st.markdown("##  Text Data Visualization - Incident Reports")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Text data analysis and word frequency | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    # Generate incident text data
+    with diagnostics.span('Text Analysis', 'frame'):
+        incident_data = []
+        for _ in range(100):
+            incident_data.append({
+                'type': random.choice(INCIDENT_TYPES),
+                'count': 1
+            })
+
+        incident_df = pd.DataFrame(incident_data)
+        incident_summary = incident_df.groupby('type').size().reset_index(name='frequency')
+        incident_summary = incident_summary.sort_values('frequency', ascending=True)
+
+    # Create horizontal bar chart
+    with diagnostics.span('Text Analysis', 'figure'):
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            y=incident_summary['type'],
+            x=incident_summary['frequency'],
+            orientation='h',
+            marker=dict(
+                color=incident_summary['frequency'],
+                colorscale='Reds',
+                showscale=True,
+                colorbar=dict(title=dict(text="Frequency", side="right"))
+            ),
+            text=incident_summary['frequency'],
+            textposition='auto',
+            hovertemplate='<b>%{y}</b><br>Count: %{x}<extra></extra>'
+        ))
+
+        fig.update_layout(
+            title='Incident Type Frequency Analysis - Text Data Visualization',
+            xaxis_title='Frequency Count',
+            yaxis_title='Incident Type',
+            template='plotly_white',
+            height=500,
+            showlegend=False,
+            xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+            yaxis=dict(showgrid=False)
+        )
+
+    diagnostics.plotly_chart('Text Analysis', fig, use_container_width=True)
+
+    # Word cloud simulation with table
+    st.markdown("### 📊 Top Keywords from Incident Reports")
+
+    keywords = {
+        'heavy': 45, 'traffic': 42, 'pollution': 38, 'congestion': 35,
+        'delay': 28, 'accident': 25, 'alert': 22, 'slow': 20,
+        'vehicles': 18, 'emission': 15, 'road': 14, 'jam': 12
+    }
+
+    keyword_df = pd.DataFrame(list(keywords.items()), columns=['Keyword', 'Mentions'])
+    keyword_df = keyword_df.sort_values('Mentions', ascending=False)
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.dataframe(keyword_df, use_container_width=True, hide_index=True)
+
+    with col2:
+        st.markdown(f"""
+        **Report Summary:**
+        - Total Incidents: 100
+        - Most Common: Congestion
+        - Peak Time: 6-8 PM
+        - Critical Locations: 5
+        - Generated: {datetime.now().strftime('%H:%M')}
+        """)
+
+    # Search over the indexed incident reports
+    st.markdown("### 🔎 Search Incident Reports")
+
+    with diagnostics.span('Text Analysis', 'data'):
+        incident_index = get_incident_index()
+    search_locations = REGISTRY.names.tolist()
+
+    query = st.text_input("Search reports", placeholder="e.g. accident near Katpadi last 2 hours")
+    parsed = parse_query(query, search_locations, INCIDENT_TYPES)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        location_facet = st.multiselect("Location", search_locations, default=parsed['locations'])
+    with col2:
+        type_facet = st.multiselect("Incident Type", INCIDENT_TYPES, default=parsed['types'])
+    with col3:
+        time_windows = {'Any time': None, 'Last hour': 1, 'Last 2 hours': 2, 'Last 24 hours': 24,
+                        'Last 72 hours': 72}
+        window = st.selectbox("Time", list(time_windows.keys()))
+
+    since = parsed['since']
+    if time_windows[window] is not None:
+        since = datetime.now() - timedelta(hours=time_windows[window])
+
+    with diagnostics.span('Text Analysis', 'search'):
+        results, facets, search_ms = incident_index.search(
+            parsed['text'], locations=location_facet, types=type_facet, since=since, limit=50)
+
+    total_matches = sum(facets['incident_type'].values())
+    st.caption(f"{total_matches} matching reports of "
+               f"{len(incident_index)} indexed | query time {search_ms:.1f} ms")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        display_results = results.copy()
+        display_results['timestamp'] = display_results['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+        display_results.columns = ['Time', 'Location', 'Type', 'Report', 'Relevance']
+        st.dataframe(display_results, use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("**By Location**")
+        for name, count in list(facets['location'].items())[:8]:
+            st.markdown(f"- {name}: {count}")
+        st.markdown("**By Type**")
+        for name, count in facets['incident_type'].items():
+            st.markdown(f"- {name}: {count}")
+
+    st.markdown(f"""
+    <div class='legend-box'>
+    <h4> Text Visualization Analysis</h4>
+    <p><strong>Visualization Type:</strong> Text Data Visualization (Module 5 - Text data visualization)</p>
+    <p><strong>X-Axis:</strong> Frequency count of incident occurrences</p>
+    <p><strong>Y-Axis:</strong> Incident category/type</p>
+    <p><strong>Data Source:</strong> Automated incident reports from traffic management system</p>
+    <p><strong>Color Coding:</strong> Darker red indicates higher frequency incidents requiring priority attention</p>
+    <p><strong>Keyword Analysis:</strong> Most mentioned terms: 'heavy', 'traffic', 'pollution' - indicates primary concerns</p>
+    <p><strong>Actionable Intelligence:</strong> Focus resources on top 3 incident types. Deploy quick response teams for congestion and accidents.</p>
+    <p><strong>Report Period:</strong> Last 24 hours | <strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,205 @@
+"""Time Trends page"""
+from datetime import datetime, time, timedelta, timezone
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from smartcity import diagnostics
+from smartcity.analytics import UNHEALTHY_AQI
+from smartcity.data import REGISTRY, generate_time_series_data
+from smartcity.feed import feed_rollup, get_tiered_readings, location_readings
+from smartcity.scheduled import JOBS
+
+
+def render():
+    st.markdown("##  Time-Series Analysis - Historical and Daily Trends")
+
+    # -----------------------------
+    # 7-Day Historical Trend
+    # -----------------------------
+    start_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    end_date = datetime.now().strftime('%Y-%m-%d')
+
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'> Analysis period: {start_date} to {end_date}</p>",
+        unsafe_allow_html=True
+    )
+
+    with diagnostics.span('Time Trends', 'data'):
+        ts_data = generate_time_series_data(7)
+
+    with diagnostics.span('Time Trends', 'figure'):
+        fig1 = make_subplots(specs=[[{"secondary_y": True}]])
+        fig1.add_trace(
+            go.Scatter(x=ts_data['timestamp'], y=ts_data['traffic_volume'],
+                       name="Traffic Volume", line=dict(color='#667eea', width=3),
+                       fill='tonexty', fillcolor='rgba(102, 126, 234, 0.15)'),
+            secondary_y=False
+        )
+        fig1.add_trace(
+            go.Scatter(x=ts_data['timestamp'], y=ts_data['aqi'],
+                       name="AQI Level", line=dict(color='#ff6b6b', width=3),
+                       fill='tonexty', fillcolor='rgba(255, 107, 107, 0.15)'),
+            secondary_y=True
+        )
+
+        fig1.update_layout(
+            title="7-Day Traffic Volume vs Air Quality Trend",
+            xaxis_title="Date and Time",
+            template='plotly_white',
+            hovermode='x unified',
+            height=500,
+            xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+            yaxis=dict(showgrid=True, gridcolor='#f0f0f0')
+        )
+
+        fig1.update_yaxes(title_text="Traffic Volume (vehicles/hour)", secondary_y=False)
+        fig1.update_yaxes(title_text="Air Quality Index (AQI)", secondary_y=True)
+
+    diagnostics.plotly_chart('Time Trends', fig1, use_container_width=True)
+
+    # -----------------------------
+    # 24-Hour (Single Day) Trend
+    # -----------------------------
+    st.markdown("###  24-Hour Detailed View (Today)")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Date: {datetime.now().strftime('%Y-%m-%d')}</p>",
+        unsafe_allow_html=True
+    )
+
+    with diagnostics.span('Time Trends', 'data'):
+        daily_data = generate_time_series_data(1)  # Generate 24-hour dataset
+
+    with diagnostics.span('Time Trends', 'figure'):
+        fig2 = make_subplots(specs=[[{"secondary_y": True}]])
+        fig2.add_trace(
+            go.Scatter(x=daily_data['timestamp'], y=daily_data['traffic_volume'],
+                       name="Traffic Volume", line=dict(color='#1f77b4', width=3),
+                       fill='tozeroy', fillcolor='rgba(31, 119, 180, 0.2)'),
+            secondary_y=False
+        )
+        fig2.add_trace(
+            go.Scatter(x=daily_data['timestamp'], y=daily_data['aqi'],
+                       name="AQI Level", line=dict(color='#d62728', width=3),
+                       fill='tozeroy', fillcolor='rgba(214, 39, 40, 0.2)'),
+            secondary_y=True
+        )
+
+        fig2.update_layout(
+            title="24-Hour Traffic vs Air Quality Pattern (Today)",
+            xaxis_title="Hour of Day",
+            template='plotly_white',
+            hovermode='x unified',
+            height=450,
+            xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+            yaxis=dict(showgrid=True, gridcolor='#f0f0f0')
+        )
+
+        fig2.update_yaxes(title_text="Traffic Volume (vehicles/hour)", secondary_y=False)
+        fig2.update_yaxes(title_text="Air Quality Index (AQI)", secondary_y=True)
+
+    diagnostics.plotly_chart('Time Trends', fig2, use_container_width=True)
+
+    # -----------------------------
+    # Statistical insights
+    # -----------------------------
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        avg_traffic = ts_data['traffic_volume'].mean()
+        st.metric("Avg Traffic (7 Days)", f"{avg_traffic:.1f} veh/hr")
+    with col2:
+        avg_aqi = ts_data['aqi'].mean()
+        st.metric("Avg AQI (7 Days)", f"{avg_aqi:.1f}")
+    with col3:
+        correlation = ts_data['traffic_volume'].corr(ts_data['aqi'])
+        st.metric("Correlation", f"{correlation:.3f}")
+    with col4:
+        peak_hour = ts_data.loc[ts_data['traffic_volume'].idxmax(), 'hour']
+        st.metric("Peak Hour", f"{int(peak_hour)}:00")
+
+    # -----------------------------
+    # Sensor readings over any range (retention tiers)
+    # -----------------------------
+    st.markdown("###  Sensor Readings - Any Range")
+    with diagnostics.span('Time Trends', 'data'):
+        feed_rollup()
+        covered_from = get_tiered_readings().covered_from()
+
+    if covered_from is None:
+        st.info("No sensor readings recorded yet.")
+    else:
+        first_day = datetime.fromtimestamp(covered_from / 1e9, tz=timezone.utc).date()
+        today = datetime.now().date()
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            names = REGISTRY.names.tolist()
+            location = st.selectbox("Location", names, index=names.index('Vellore'), key='trends_location')
+        with col2:
+            dates = st.date_input("Date range", value=(max(first_day, today - timedelta(days=1)), today),
+                                  min_value=first_day, max_value=today, key='trends_range')
+        start, end = (dates[0], dates[-1]) if len(dates) else (today, today)
+
+        with diagnostics.span('Time Trends', 'data'):
+            readings, served, elapsed_ms = location_readings(
+                REGISTRY.id(location), datetime.combine(start, time.min), datetime.combine(end, time.max))
+
+        with diagnostics.span('Time Trends', 'figure'):
+            fig3 = make_subplots(specs=[[{"secondary_y": True}]])
+            fig3.add_trace(
+                go.Scatter(x=readings['timestamp'], y=readings['traffic_density'],
+                           name="Traffic Density", line=dict(color='#667eea', width=2)),
+                secondary_y=False
+            )
+            fig3.add_trace(
+                go.Scatter(x=readings['timestamp'], y=readings['aqi'],
+                           name="AQI Level", line=dict(color='#ff6b6b', width=2)),
+                secondary_y=True
+            )
+            fig3.update_layout(
+                title=f"Sensor Readings - {location} ({start} to {end})",
+                xaxis_title="Date and Time",
+                template='plotly_white',
+                hovermode='x unified',
+                height=450,
+                xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+                yaxis=dict(showgrid=True, gridcolor='#f0f0f0')
+            )
+            fig3.update_yaxes(title_text="Traffic Density (%)", secondary_y=False)
+            fig3.update_yaxes(title_text="Air Quality Index (AQI)", secondary_y=True)
+
+        diagnostics.plotly_chart('Time Trends', fig3, use_container_width=True)
+        tiers = ', '.join(f"{tier} {rows:,}" for tier, rows in served.items()) or 'none'
+        st.caption(f"{int(readings['readings'].sum()):,} readings averaged into {len(readings):,} points "
+                   f"in {elapsed_ms:.0f} ms | rows read per tier: {tiers}")
+
+    # -----------------------------
+    # Daily district summary (scheduled job)
+    # -----------------------------
+    st.markdown("###  Daily District Summary")
+    with diagnostics.span('Time Trends', 'data'):
+        summary = JOBS.artifact('daily_summary')
+    if summary is None:
+        st.info("The daily summary is being computed in the background. It appears here once the first run finishes.")
+    else:
+        districts = ['All districts'] + sorted(summary.value['district'].unique())
+        district = st.selectbox("District", districts, key='trends_summary_district')
+        table = summary.value if district == 'All districts' else summary.value[summary.value['district'] == district]
+        st.dataframe(table.rename(columns={
+            'day': 'Day', 'district': 'District', 'mean_aqi': 'Mean AQI', 'peak_aqi': 'Peak AQI',
+            'unhealthy_hours': f'Hours AQI > {UNHEALTHY_AQI}', 'mean_traffic': 'Mean Traffic (%)',
+            'incidents': 'Incidents', 'readings': 'Hours'}), use_container_width=True, hide_index=True, height=320)
+        st.caption(f"Computed {summary.finished} in {summary.seconds:.2f} s (run {summary.version})")
+
+    st.markdown("""
+    <div class='legend-box'>
+    <h4> Time-Series Visualization Analysis</h4>
+    <p><strong>Module Coverage:</strong> Time-series data visualization (Module 5 - Diverse Visual Analysis)</p>
+    <ul>
+      <li><strong>7-Day Graph:</strong> Shows weekly variation and trend correlation between traffic and pollution.</li>
+      <li><strong>24-Hour Graph:</strong> Zoomed-in view for today, highlighting intra-day fluctuations.</li>
+      <li><strong>Sensor Readings:</strong> Recorded sensor readings for any date range, read from memory (recent hours), memory-mapped segment files (recent days) or Parquet (older).</li>
+      <li><strong>Daily District Summary:</strong> Daily figures per district from the stored hourly history, recomputed in the background every hour.</li>
+    </ul>
+    <p><strong>Pattern Recognition:</strong> Daily peaks at 8–10 AM and 5–8 PM. AQI rises in sync with traffic surges.</p>
+    <p><strong>Actionable Insight:</strong> Use hourly monitoring for predictive congestion management and pollution alerts.</p>
+    </div>
+    """, unsafe_allow_html=True)
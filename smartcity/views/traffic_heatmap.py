@@ -0,0 +1,100 @@
+"""Traffic Heatmap page"""
+from datetime import datetime
+import streamlit as st
+import folium
+from folium import plugins
+from smartcity import diagnostics, spatial
+from smartcity.data import generate_static_data
+from smartcity.feed import feed_rollup, interpolated_surface
+from smartcity.views.point_query import render_point_query
+
+MAP_KEY = 'traffic_heatmap_map'
+MAP_WIDTH, MAP_HEIGHT = 1200, 600
+DEFAULT_CENTER, DEFAULT_ZOOM = (11.5, 78.5), 7
+
+# Layer name -> rollup metric interpolated from the sensors (None = centroid density heatmap)
+LAYERS = {
+    'Interpolated AQI surface': 'aqi',
+    'Interpolated traffic surface': 'traffic_density',
+    'Density heatmap': None
+}
+
+
+def _current_view():
+    """Centre, zoom and bounds of the map as last reported by the browser"""
+    state = st.session_state.get(MAP_KEY) or {}
+    zoom = state.get('zoom') or DEFAULT_ZOOM
+    center = state.get('center')
+    center = (center['lat'], center['lng']) if center else DEFAULT_CENTER
+    bounds = state.get('bounds') or {}
+    if bounds.get('_southWest') and bounds.get('_northEast') and bounds['_southWest'].get('lat') is not None:
+        south_west, north_east = bounds['_southWest'], bounds['_northEast']
+        bounds = ((south_west['lat'], south_west['lng']), (north_east['lat'], north_east['lng']))
+    else:
+        bounds = spatial.view_bounds(center, zoom, MAP_WIDTH, MAP_HEIGHT)
+    return center, zoom, bounds
+
+
+def render():
+    st.markdown("##  Traffic Density Heatmap")
+    st.markdown(
+        f"<p style='color:#666; font-style:italic;'>Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        unsafe_allow_html=True)
+
+    layer = st.radio("Layer", list(LAYERS), horizontal=True)
+    metric = LAYERS[layer]
+    center, zoom, bounds = _current_view()
+
+    with diagnostics.span('Traffic Heatmap', 'data'):
+        df = generate_static_data(st.session_state.show_vellore_areas)
+
+    # Surface over the current viewport at a resolution matching the zoom, cached per feed tick
+    overlay = None
+    if metric is not None:
+        with diagnostics.span('Traffic Heatmap', 'surface'):
+            feed_rollup()
+            image, image_bounds = interpolated_surface(metric, spatial.view_cells(bounds, zoom))
+            overlay = folium.FeatureGroup(name=layer)
+            folium.raster_layers.ImageOverlay(image, image_bounds, pixelated=False, name=layer).add_to(overlay)
+
+    with diagnostics.span('Traffic Heatmap', 'figure'):
+        m = folium.Map(location=list(DEFAULT_CENTER), zoom_start=DEFAULT_ZOOM, tiles='CartoDB positron')
+
+        if metric is None:
+            heat_data = [[row['lat'], row['lon'], row['traffic_density'] / 100] for _, row in df.iterrows()]
+            plugins.HeatMap(heat_data, radius=30, blur=25, max_zoom=10, gradient={
+                0.0: 'blue', 0.3: 'lime', 0.5: 'yellow', 0.7: 'orange', 1.0: 'red'
+            }).add_to(m)
+
+        for _, row in df.iterrows():
+            folium.CircleMarker(
+                location=[row['lat'], row['lon']],
+                radius=6,
+                popup=f"<b>{row['location']}</b><br>Traffic: {row['traffic_density']:.0f}%<br>Time: {datetime.now().strftime('%H:%M')}",
+                color='darkblue',
+                fill=True,
+                fillOpacity=0.7
+            ).add_to(m)
+
+    # The overlay is swapped in as a dynamic layer, so panning/zooming keeps the map in place
+    map_state = diagnostics.folium_map('Traffic Heatmap', m, width=MAP_WIDTH, height=MAP_HEIGHT, key=MAP_KEY,
+                                       center=center, zoom=zoom, feature_group_to_add=overlay,
+                                       returned_objects=['zoom', 'center', 'bounds', 'last_clicked'])
+    render_point_query('Traffic Heatmap', map_state)
+
+    st.markdown("""
+    <div class='legend-box'>
+    <h4> Traffic Heatmap Legend</h4>
+    <p><strong>Spatial Analysis:</strong> Shows traffic congestion intensity across Tamil Nadu districts</p>
+    <p><strong>Interpolated surfaces:</strong> AQI or traffic estimated between sensors by inverse-distance weighting
+    of the nearest sensors' last 15 minutes (AQI uses the Dashboard's category colours). The grid is refined as you zoom in.</p>
+    <ul>
+        <li><span style='color:#0000ff'>●</span> Blue: Free-flowing (0-30%)</li>
+        <li><span style='color:#00ff00'>●</span> Green: Light (30-50%)</li>
+        <li><span style='color:#ffff00'>●</span> Yellow: Moderate (50-70%)</li>
+        <li><span style='color:#ffa500'>●</span> Orange: Heavy (70-85%)</li>
+        <li><span style='color:#ff0000'>●</span> Red: Severe (85-100%)</li>
+    </ul>
+    <p><strong>Usage:</strong> Deploy traffic police in red zones, optimize signal timing in yellow zones</p>
+    </div>
+    """, unsafe_allow_html=True)
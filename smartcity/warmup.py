@@ -0,0 +1,153 @@
+"""Startup cache warmer and readiness endpoint
+
+At server start a background thread starts the process's background services
+(shared store feed, reading tier maintenance, job scheduler), then fills the
+Streamlit caches that the first visitor of each page would otherwise pay
+for: the static datasets (for both
+``include_vellore_areas`` variants), the district geometry, the sensor cluster
+layout and the incident search index. A small HTTP endpoint reports readiness
+so a load balancer only routes to warmed instances, and exposes the render
+diagnostics (see smartcity.diagnostics) for scraping.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+READY_PORT = int(os.environ.get('SMARTCITY_READY_PORT', '8502'))
+
+STATUS = {
+    'state': 'pending',
+    'started_at': None,
+    'finished_at': None,
+    'tasks': {}
+}
+
+_lock = threading.Lock()
+_thread = None
+_server = None
+
+
+def warm_tasks():
+    """(name, callable) pairs to run, in order"""
+    from smartcity import data, feed, geo, scheduled
+
+    tasks = [
+        # Join the multi-process shared realtime store (no-op unless SMARTCITY_SHARED_DIR is set)
+        ('shared_store', feed.start_shared_feed),
+        # Keep the warm/cold reading tiers fed and compacted in the background
+        ('tier_maintenance', feed.start_tier_maintenance),
+        # Run the heavy periodic analytics; pages read their latest results
+        ('jobs', scheduled.start_jobs),
+    ]
+    for include_vellore_areas in (False, True):
+        tasks.append((f'static_data[vellore_areas={include_vellore_areas}]',
+                      lambda v=include_vellore_areas: data.generate_static_data(v)))
+        tasks.append((f'sensor_clusters[vellore_areas={include_vellore_areas}]',
+                      lambda v=include_vellore_areas: data.generate_sensor_cluster_data(v)))
+    tasks.extend([
+        ('time_series[7d]', lambda: data.generate_time_series_data(7)),
+        ('time_series[1d]', lambda: data.generate_time_series_data(1)),
+        ('heatmap_matrix', data.generate_heatmap_matrix),
+        ('district_geometry', geo.load_district_geojson),
+        ('incident_index', data.get_incident_index),
+        ('history_store', data.get_history_store),
+        ('rollup_cube', feed.feed_rollup),
+    ])
+    return tasks
+
+
+def _wait_for_runtime(timeout):
+    """Block until the Streamlit runtime exists so we fill its caches, not a throwaway one"""
+    from streamlit import runtime
+
+    deadline = time.monotonic() + timeout
+    while not runtime.exists():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.1)
+    return True
+
+
+def _run(wait_for_runtime):
+    if wait_for_runtime and not _wait_for_runtime(timeout=120):
+        logger.warning("Streamlit runtime did not start; warming the standalone cache instead")
+
+    STATUS['state'] = 'warming'
+    STATUS['started_at'] = datetime.now().isoformat(timespec='seconds')
+    for name, task in warm_tasks():
+        started = time.perf_counter()
+        try:
+            task()
+            STATUS['tasks'][name] = {'seconds': round(time.perf_counter() - started, 3), 'error': None}
+        except Exception as exc:  # a missing asset must not keep the instance out of rotation forever
+            logger.warning("Cache warm-up task %s failed: %s", name, exc)
+            STATUS['tasks'][name] = {'seconds': round(time.perf_counter() - started, 3), 'error': str(exc)}
+    STATUS['finished_at'] = datetime.now().isoformat(timespec='seconds')
+    STATUS['state'] = 'ready'
+
+
+def start(wait_for_runtime=False):
+    """Start the warm-up thread once per process"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(wait_for_runtime,),
+                                       name='cache-warmup', daemon=True)
+            _thread.start()
+    return _thread
+
+
+def is_ready():
+    return STATUS['state'] == 'ready'
+
+
+class ReadinessHandler(BaseHTTPRequestHandler):
+    """GET /ready -> 200 once warmed (503 before), GET /live -> 200, GET /metrics -> Prometheus text"""
+
+    def do_GET(self):
+        from smartcity import diagnostics
+
+        if self.path.startswith('/metrics.json'):
+            self._send_body(200, diagnostics.to_json().encode(), 'application/json')
+        elif self.path.startswith('/metrics'):
+            self._send_body(200, diagnostics.to_prometheus().encode(), 'text/plain; version=0.0.4')
+        elif self.path.startswith('/live'):
+            self._send(200, {'state': 'live'})
+        elif self.path.startswith('/ready'):
+            self._send(200 if is_ready() else 503, STATUS)
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def _send(self, code, payload):
+        self._send_body(code, json.dumps(payload).encode(), 'application/json')
+
+    def _send_body(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def start_readiness_server(port=READY_PORT):
+    """Serve readiness on a side port; no-op if already running or the port is taken"""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(('0.0.0.0', port), ReadinessHandler)
+        except OSError as exc:
+            logger.warning("Readiness endpoint not started on port %s: %s", port, exc)
+            return None
+        threading.Thread(target=_server.serve_forever, name='readiness', daemon=True).start()
+    return _server
@@ -0,0 +1,189 @@
+"""Day-of-week x hour accumulator behind the Pollution Matrix
+
+Every reading adds its value to one (weekday, hour, location) cell of the
+partial for its calendar week (Monday-Sunday) and of the all-time totals,
+keeping sum, count and max. An update is O(1) per reading, and a matrix is
+read from the partials without touching the readings again:
+
+* all time: the totals, one 7 x 24 x locations read;
+* a date range: the partials of the weeks it overlaps. Each weekday row of
+  a weekly partial belongs to exactly one date, so ranges are sliced to the
+  day by masking rows at the range ends.
+
+Partials older than ``max_weeks`` are dropped (the totals keep them). The
+accumulator is saved to an ``.npz`` file and reloaded at start. Its
+``applied_until`` watermark (the newest reading included) is saved with it,
+and after a reload readings up to that time are skipped, so a feed replayed
+after a restart is not counted twice. Within a run there is no such cut-off:
+late readings are added to the week they belong to (duplicates are removed
+upstream, see smartcity.eventtime).
+"""
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+NS_PER_HOUR = 3600 * 10 ** 9
+# 1970-01-01 was a Thursday: shift day numbers so that weeks start on Monday
+EPOCH_WEEKDAY = 3
+EPOCH = date(1970, 1, 1)
+
+
+def _split(timestamps_ns):
+    hours = np.asarray(timestamps_ns, dtype='int64') // NS_PER_HOUR
+    days = hours // 24 + EPOCH_WEEKDAY
+    return days // 7, days % 7, hours % 24
+
+
+class WeekHourAccumulator:
+    """Incremental sum/count/max per (weekday, hour, location), by week and in total"""
+
+    def __init__(self, n_locations, path=None, max_weeks=104):
+        self.n_locations = n_locations
+        self.path = path
+        self.max_weeks = max_weeks
+        shape = (7, 24, n_locations)
+        self._shape = shape
+        self._weeks = {}  # week number -> (sum, count, max)
+        self._totals = self._empty()
+        self.applied_until = -1  # epoch ns of the newest reading included
+        self.resume_after = -1  # applied_until when loaded: older readings were included before the restart
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def _empty(self):
+        return (np.zeros(self._shape, dtype='float64'), np.zeros(self._shape, dtype='int64'),
+                np.full(self._shape, -np.inf, dtype='float64'))
+
+    def __len__(self):
+        """Readings included"""
+        return int(self._totals[1].sum())
+
+    def add(self, timestamps_ns, location_ids, values, historical=False):
+        """Include readings newer than `resume_after`; returns the number included
+
+        `historical` readings (a bulk import of past data, see
+        smartcity.backfill) are included whatever their time and leave
+        `applied_until` as it is; the caller guarantees they are new.
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype='int64')
+        location_ids = np.asarray(location_ids, dtype='int64')
+        values = np.asarray(values, dtype='float64')
+        with self._lock:
+            new = np.ones(len(timestamps_ns), dtype=bool) if historical else timestamps_ns > self.resume_after
+            if not new.any():
+                return 0
+            timestamps_ns, location_ids, values = timestamps_ns[new], location_ids[new], values[new]
+            weeks, weekdays, hours = _split(timestamps_ns)
+            for week in np.unique(weeks):
+                in_week = weeks == week
+                partial = self._weeks.get(int(week))
+                if partial is None:
+                    partial = self._weeks[int(week)] = self._empty()
+                self._accumulate(partial, weekdays[in_week], hours[in_week], location_ids[in_week], values[in_week])
+            self._accumulate(self._totals, weekdays, hours, location_ids, values)
+            if not historical:
+                self.applied_until = max(self.applied_until, int(timestamps_ns.max()))
+            for week in sorted(self._weeks)[:-self.max_weeks]:
+                del self._weeks[week]
+        return len(values)
+
+    @staticmethod
+    def _accumulate(target, weekdays, hours, location_ids, values):
+        total, count, peak = target
+        cells = (weekdays, hours, location_ids)
+        np.add.at(total, cells, values)
+        np.add.at(count, cells, 1)
+        np.maximum.at(peak, cells, values)
+
+    def date_range(self):
+        """(first, last) date with stored weekly partials, or None"""
+        with self._lock:
+            if not self._weeks:
+                return None
+            first, last = min(self._weeks), max(self._weeks)
+            first_day = next(d for d in range(7) if self._weeks[first][1][d].any())
+            last_day = next(d for d in reversed(range(7)) if self._weeks[last][1][d].any())
+        return (EPOCH + timedelta(days=first * 7 + first_day - EPOCH_WEEKDAY),
+                EPOCH + timedelta(days=last * 7 + last_day - EPOCH_WEEKDAY))
+
+    def _combine(self, start, end):
+        """Sum/count/max over the partials between dates `start` and `end` (inclusive)"""
+        first_day = (start - EPOCH).days + EPOCH_WEEKDAY
+        last_day = (end - EPOCH).days + EPOCH_WEEKDAY
+        total, count, peak = self._empty()
+        for week, (w_sum, w_count, w_max) in self._weeks.items():
+            days = np.arange(week * 7, week * 7 + 7)
+            rows = (days >= first_day) & (days <= last_day)
+            if not rows.any():
+                continue
+            total[rows] += w_sum[rows]
+            count[rows] += w_count[rows]
+            peak[rows] = np.maximum(peak[rows], w_max[rows])
+        return total, count, peak
+
+    def matrix(self, start=None, end=None, location_ids=None, stat='mean'):
+        """7 x 24 array of `stat` ('mean', 'max' or 'count') over a date range and set of locations
+
+        `start`/`end` are dates (inclusive); leaving both out reads the
+        all-time totals. Cells without readings are NaN (0 for 'count').
+        """
+        with self._lock:
+            if start is None and end is None:
+                total, count, peak = (a.copy() for a in self._totals)
+            else:
+                total, count, peak = self._combine(start or date.min, end or date.max)
+        if location_ids is not None:
+            location_ids = np.atleast_1d(location_ids)
+            total, count, peak = total[..., location_ids], count[..., location_ids], peak[..., location_ids]
+        total, count, peak = total.sum(axis=2), count.sum(axis=2), peak.max(axis=2, initial=-np.inf)
+        if stat == 'count':
+            return count
+        if stat == 'max':
+            return np.where(count > 0, peak, np.nan)
+        if stat == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(count > 0, total / count, np.nan)
+        raise ValueError(f"unknown stat {stat!r}")
+
+    def frame(self, start=None, end=None, location_ids=None, stat='mean'):
+        """matrix() as a DataFrame with weekday names as index and hours 0-23 as columns"""
+        return pd.DataFrame(self.matrix(start, end, location_ids, stat), index=DAYS, columns=list(range(24)))
+
+    def save(self, path=None):
+        """Write the totals and weekly partials to an .npz file (atomically replaced)"""
+        path = path or self.path
+        with self._lock:
+            weeks = np.array(sorted(self._weeks), dtype='int64')
+            arrays = {
+                'weeks': weeks,
+                'week_sum': np.array([self._weeks[w][0] for w in weeks]).reshape((-1,) + self._shape),
+                'week_count': np.array([self._weeks[w][1] for w in weeks]).reshape((-1,) + self._shape),
+                'week_max': np.array([self._weeks[w][2] for w in weeks]).reshape((-1,) + self._shape),
+                'total_sum': self._totals[0].copy(),
+                'total_count': self._totals[1].copy(),
+                'total_max': self._totals[2].copy(),
+                'applied_until': np.int64(self.applied_until)
+            }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp.npz'  # processes sharing DATA_DIR save independently
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        with np.load(path) as stored:
+            if stored['total_sum'].shape != self._shape:
+                return  # the location registry changed; start afresh
+            with self._lock:
+                self._weeks = {
+                    int(w): (stored['week_sum'][i], stored['week_count'][i], stored['week_max'][i])
+                    for i, w in enumerate(stored['weeks'])
+                }
+                self._totals = (stored['total_sum'], stored['total_count'], stored['total_max'])
+                self.applied_until = self.resume_after = int(stored['applied_until'])